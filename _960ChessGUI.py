@@ -1,39 +1,52 @@
+import asyncio
+import time
+STARTUP = time.perf_counter()
+
 import tkinter as tk
+import tkinter.filedialog
 from PIL import Image, ImageTk
 import chess
 import chess.variant
 import chess.engine
 import chess.pgn
-import datetime
 import random
 import os
-import cairosvg
-from itertools import combinations
-import json
-import threading
-
-with open("config.json", "r") as f:
-    config = json.load(f)
-
-SQUARE_SIZE = 64
+import queue
+from adjudication import AdjudicationRules
+from checkpoint import Checkpoint, checkpoint_filename, load_checkpoint
+from dashboard import DEFAULT_FRAME_RATE, Dashboard, LiveGames
+from elo import SPRT, format_elo
+from engine_loop import EngineLoop
+from engine_pool import EnginePool
+from engine_registry import EngineRegistry
+from eval_analyzer import EvalAnalyzer
+from match_core import GameScheduler, MATCH_PGN_FILENAME, load_config, make_match_jobs, make_round_robin_jobs, new_job, tournament_event_name, tournament_pgn_filename
+from metrics import Metrics
+from pgn_browser import PgnBrowser
+from piece_assets import PieceAssetCache
+from resources import ResourcePlan
+from results_db import RESULTS_DB_FILENAME
+from sp_index import StartPositionSchedule, parse_sp_filter, start_position_index
+from supervisor import EngineSupervisor
+from swiss import SwissTournament, default_swiss_rounds
+from time_control import TimeControl
+from widgets import BoardView, MoveLog
+
+config = load_config()
+
+SQUARE_SIZE = config.get("square_size", 64)
+DASHBOARD_SQUARE_SIZE = config.get("dashboard_square_size", 24)
+FRAME_INTERVAL_MS = 1000 // config.get("frame_rate", DEFAULT_FRAME_RATE)
 ASSET_PATH = "assets/"
+# viewed_game while the board shows a game from the browser, live games then stay off it
+BROWSED_GAME = -1
 
-input_folder = config["svg_input_folder"]
-output_folder = config["png_output_folder"]
-
-os.makedirs(output_folder, exist_ok=True)
-
-for filename in os.listdir(input_folder):
-    if filename.endswith(".svg"):
-        name = os.path.splitext(filename)[0]
-        input_path = os.path.join(input_folder, filename)
-        output_path = os.path.join(output_folder, f"{name}.png")
-        cairosvg.svg2png(url=input_path, write_to=output_path, output_width=64, output_height=64)
-        print(f"Converted {filename} -> {name}.png")
+piece_cache = PieceAssetCache(config["svg_input_folder"], config.get("asset_cache_folder", os.path.join(ASSET_PATH, "cache")), config["piece_path"])
 
 class Chess960GUI:
     def __init__(self, root):
         self.root = root
+        self.metrics = Metrics.from_config(config.get("metrics"))
         self.board = chess.Board(chess960=True)
         self.frame = tk.Frame(root)
         self.frame.pack()
@@ -43,53 +56,60 @@ class Chess960GUI:
         self.canvas.grid(row=0, column=1)
         self.move_log = tk.Text(self.frame, width=30, height=30, state='disabled', bg="#eee", font=("Consolas", 10))
         self.move_log.grid(row=0, column=2, sticky='ns')
+        self.move_log_view = MoveLog(self.move_log)
         self.eval_canvas_right = tk.Canvas(self.frame, width=50, height=8*SQUARE_SIZE, bg="white", highlightthickness=0)
         self.eval_canvas_right.grid(row=0, column=3, sticky='ns')
+        self.clock_label = tk.Label(self.frame, text="", font=("Consolas", 10))
+        self.clock_label.grid(row=1, column=1)
+        self.stats_label = tk.Label(self.frame, text="", font=("Consolas", 10))
+        self.stats_label.grid(row=2, column=0, columnspan=4)
         tk.Button(self.root, text="New Game (Random SP)", command=self.reset_game).pack(pady=10)
         self.pieces = {}
+        self.piece_images = {}
         self.selected_square = None
         self.load_images()
+        self.board_view = BoardView(self.canvas, SQUARE_SIZE, self.pieces)
         self.generate_chess960_position()
         self.draw_board()
+        self.update_move_log()
         self.canvas.bind("<Button-1>", self.on_click)
         self.completed_games = []
+        self.scheduler = None
+        self.analyzers = {}
+        self.resources = None
+        self.viewed_game = None
+        self.live = LiveGames()
+        self.browser = None
+        self.dashboard = None
+        self.tournament = None
         self.engine_list = config["engine_paths"]
-        self.engine_white_path = self.engine_list["Stockfish"]
-        self.engine_black_path = self.engine_list["Revenge"]
-        self.engine_a = None
-        self.engine_b = None
-        self.engine_white = None
-        self.engine_black = None
-        self.engine_white = chess.engine.SimpleEngine.popen_uci(self.engine_white_path)
-        if "clover" in self.engine_white.id.get("name", "").lower():
-            if "UCI_Chess960" in self.engine_white.options:
-                try:
-                    self.engine_white.configure({"UCI_Chess960": True})
-                    print("960 set to true")
-                except chess.engine.EngineError:
-                    print("Could not set 960 due to manual set error")
-                    pass
-        self.engine_black = chess.engine.SimpleEngine.popen_uci(self.engine_black_path)
-        if "clover" in self.engine_black.id.get("name", "").lower():
-            if "UCI_Chess960" in self.engine_black.options:
-                try:
-                    self.engine_black.configure({"UCI_Chess960": True})
-                except chess.engine.EngineError:
-                    pass
+        self.engine_white_name = "Stockfish"
+        self.engine_black_name = "Revenge"
+        self.engine_loop = EngineLoop()
+        # Engines start when a game first needs them, the registry remembers what each one supports between runs
+        self.engine_registry = EngineRegistry.from_config(config)
+        self.engine_pool = EnginePool(self.engine_list, log_dir=config.get("engine_log_dir", "logs"), metrics=self.metrics,
+                                      registry=self.engine_registry)
+        self.events = queue.Queue()
+        self.poll_events()
+        self.render_frame()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         tk.Button(self.root, text="Start Engine vs Engine", command=self.play_engine_vs_engine).pack(pady=5)
         tk.Button(self.root, text="Match Setup", command=self.open_match_setup).pack(pady=5)
         tk.Button(self.root, text="Tournament", command=self.open_tournament_setup).pack(pady=5)
+        tk.Button(self.root, text="Resume", command=self.open_resume).pack(pady=5)
+        tk.Button(self.root, text="Live Games", command=self.open_dashboard).pack(pady=5)
+        tk.Button(self.root, text="Browse Games", command=self.open_browser).pack(pady=5)
         tk.Button(self.root, text="Test Engine Castling", command=self.open_castling_test_popup).pack(pady=5)
 
 
     def load_images(self):
-        pieces = ['P', 'N', 'B', 'R', 'Q', 'K']
-        colors = ['w', 'b']
-        for color in colors:
-            for piece in pieces:
-                img_path = os.path.join(config["piece_path"], f"{color}{piece}.png")
-                img = Image.open(img_path)
-                self.pieces[color + piece] = ImageTk.PhotoImage(img.resize((SQUARE_SIZE, SQUARE_SIZE)))
+        self.pieces = self.pieces_for(SQUARE_SIZE)
+
+    def pieces_for(self, size):
+        if size not in self.piece_images:
+            self.piece_images[size] = {name: ImageTk.PhotoImage(Image.open(path)) for name, path in piece_cache.ensure(size).items()}
+        return self.piece_images[size]
 
     def generate_chess960_position(self):
         self.starting_sp = random.randint(0, 959)
@@ -98,20 +118,10 @@ class Chess960GUI:
         print(self.board)
 
     def draw_board(self):
-        self.canvas.delete("all")
-        for rank in range(8):
-            for file in range(8):
-                x1 = file * SQUARE_SIZE
-                y1 = rank * SQUARE_SIZE
-                x2 = x1 + SQUARE_SIZE
-                y2 = y1 + SQUARE_SIZE
-                color = "#f0d9b5" if (rank + file) % 2 == 0 else "#b58863"
-                self.canvas.create_rectangle(x1, y1, x2, y2, fill=color)
-
-                piece = self.board.piece_at(chess.square(file, 7 - rank))
-                if piece:
-                    key = ('w' if piece.color else 'b') + piece.symbol().upper()
-                    self.canvas.create_image(x1, y1, anchor='nw', image=self.pieces[key])
+        with self.metrics.timer("gui_draw_board_seconds"):
+            self.board_view.draw(self.board)
+            last = self.board.move_stack[-1] if self.board.move_stack else None
+            self.board_view.highlight([last.from_square, last.to_square] if last else [])
 
     def open_castling_test_popup(self):
         popup = tk.Toplevel(self.root)
@@ -156,7 +166,7 @@ class Chess960GUI:
         tk.Radiobutton(popup, text="White", variable=color_var, value="white").grid(row=2, column=1, sticky='w')
         tk.Radiobutton(popup, text="Black", variable=color_var, value="black").grid(row=2, column=2, sticky='w')
 
-        tk.Label(popup, text="Time per move (seconds)").grid(row=3, column=0, sticky='e')
+        tk.Label(popup, text="Time control (1.0, 60+0.6, 40/60)").grid(row=3, column=0, sticky='e')
         time_entry = tk.Entry(popup)
         time_entry.insert(0, "1.0")
         time_entry.grid(row=3, column=1)
@@ -166,6 +176,11 @@ class Chess960GUI:
         rounds_entry.insert(0, "4")
         rounds_entry.grid(row=4, column=1)
 
+        tk.Label(popup, text="Concurrent games").grid(row=5, column=0, sticky='e')
+        concurrency_entry = tk.Entry(popup)
+        concurrency_entry.insert(0, "1")
+        concurrency_entry.grid(row=5, column=1)
+
         def confirm():
             try:
                 engine_a_name = engine_a_var.get()
@@ -177,238 +192,258 @@ class Chess960GUI:
                     "engine_a_path": self.engine_list[engine_a_name],
                     "engine_b_path": self.engine_list[engine_b_name],
                     "engine_a_color": color_var.get(),
-                    "time_per_move": float(time_entry.get()),
+                    "time_control": str(TimeControl.parse(time_entry.get())),
                     "rounds": int(rounds_entry.get()),
-                    "current_round": 0,
-                    "score": {"A": 0, "B": 0}
+                    "concurrency": int(concurrency_entry.get()),
+                    "sprt": [float(x) for x in sprt_entry.get().replace(",", " ").split()],
+                    "paired": paired_var.get()
         }
+                if len(self.match_settings["sprt"]) not in (0, 2):
+                    raise ValueError("SPRT needs elo0 and elo1")
                 popup.destroy()
                 self.start_match()
             except ValueError:
-                tk.messagebox.showerror("Invalid input", "Please enter valid numbers for time and rounds.")
-
-        tk.Button(popup, text="Start Match", command=confirm).grid(row=5, column=1, pady=10)
-
-    def start_match(self, callback = None):
-        self.match_callback = callback
-        settings = self.match_settings
-
-        if settings["engine_a_color"] == "white":
-            self.engine_white = self.engine_a
-            self.engine_black = self.engine_b
-        else:
-            self.engine_white = self.engine_b
-            self.engine_black = self.engine_a
-
-        self.engine_white_name = settings["engine_a_name"] if settings["engine_a_color"] == "white" else settings["engine_b_name"]
-        self.engine_black_name = settings["engine_b_name"] if settings["engine_a_color"] == "white" else settings["engine_a_name"]
-
-        self.engine_a_path = self.engine_list[settings["engine_a_name"]]
-        self.engine_b_path = self.engine_list[settings["engine_b_name"]]
-
-        self.engine_a = chess.engine.SimpleEngine.popen_uci(self.engine_a_path)
-        self.engine_b = chess.engine.SimpleEngine.popen_uci(self.engine_b_path)
-
-        self.match_settings["current_white"] = self.engine_white_name
-        self.match_settings["current_black"] = self.engine_black_name
-
-        self.engine_white = chess.engine.SimpleEngine.popen_uci(self.engine_list[self.engine_white_name])
-        self.engine_black = chess.engine.SimpleEngine.popen_uci(self.engine_list[self.engine_black_name])
-            
-        self.match_settings["current_round"] = 1
-        self.play_single_round()
-
-    def play_single_round(self):
-        round_num = self.match_settings["current_round"]
-        total_rounds = self.match_settings["rounds"]
-
-        print(f"Starting Round {round_num}/{total_rounds}")
-        self.safe_quit_engine(self.engine_white, label="White")
-        self.safe_quit_engine(self.engine_black, label="Black")
-
-        white_name = self.match_settings["current_white"]
-        black_name = self.match_settings["current_black"]
-
-        self.engine_white = chess.engine.SimpleEngine.popen_uci(self.engine_list[white_name])
-        self.engine_black = chess.engine.SimpleEngine.popen_uci(self.engine_list[black_name])
-        self.engine_white_name = self.match_settings["current_white"]
-        self.engine_black_name = self.match_settings["current_black"]
-        self.generate_chess960_position()
-        self.draw_board()
-        self.update_move_log()
-
-        self.root.after(300, self.play_engine_turn)
-
-    def positions_with_king_on(self, file_letter: str):
-        file_index = ord(file_letter.lower()) - ord('a')
-        matches = []
-
-        for sp in range(960):
-            board = chess.Board.from_chess960_pos(sp)
-            king_square = board.king(chess.WHITE)
-            if chess.square_file(king_square) == file_index:
-                matches.append(sp)
+                tk.messagebox.showerror("Invalid input", "Please enter a valid time control, numbers for rounds and concurrency, and either nothing or two numbers for SPRT.")
 
-        return matches
+        tk.Label(popup, text="SPRT elo0 elo1 (optional)").grid(row=6, column=0, sticky='e')
+        sprt_entry = tk.Entry(popup)
+        sprt_entry.grid(row=6, column=1)
 
-    def play_castling_test_game(self, engine_name, count=1):
-        engine_path = self.engine_list[engine_name]
-        sp_candidates = self.positions_with_king_on('g') + self.positions_with_king_on('c')
-        test_sps = random.sample(sp_candidates, min(count, len(sp_candidates)))
-
-        def play_game(sp):
-            self.starting_sp = sp
-            self.board = chess.Board.from_chess960_pos(sp)
-            self.draw_board()
-            self.update_move_log()
-
-            engine = chess.engine.SimpleEngine.popen_uci(engine_path)
-            if "clover" in engine.id.get("name", "").lower():
-                if "UCI_Chess960" in engine.options:
-                    try:
-                        engine.configure({"UCI_Chess960": True})
-                        print("960 set to true")
-                    except chess.engine.EngineError:
-                        print("Could not set 960 due to manual set error")
-                        pass
-            self.engine_white = engine
-            self.engine_black = engine
-            self.engine_white_name = engine_name
-            self.engine_black_name = engine_name
-
-            self.match_settings = {
-                "engine_a_name": engine_name,
-                "engine_b_name": engine_name,
-                "engine_a_path": engine_path,
-                "engine_b_path": engine_path,
-                "engine_a_color": "white",
-                "time_per_move": 0.2,
-                "rounds": 1,
-                "current_round": 1,
-                "score": {"A": 0, "B": 0},
-                "current_white": engine_name,
-                "current_black": engine_name
-        }
+        paired_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(popup, text="Play each start position with both colors", variable=paired_var).grid(row=7, column=1, sticky='w')
 
-            self.root.after(300, self.play_engine_turn)
+        tk.Button(popup, text="Start Match", command=confirm).grid(row=8, column=1, pady=10)
 
-        threading.Thread(target=lambda: play_game(test_sps[0]), daemon=True).start()
-
-
-    def play_engine_turn(self):
-        if self.board.is_game_over():
-            self.handle_round_end()
+    def start_match(self):
+        settings = self.match_settings
+        jobs = make_match_jobs(settings["engine_a_name"], settings["engine_b_name"], settings["engine_a_color"],
+                               settings["rounds"], settings["time_control"],
+                               sp_schedule=StartPositionSchedule(seed=config.get("sp_seed")), paired=settings["paired"])
+        sprt = SPRT(*settings["sprt"], config.get("sprt_alpha", 0.05), config.get("sprt_beta", 0.05)) if settings["sprt"] else None
+        self.run_games(jobs, settings["concurrency"], MATCH_PGN_FILENAME, on_finished=self.end_match, sprt=sprt,
+                       checkpoint=Checkpoint(checkpoint_filename(MATCH_PGN_FILENAME), {"match": settings}))
+
+    def open_resume(self):
+        filename = tk.filedialog.askopenfilename(title="Resume Match or Tournament", initialdir="SavedGames",
+                                                 filetypes=[("Checkpoints", "*.checkpoint"), ("All files", "*")])
+        if not filename:
             return
+        try:
+            state = load_checkpoint(filename)
+        except (OSError, ValueError) as e:
+            tk.messagebox.showerror("Cannot Resume", str(e))
+            return
+        checkpoint = Checkpoint(filename)
+        if "match" in state.run:
+            self.match_settings = settings = state.run["match"]
+            sprt = SPRT(*settings["sprt"], config.get("sprt_alpha", 0.05), config.get("sprt_beta", 0.05)) if settings["sprt"] else None
+            self.run_games(list(state.jobs.values()), settings["concurrency"], state.run["pgn"], on_finished=self.end_match, sprt=sprt,
+                           checkpoint=checkpoint, resume=state)
+        elif "tournament" in state.run:
+            self.run_tournament(state.run["tournament"], checkpoint, state)
+        else:
+            tk.messagebox.showerror("Cannot Resume", f"{filename} was not written by the GUI.")
 
-        current_engine = self.engine_white if self.board.turn == chess.WHITE else self.engine_black
-        move_time = self.match_settings["time_per_move"]
-
-        def run_engine():
+    def run_games(self, jobs, concurrency, pgn_filename, on_finished=None, sprt=None, job_source=None, checkpoint=None, resume=None):
+        try:
+            # The eval bars analyse all through the run, so their engines get CPUs and Hash of the plan as well
+            analysis = 2 if config.get("eval_bars", True) else 0
+            resources = ResourcePlan.from_config(config.get("resources"), concurrency, self.engine_registry, analysis,
+                                                 config.get("analysis_threads", 1))
+        except ValueError as e:
+            tk.messagebox.showerror("Cannot Plan Resources", str(e))
+            return
+        if resources or self.resources:
+            # Restarted on the next position shown, pinned to the CPUs the new plan keeps for them
+            self.resources = resources
+            for analyzer in self.analyzers.values():
+                analyzer.close()
+            self.analyzers.clear()
+        if self.scheduler:
+            self.engine_loop.call_soon(self.scheduler.stop)
+            # The old writer is closed before the new one opens the same PGN file. Callbacks run in order, so once
+            # the sleep has run stop() has too and no game of the old run is queued after the close.
+            self.engine_loop.run(asyncio.sleep(0), timeout=5)
+            self.scheduler.close_pgn()
+        self.viewed_game = None
+        # A fresh store per run, moves a stopped scheduler still reports can't land on the new run's games
+        live = self.live = LiveGames()
+        if self.dashboard:
+            self.dashboard.reset()
+
+        def game_ended(record):
+            live.finish(record)
+            self.events.put(self.show_match_stats)
+
+        self.scheduler = GameScheduler(
+            self.engine_pool,
+            concurrency=concurrency,
+            pgn_filename=pgn_filename,
+            time_margin=config.get("time_margin_ms", 50) / 1000,
+            pgn_options={"batch_size": config.get("pgn_batch_size", 8), "fsync": config.get("pgn_fsync", False)},
+            results_db=config.get("results_db", RESULTS_DB_FILENAME),
+            sprt=sprt,
+            adjudication=AdjudicationRules.from_config(config.get("adjudication")),
+            supervisor=EngineSupervisor.from_config(self.engine_pool, config.get("supervision"), resources),
+            checkpoint=checkpoint,
+            metrics=self.metrics,
+            resources=resources,
+            on_game_start=live.start,
+            on_move=live.move,
+            on_game_end=game_ended
+        )
+        self.run_async(self.scheduler.run(jobs, job_source, resume), on_finished)
+
+    def run_async(self, coro, callback=None):
+        def done(future):
             try:
-                board_copy = chess.Board(self.board.fen(), chess960=True)
-                result = current_engine.play(board_copy, chess.engine.Limit(time=move_time))
-                self.root.after(0, lambda: self.apply_engine_move(result.move))
+                result = future.result()
             except Exception as e:
                 print("Engine failed:", e)
+                return
+            if callback:
+                self.events.put(lambda: callback(result))
 
-        threading.Thread(target=run_engine, daemon=True).start()
-        
-    def apply_engine_move(self, move):
-        self.board.push(move)
-        self.update_move_log()
+        self.engine_loop.submit(coro).add_done_callback(done)
+
+    def poll_events(self):
+        try:
+            while True:
+                self.events.get_nowait()()
+        except queue.Empty:
+            pass
+        self.root.after(20, self.poll_events)
+
+    def render_frame(self):
+        # The only place live games are drawn, at most frame_rate times a second however fast the engines move
+        with self.metrics.timer("gui_frame_seconds"):
+            changed = self.live.take()
+            if self.viewed_game is None:
+                running = [game for game in changed.values() if game["result"] is None]
+                if running:
+                    self.show_live_game(min(running, key=lambda game: game["job"]["id"]))
+            elif self.viewed_game in changed:
+                self.show_live_game(changed[self.viewed_game])
+            if self.dashboard:
+                self.dashboard.render(changed)
+        self.root.after(FRAME_INTERVAL_MS, self.render_frame)
+
+    def view_game(self, job, board):
+        self.viewed_game = job["id"]
+        self.starting_sp = job["sp"]
+        self.board = board
+        self.engine_white_name = job["white"]
+        self.engine_black_name = job["black"]
         self.draw_board()
+        self.update_move_log()
+        self.draw_eval_bar(self.eval_canvas_left, 0, self.engine_white_name)
+        self.draw_eval_bar(self.eval_canvas_right, 0, self.engine_black_name)
+        self.set_analysis_engines(self.engine_white_name, self.engine_black_name)
         self.update_eval_bars()
-        self.root.after(200, self.play_engine_turn)
-
-    def handle_round_end(self):
-        res = self.board.result()
-        white_name = self.match_settings["current_white"]
-        black_name = self.match_settings["current_black"]
 
-        print(f"\n--- Round {self.match_settings['current_round']} Complete ---")
-        print(f"Result: {white_name} (White) vs {black_name} (Black) - {res}")
-
-        if res == "1-0":
-            winner = "white"
-        elif res == "0-1":
-            winner = "black"
+    def show_live_game(self, game):
+        if game["job"]["id"] != self.viewed_game:
+            self.view_game(game["job"], game["board"])
         else:
-            winner = "draw"
-
-        white = self.match_settings["current_white"]
-        black = self.match_settings["current_black"]
-
-        if winner == "white":
-            self.tournament["scores"][white] += 1
-        elif winner == "black":
-            self.tournament["scores"][black] += 1
-        else:
-            self.tournament["scores"][white] += 0.5
-            self.tournament["scores"][black] += 0.5
-
-        self.match_settings["current_white"] = self.engine_white_name
-        self.match_settings["current_black"] = self.engine_black_name
-
-        self.engine_a = self.engine_list[self.match_settings["engine_a_name"]]
-        self.engine_b = self.engine_list[self.match_settings["engine_b_name"]]
+            self.board = game["board"]
+            # Several moves may have been played since the last frame
+            shown = len(self.move_log_view.sans)
+            if len(self.board.move_stack) >= shown:
+                for move in self.board.move_stack[shown:]:
+                    self.append_move_log(move)
+            else:
+                self.update_move_log()
+            self.draw_board()
+            self.update_eval_bars()
+        self.show_clocks(game["clocks"])
+        if game["result"] is not None:
+            # The final position stays up until a frame brings a running game
+            self.viewed_game = None
+
+    def open_dashboard(self):
+        if self.dashboard:
+            self.dashboard.window.lift()
+            return
+        self.dashboard = Dashboard(self.root, DASHBOARD_SQUARE_SIZE, self.pieces_for(DASHBOARD_SQUARE_SIZE),
+                                   self.open_live_game, self.close_dashboard)
+        self.dashboard.render(self.live.snapshot())
 
-        print(f"Score: {white}: {self.tournament['scores'][white]} | {black}: {self.tournament['scores'][black]}")
-        
-        tournament_name = None
-        if self.match_callback:
-            tournament_name = f"{self.tournament['type'].capitalize()}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        game = self.build_game_pgn(tournament_name=tournament_name)
-        self.save_game_to_pgn(game, is_tournament=bool(self.match_callback), tournament_name=tournament_name)
+    def open_live_game(self, game):
+        # A finished game stays on the board until another one is picked, a running one keeps updating
+        self.view_game(game["job"], game["board"])
+        self.show_clocks(game["clocks"])
 
+    def close_dashboard(self):
+        self.dashboard = None
 
-        self.safe_quit_engine(self.engine_white, label="White")
-        self.safe_quit_engine(self.engine_black, label="Black")
+    def open_browser(self):
+        if self.browser:
+            self.browser.window.lift()
+            return
+        self.browser = PgnBrowser(self.root, self.show_browsed_position, self.close_browser)
+
+    def show_browsed_position(self, board, headers):
+        self.viewed_game = BROWSED_GAME
+        self.board = board
+        startpos = headers.get("Startpos", "")
+        if startpos.isdigit():
+            self.starting_sp = int(startpos)
+        self.draw_board()
+        if len(board.move_stack) == len(self.move_log_view.sans) + 1:
+            self.append_move_log(board.peek())
+        else:
+            self.update_move_log()
+        self.clock_label.config(text=f"{headers.get('White', '?')} - {headers.get('Black', '?')}  {headers.get('Result', '*')}")
 
-        self.engine_white = chess.engine.SimpleEngine.popen_uci(
-            self.match_settings["engine_a_path"] if self.match_settings["current_white"] == self.match_settings["engine_a_name"]
-            else self.match_settings["engine_b_path"]
-)
+    def close_browser(self):
+        self.browser = None
+        if self.viewed_game == BROWSED_GAME:
+            self.viewed_game = None
 
-        self.engine_black = chess.engine.SimpleEngine.popen_uci(
-            self.match_settings["engine_a_path"] if self.match_settings["current_black"] == self.match_settings["engine_a_name"]
-            else self.match_settings["engine_b_path"]
-)
+    def show_clocks(self, clocks):
+        if clocks is None:
+            self.clock_label.config(text="")
+            return
+        white, black = clocks
+        self.clock_label.config(text=f"{self.engine_white_name} {white:.1f}s  |  {self.engine_black_name} {black:.1f}s")
 
-        self.match_settings["current_round"] += 1
-        if self.match_settings["current_round"] <= self.match_settings["rounds"]:
-            prev_white = self.match_settings["current_white"]
-            prev_black = self.match_settings["current_black"]
+    def show_match_stats(self):
+        scheduler = self.scheduler
+        if not scheduler or not scheduler.match_stats:
+            self.stats_label.config(text="")
+            return
+        summary = scheduler.match_stats.summary()
+        text = (f"{summary['engine_a']} vs {summary['engine_b']}: +{summary['wins']} ={summary['draws']} -{summary['losses']}  "
+                f"Elo {format_elo(summary['elo'], summary['elo_low'], summary['elo_high'])}")
+        if scheduler.sprt:
+            text += f"  LLR {scheduler.llr:.2f} ({scheduler.sprt.lower:.2f}, {scheduler.sprt.upper:.2f})"
+            if scheduler.sprt_decision:
+                text += f"  {scheduler.sprt_decision} accepted"
+        self.stats_label.config(text=text)
+
+    def end_match(self, scores):
+        print("\nMatch complete!")
+        print("Final Score:")
+        for name, score in scores.items():
+            print(f"  {name}: {score}")
+        self.scheduler.report_elo()
+        self.scheduler.report_adjudication()
+        self.scheduler.report_latency()
+        self.scheduler.supervisor.report()
+        if self.scheduler.resources:
+            self.scheduler.resources.report()
+        self.engine_pool.report()
+        self.metrics.report()
 
-            self.match_settings["current_white"] = prev_black
-            self.match_settings["current_black"] = prev_white
+    def play_castling_test_game(self, engine_name, count=1):
+        sp_candidates = start_position_index().find(king_file=["g", "c"])
+        test_sps = random.sample(sp_candidates, min(count, len(sp_candidates)))
 
-            self.engine_white = chess.engine.SimpleEngine.popen_uci(
-                self.engine_list[self.match_settings["current_white"]]
-            )
-            self.engine_black = chess.engine.SimpleEngine.popen_uci(
-                self.engine_list[self.match_settings["current_black"]]
-            )
+        jobs = []
+        for sp in test_sps:
+            jobs.append(new_job(len(jobs), engine_name, engine_name, len(jobs) + 1, 0.2, "Castling Test", sp))
 
-            self.root.after(1000, self.play_single_round)
-        else:
-            print("\nMatch complete!")
-            print("Final Score:")
-            for name, score in self.tournament["scores"].items():
-                print(f"  {name}: {score}")
-
-            if self.match_callback:
-                tournament_name = f"{self.tournament['type'].capitalize()}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                game = self.build_game_pgn(tournament_name=tournament_name)
-                self.save_game_to_pgn(game, is_tournament=bool(self.match_callback), tournament_name=tournament_name)
-
-                self.safe_quit_engine(self.engine_a, label="A")
-                self.safe_quit_engine(self.engine_b, label="B")
-                self.root.after(500, self.match_callback)
-            else:
-                game = self.build_game_pgn()
-                self.save_game_to_pgn(game)
-                self.safe_quit_engine(self.engine_a, label="A")
-                self.safe_quit_engine(self.engine_b, label="B")
+        self.run_games(jobs, 1, MATCH_PGN_FILENAME)
 
     def open_tournament_setup(self):
         popup = tk.Toplevel(self.root)
@@ -434,107 +469,139 @@ class Chess960GUI:
         rounds_entry.insert(0, "2")
         rounds_entry.grid(row=4, column=1)
 
-        tk.Label(popup, text="Time per move (s):").grid(row=5, column=1, sticky="w")
+        tk.Label(popup, text="Time control (1.0, 60+0.6, 40/60):").grid(row=5, column=1, sticky="w")
         time_entry = tk.Entry(popup)
         time_entry.insert(0, "1.0")
         time_entry.grid(row=6, column=1)
 
+        tk.Label(popup, text="Concurrent games:").grid(row=7, column=1, sticky="w")
+        concurrency_entry = tk.Entry(popup)
+        concurrency_entry.insert(0, "1")
+        concurrency_entry.grid(row=8, column=1)
+
+        tk.Label(popup, text="Start position filter:").grid(row=9, column=1, sticky="w")
+        sp_filter_entry = tk.Entry(popup)
+        sp_filter_entry.grid(row=10, column=1)
+
         def start_tournament():
             chosen = [name for name, var in selected_engines if var.get()]
             if len(chosen) < 2:
                 tk.messagebox.showerror("Error", "Select at least two engines.")
                 return
+            sp_filter = parse_sp_filter(sp_filter_entry.get().split())
+            try:
+                if sp_filter and not start_position_index().find(**sp_filter):
+                    raise KeyError("no start position matches")
+            except KeyError as e:
+                tk.messagebox.showerror("Invalid Filter", f"Start position filter: {e}")
+                return
             try:
                 settings = {
                     "engines": chosen,
                     "type": format_var.get(),
                     "rounds_per_pairing": int(rounds_entry.get()),
-                    "time_per_move": float(time_entry.get())
+                    "time_control": str(TimeControl.parse(time_entry.get())),
+                    "concurrency": int(concurrency_entry.get()),
+                    "sp_filter": sp_filter,
+                    "paired": paired_var.get(),
+                    "swiss_rounds": int(swiss_rounds_entry.get()) if swiss_rounds_entry.get().strip() else default_swiss_rounds(len(chosen))
             }
                 popup.destroy()
                 self.run_tournament(settings)
             except ValueError:
-                tk.messagebox.showerror("Invalid Input", "Rounds and time must be valid numbers.")
+                tk.messagebox.showerror("Invalid Input", "Rounds and concurrency must be valid numbers and the time control must be valid.")
 
-        tk.Button(popup, text="Start Tournament", command=start_tournament).grid(row=7, column=1, pady=10)
+        tk.Label(popup, text="Swiss rounds (empty = automatic):").grid(row=11, column=1, sticky="w")
+        swiss_rounds_entry = tk.Entry(popup)
+        swiss_rounds_entry.grid(row=12, column=1)
 
-    def safe_quit_engine(self, engine, label=""):
-        try:
-            engine.quit()
-        except Exception as e:
-            print(f"[{label}] Engine quit failed: {e}")
-            try:
-                engine.kill()
-                print(f"[{label}] Engine killed successfully.")
-            except Exception as kill_err:
-                print(f"[{label}] Engine kill also failed: {kill_err}")
+        paired_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(popup, text="Play each start position with both colors", variable=paired_var).grid(row=13, column=1, sticky="w")
 
+        tk.Button(popup, text="Start Tournament", command=start_tournament).grid(row=14, column=1, pady=10)
 
     def engine_move(self):
         if self.board.is_game_over():
             print("Game over:", self.board.result())
             return
 
-        engine = self.engine_white if self.board.turn == chess.WHITE else self.engine_black
-        result = engine.play(self.board, chess.engine.Limit(time=0.5))
+        name = self.engine_white_name if self.board.turn == chess.WHITE else self.engine_black_name
+        self.run_async(self.play_pooled(name, self.board.copy(), chess.engine.Limit(time=0.5)), self.apply_engine_move)
+
+    async def play_pooled(self, name, board, limit):
+        engine = await self.engine_pool.acquire(name)
+        try:
+            start = time.perf_counter()
+            result = await engine.play(board, limit, info=chess.engine.INFO_BASIC)
+            # The same series the scheduler fills, so moves played from the GUI show up next to match moves
+            self.metrics.observe("move_wall_seconds", time.perf_counter() - start, engine=name)
+            self.metrics.observe("move_search_seconds", result.info.get("time"), engine=name)
+            self.metrics.observe("move_depth", result.info.get("depth"), engine=name)
+        except Exception:
+            await self.engine_pool.discard(name, engine)
+            raise
+        self.engine_pool.release(name, engine)
+        return result
+
+    def apply_engine_move(self, result):
+        if result.move not in self.board.legal_moves:
+            return
         self.board.push(result.move)
         self.draw_board()
-        self.update_move_log()
-        
+        self.append_move_log(result.move)
+        self.update_eval_bars()
+
     def play_engine_vs_engine(self):
         if self.board.is_game_over():
             print("Game over:", self.board.result())
             return
 
-        engine = self.engine_white if self.board.turn == chess.WHITE else self.engine_black
+        name = self.engine_white_name if self.board.turn == chess.WHITE else self.engine_black_name
+        self.set_analysis_engines(self.engine_white_name, self.engine_black_name)
 
-        result = engine.play(self.board, chess.engine.Limit(time=0.3))
-        self.board.push(result.move)
+        def apply_and_continue(result):
+            self.apply_engine_move(result)
+            self.root.after(300, self.play_engine_vs_engine)
 
-        self.update_move_log()
-        self.draw_board()
-
-        self.root.after(300, self.play_engine_vs_engine)
+        self.run_async(self.play_pooled(name, self.board.copy(), chess.engine.Limit(time=0.3)), apply_and_continue)
 
     def update_move_log(self):
-        self.move_log.configure(state='normal')
-        self.move_log.delete(1.0, tk.END)
-
-        temp_board = chess.Board.from_chess960_pos(self.starting_sp)
-        moves = list(self.board.move_stack)
-        lines = []
-
-        for i in range(0, len(moves), 2):
-            move_number = i // 2 + 1
-            white_move = temp_board.san(moves[i])
-            temp_board.push(moves[i])
-            black_move = ""
-            if i + 1 < len(moves):
-                black_move = temp_board.san(moves[i+1])
-                temp_board.push(moves[i+1])
-            lines.append(f"{move_number}. {white_move} {black_move}")
-
-        self.move_log.insert(tk.END, "\n".join(lines))
-        self.move_log.configure(state='disabled')
-        self.move_log.see(tk.END)
-                    
-    def update_eval_bars(self):
-        board_copy = chess.Board(self.board.fen(), chess960=True)
-        limit = chess.engine.Limit(time=0.1)
+        with self.metrics.timer("gui_update_move_log_seconds"):
+            self.move_log_view.reset(self.board)
 
-        def get_eval(engine):
-            try:
-                info = engine.analyse(board_copy, limit)
-                return info["score"].white().score(mate_score=10000)
-            except:
-                return 0
+    def append_move_log(self, move):
+        with self.metrics.timer("gui_update_move_log_seconds"):
+            self.move_log_view.append(move)
 
-        eval_white = get_eval(self.engine_white)
-        eval_black = get_eval(self.engine_black)
+    def set_analysis_engines(self, white_name, black_name):
+        if not config.get("eval_bars", True):
+            return
+        for side, name in ((chess.WHITE, white_name), (chess.BLACK, black_name)):
+            analyzer = self.analyzers.get(side)
+            if analyzer and analyzer.name == name:
+                continue
+            if analyzer:
+                analyzer.close()
+            self.analyzers[side] = EvalAnalyzer(
+                name,
+                self.engine_pool,
+                on_score=lambda score, side=side: self.events.put(lambda: self.show_eval(side, score)),
+                engine_loop=self.engine_loop,
+                throttle=config.get("eval_bar_interval", 0.1),
+                threads=config.get("analysis_threads", 1),
+                resources=self.resources
+            )
 
-        self.draw_eval_bar(self.eval_canvas_left, eval_white, self.engine_white_name)
-        self.draw_eval_bar(self.eval_canvas_right, eval_black, self.engine_black_name)
+    def update_eval_bars(self):
+        with self.metrics.timer("gui_update_eval_bars_seconds"):
+            for analyzer in self.analyzers.values():
+                analyzer.set_position(self.board)
 
+    def show_eval(self, side, eval_score):
+        if side == chess.WHITE:
+            self.draw_eval_bar(self.eval_canvas_left, eval_score, self.analyzers[side].name)
+        else:
+            self.draw_eval_bar(self.eval_canvas_right, eval_score, self.analyzers[side].name)
 
     def draw_eval_bar(self, canvas, eval_score, engine_name):
         canvas.delete("all")
@@ -553,96 +620,88 @@ class Chess960GUI:
         eval_text = "0.00" if eval_score == 0 else f"{eval_score/100:.2f}"
         canvas.create_text(25, canvas_height - height - 10, text=eval_text, font=("Consolas", 10))
 
-    def run_tournament(self, settings):
-        os.makedirs("SavedGames", exist_ok=True)
+    def run_tournament(self, settings, checkpoint=None, resume=None):
+        # Resuming replays the checkpointed schedule, the settings only rebuild the Swiss pairing state around it
+        event = tournament_event_name(settings["type"])
+        pgn_filename = resume.run["pgn"] if resume else tournament_pgn_filename(event)
+        checkpoint = checkpoint or Checkpoint(checkpoint_filename(pgn_filename), {"tournament": settings})
         self.tournament = {
             "type": settings["type"],
             "engines": settings["engines"],
             "rounds_per_pairing": settings["rounds_per_pairing"],
-            "time_per_move": settings["time_per_move"],
+            "time_control": settings["time_control"],
+            "concurrency": settings["concurrency"],
             "scores": {name: 0 for name in settings["engines"]},
-            "pairings": [],
-            "current_match_index": 0,
-             "pgn_filename": os.path.join("SavedGames", f"{settings['type'].capitalize()}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.pgn")
+            "pgn_filename": pgn_filename
     }
 
-        pairings = list(combinations(settings["engines"], 2))
-        expanded_pairings = []
-
-        for a, b in pairings:
-            for i in range(settings["rounds_per_pairing"]):
-                if i % 2 == 0:
-                    expanded_pairings.append((a, b))
-                else:
-                    expanded_pairings.append((b, a))
-        random.shuffle(expanded_pairings)
-        self.tournament["pairings"] = expanded_pairings
-
-        self.play_next_tournament_match()
-
-    def play_next_tournament_match(self):
-        tournament = self.tournament
-        if tournament["current_match_index"] >= len(tournament["pairings"]):
-            self.end_tournament()
+        sp_schedule = StartPositionSchedule(settings["sp_filter"], config.get("sp_seed"))
+        if settings["type"] == "swiss":
+            swiss = SwissTournament(settings["engines"], settings["swiss_rounds"], settings["rounds_per_pairing"],
+                                    settings["time_control"], event, sp_schedule, settings["paired"])
+            self.tournament["swiss"] = swiss
+            if resume:
+                swiss.restore(resume.source)
+            jobs = list(resume.jobs.values()) if resume else swiss.start()
+            self.run_games(jobs, settings["concurrency"], pgn_filename, on_finished=self.end_tournament, job_source=swiss,
+                           checkpoint=checkpoint, resume=resume)
             return
 
-        white, black = tournament["pairings"][tournament["current_match_index"]]
-        print(f"Starting match: {white} (White) vs {black} (Black)")
-
-        self.match_settings = {
-            "engine_a_name": white,
-            "engine_b_name": black,
-            "engine_a_path": self.engine_list[white],
-            "engine_b_path": self.engine_list[black],
-            "engine_a_color": "white",
-            "time_per_move": tournament["time_per_move"],
-            "rounds": self.tournament["rounds_per_pairing"],
-            "current_round": 1,
-            "score": {"A": 0, "B": 0}
-    }
-        self.tournament["current_match_index"] += 1
-        self.start_match(callback=self.play_next_tournament_match)
+        if resume:
+            jobs = list(resume.jobs.values())
+        else:
+            jobs = make_round_robin_jobs(settings["engines"], settings["rounds_per_pairing"], settings["time_control"], event,
+                                         sp_schedule, settings["paired"])
+        self.run_games(jobs, settings["concurrency"], pgn_filename, on_finished=self.end_tournament, checkpoint=checkpoint, resume=resume)
 
-    def end_tournament(self):
+    def end_tournament(self, scores):
         print("Tournament Complete!")
-        self.safe_quit_engine(self.engine_a, label="A")
-        self.safe_quit_engine(self.engine_b, label="B")
-        sorted_scores = sorted(self.tournament["scores"].items(), key=lambda x: -x[1])
+        if self.tournament.get("swiss"):
+            # Byes are only in the Swiss state, the scheduler counts the games it played
+            scores = self.tournament["swiss"].scores()
+        self.tournament["scores"] = scores
+        sorted_scores = sorted(scores.items(), key=lambda x: -x[1])
         for name, score in sorted_scores:
             print(f"{name}: {score} pts")
-
-    def build_game_pgn(self, tournament_name=None):
-        game = chess.pgn.Game()
-        game.headers["Event"] = tournament_name if tournament_name else "Engine Match"
-        game.headers["Site"] = "Chess960 GUI"
-        game.headers["Date"] = datetime.datetime.now().strftime("%Y.%m.%d")
-        game.headers["Round"] = str(self.match_settings["current_round"] - 1)
-        game.headers["White"] = self.match_settings["current_white"]
-        game.headers["Black"] = self.match_settings["current_black"]
-        game.headers["Result"] = self.board.result()
-        game.headers["FEN"] = chess.Board.from_chess960_pos(self.starting_sp).fen()
-        game.headers["Variant"] = "Chess960"
-        game.headers["Startpos"] = str(self.starting_sp)
-
-        node = game
-        board = chess.Board.from_chess960_pos(self.starting_sp)
-        for move in self.board.move_stack:
-            node = node.add_variation(move)
-            board.push(move)
-
-        return game
+        if self.tournament.get("swiss"):
+            self.tournament["swiss"].report()
+        self.scheduler.report_elo()
+        self.scheduler.report_adjudication()
+        self.scheduler.report_latency()
+        self.scheduler.supervisor.report()
+        if self.scheduler.resources:
+            self.scheduler.resources.report()
+        self.engine_pool.report()
+        self.metrics.report()
+
+    def on_close(self):
+        if self.scheduler:
+            self.engine_loop.call_soon(self.scheduler.stop)
+        for analyzer in self.analyzers.values():
+            analyzer.close()
+        try:
+            for analyzer in self.analyzers.values():
+                analyzer.task.result(timeout=5)
+            self.engine_loop.run(self.engine_pool.shutdown(), timeout=10)
+        except Exception as e:
+            print(f"Engine shutdown failed: {e}")
+        if self.scheduler:
+            self.scheduler.close_pgn()
+        self.metrics.close()
+        self.engine_loop.close()
+        self.root.destroy()
 
     def reset_game(self):
         self.generate_chess960_position()
         self.draw_board()
         self.update_move_log()
+        self.update_eval_bars()
         self.selected_square = None
+        self.board_view.select(None)
 
                     
     def on_click(self, event):
-        file = event.x // SQUARE_SIZE
-        rank = 7 - (event.y // SQUARE_SIZE)
-        square = chess.square(file, rank)
+        square = self.board_view.square_at(event.x, event.y)
 
         if self.selected_square is None:
             piece = self.board.piece_at(square)
@@ -652,30 +711,21 @@ class Chess960GUI:
             move = chess.Move(self.selected_square, square)
             if move in self.board.legal_moves:
                     self.board.push(move)
-                    self.update_move_log()
+                    self.append_move_log(move)
                     self.draw_board()
+                    self.set_analysis_engines(self.engine_white_name, self.engine_black_name)
+                    self.update_eval_bars()
 
                     self.root.after(100, self.engine_move)
             self.selected_square = None
-            self.draw_board()
-            
-    def save_game_to_pgn(self, game, is_tournament=False, tournament_name=None):
-        os.makedirs("SavedGames", exist_ok=True)
-
-        if is_tournament and self.tournament and "pgn_filename" in self.tournament:
-            full_filename = self.tournament["pgn_filename"]
-        else:
-            full_filename = os.path.join("SavedGames", "engine_vs_engine_matches.pgn")
-
-        with open(full_filename, "a", encoding="utf-8") as f:
-            print(game, file=f)
-
-        print(f"Game saved to {full_filename}")
+        self.board_view.select(self.selected_square)
 
 
 if __name__ == "__main__":
     root = tk.Tk()
     root.title("Chess960 GUI")
     gui = Chess960GUI(root)
+    root.update_idletasks()
+    print(f"GUI ready in {(time.perf_counter() - STARTUP) * 1000:.0f} ms")
     root.mainloop()
 
@@ -0,0 +1,150 @@
+import chess
+import chess.syzygy
+import os
+from collections import deque
+
+# Used to estimate the plies an adjudicated game would have lasted before any game of the run finished on the board
+DEFAULT_GAME_PLIES = 160
+
+
+class AdjudicationRules:
+    """Thresholds for ending games early, scores are centipawns from White's point of view.
+
+    resign_score/resign_moves: both engines report at least resign_score for the same side on each of their last resign_moves moves.
+    draw_score/draw_moves/draw_after: from move draw_after on, both engines stay within draw_score on their last draw_moves moves.
+    syzygy_path: directory, or os.pathsep separated directories, of Syzygy tables, probed once few enough pieces are left.
+    """
+
+    def __init__(self, resign_score=None, resign_moves=3, draw_score=None, draw_moves=8, draw_after=40, syzygy_path=None):
+        self.resign_score = resign_score
+        self.resign_moves = resign_moves
+        self.draw_score = draw_score
+        self.draw_moves = draw_moves
+        self.draw_after = draw_after
+        self.syzygy_path = syzygy_path
+        self.tablebase = None
+
+    @classmethod
+    def from_config(cls, settings):
+        if not settings:
+            return None
+        return cls(**settings)
+
+    def settings(self):
+        return {
+            "resign_score": self.resign_score, "resign_moves": self.resign_moves, "draw_score": self.draw_score,
+            "draw_moves": self.draw_moves, "draw_after": self.draw_after, "syzygy_path": self.syzygy_path
+        }
+
+    def open_tablebase(self):
+        if self.syzygy_path and self.tablebase is None:
+            self.tablebase = chess.syzygy.Tablebase()
+            for directory in self.syzygy_path.split(os.pathsep):
+                if directory:
+                    self.tablebase.add_directory(directory)
+            print(f"Syzygy tablebases: {len(self.tablebase.wdl)} WDL tables, up to {self.max_pieces()} pieces")
+        return self.tablebase
+
+    def max_pieces(self):
+        if not self.tablebase or not self.tablebase.wdl:
+            return 0
+        return max(len(name) - 1 for name in self.tablebase.wdl)
+
+    def close(self):
+        if self.tablebase:
+            self.tablebase.close()
+            self.tablebase = None
+
+    def __str__(self):
+        parts = []
+        if self.resign_score is not None:
+            parts.append(f"resign at {self.resign_score}cp for {self.resign_moves} moves")
+        if self.draw_score is not None:
+            parts.append(f"draw within {self.draw_score}cp for {self.draw_moves} moves after move {self.draw_after}")
+        if self.syzygy_path:
+            parts.append(f"Syzygy from {self.syzygy_path}")
+        return ", ".join(parts) or "off"
+
+
+class Adjudicator:
+    def __init__(self, rules):
+        self.rules = rules
+        self.tablebase = rules.open_tablebase()
+        self.max_pieces = rules.max_pieces()
+        history = max(rules.resign_moves, rules.draw_moves)
+        self.scores = {chess.WHITE: deque(maxlen=history), chess.BLACK: deque(maxlen=history)}
+
+    def update(self, board, mover, score):
+        """Called after each move with the mover's score, returns (result, reason) once the game can be adjudicated."""
+        self.scores[mover].append(score)
+        # A game that just ended on the board keeps its real result and termination
+        if board.is_game_over():
+            return None
+        return self.probe(board) or self.check_scores(board)
+
+    def probe(self, board):
+        if not self.tablebase or chess.popcount(board.occupied) > self.max_pieces or board.castling_rights:
+            return None
+        try:
+            wdl = self.tablebase.probe_wdl(board)
+        except KeyError:
+            return None
+        if wdl in (-1, 0, 1):
+            return "1/2-1/2", "tablebase draw"
+        winner = board.turn if wdl > 0 else not board.turn
+        return ("1-0" if winner == chess.WHITE else "0-1"), "tablebase win"
+
+    def last(self, color, count):
+        scores = self.scores[color]
+        if len(scores) < count:
+            return None
+        recent = list(scores)[-count:]
+        return None if None in recent else recent
+
+    def check_scores(self, board):
+        rules = self.rules
+        if rules.resign_score is not None:
+            white, black = self.last(chess.WHITE, rules.resign_moves), self.last(chess.BLACK, rules.resign_moves)
+            if white and black:
+                if min(white + black) >= rules.resign_score:
+                    return "1-0", "Black resigns"
+                if max(white + black) <= -rules.resign_score:
+                    return "0-1", "White resigns"
+        if rules.draw_score is not None and board.fullmove_number >= rules.draw_after:
+            white, black = self.last(chess.WHITE, rules.draw_moves), self.last(chess.BLACK, rules.draw_moves)
+            if white and black and max(abs(score) for score in white + black) <= rules.draw_score:
+                return "1/2-1/2", "draw by score"
+        return None
+
+
+class AdjudicationStats:
+    def __init__(self):
+        self.reasons = {}
+        self.adjudicated = []
+        self.natural_plies = 0
+        self.natural_games = 0
+
+    def add(self, record):
+        plies = len(record["board"].move_stack)
+        reason = record.get("adjudication")
+        if reason is None:
+            if record["termination"] == "normal":
+                self.natural_plies += plies
+                self.natural_games += 1
+            return
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        wall = sum(timing["wall"] for timing in record["timings"])
+        self.adjudicated.append((plies, wall / plies if plies else 0.0))
+
+    def summary(self):
+        # The real length of an adjudicated game is unknown, games that ended on the board give the estimate
+        expected = self.natural_plies / self.natural_games if self.natural_games else DEFAULT_GAME_PLIES
+        plies_saved = sum(max(0.0, expected - plies) for plies, _ in self.adjudicated)
+        seconds_saved = sum(max(0.0, expected - plies) * per_ply for plies, per_ply in self.adjudicated)
+        return {
+            "adjudicated": len(self.adjudicated),
+            "reasons": dict(self.reasons),
+            "expected_plies": expected,
+            "plies_saved": plies_saved,
+            "seconds_saved": seconds_saved
+        }
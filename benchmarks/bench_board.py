@@ -0,0 +1,64 @@
+import os
+import random
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chess
+from bench_move_log import random_game
+from widgets import BoardView
+
+SQUARE_SIZE = 64
+PLIES = 200
+
+
+def full_redraw(canvas, board, pieces):
+    canvas.delete("all")
+    for square in chess.SQUARES:
+        x = chess.square_file(square) * SQUARE_SIZE
+        y = (7 - chess.square_rank(square)) * SQUARE_SIZE
+        canvas.create_rectangle(x, y, x + SQUARE_SIZE, y + SQUARE_SIZE, fill="#b58863")
+        piece = board.piece_at(square)
+        if piece:
+            key = ('w' if piece.color else 'b') + piece.symbol().upper()
+            canvas.create_image(x, y, anchor='nw', image=pieces[key])
+
+
+def replay(canvas, board, draw):
+    replay_board = board.root()
+    draw(replay_board)
+    times = []
+    for move in board.move_stack:
+        replay_board.push(move)
+        start = time.perf_counter()
+        draw(replay_board)
+        canvas.update_idletasks()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def run():
+    root = tk.Tk()
+    root.withdraw()
+    pieces = {color + piece: tk.PhotoImage(width=SQUARE_SIZE, height=SQUARE_SIZE) for color in "wb" for piece in "PNBRQK"}
+    board = random_game(PLIES, random.Random(960))
+
+    results = {}
+    canvas = tk.Canvas(root, width=8 * SQUARE_SIZE, height=8 * SQUARE_SIZE)
+    view = BoardView(canvas, SQUARE_SIZE, pieces)
+    times = replay(canvas, board, view.draw)
+    results["diff"] = {"mean_ms": sum(times) / len(times), "max_ms": max(times), "canvas_items": len(canvas.find_all())}
+
+    canvas = tk.Canvas(root, width=8 * SQUARE_SIZE, height=8 * SQUARE_SIZE)
+    times = replay(canvas, board, lambda b: full_redraw(canvas, b, pieces))
+    results["full"] = {"mean_ms": sum(times) / len(times), "max_ms": max(times), "canvas_items": len(canvas.find_all())}
+
+    root.destroy()
+    return results
+
+
+if __name__ == "__main__":
+    for name, row in run().items():
+        print(f"{name:>5}: {row['mean_ms']:.3f} ms/redraw (max {row['max_ms']:.3f} ms), {row['canvas_items']} canvas items")
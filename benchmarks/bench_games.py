@@ -0,0 +1,94 @@
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adjudication import AdjudicationRules
+from engine_loop import use_pidfd_child_watcher
+from engine_pool import EnginePool
+from match_core import GameScheduler, make_match_jobs
+from sp_index import StartPositionSchedule
+from supervisor import EngineSupervisor
+from time_control import TimeControl
+
+FAKE_ENGINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_engine.py")
+CONCURRENCY = [1, 2, 4, 8]
+GAMES_PER_WORKER = 2
+THINK = 0.005
+# The fake engine always reports 0.00, so the draw rule ends every game after about DRAW_AFTER moves
+DRAW_AFTER = 30
+SPAWNS = 5
+
+
+def fake_engine(*args):
+    return [sys.executable, FAKE_ENGINE, "--think", str(THINK), *args]
+
+
+async def play(engines, concurrency, games, supervisor_settings=None):
+    pool = EnginePool(engines)
+    jobs = make_match_jobs("A", "B", "white", games, TimeControl.parse(str(THINK)), sp_schedule=StartPositionSchedule(seed=960))
+    adjudication = AdjudicationRules(draw_score=0, draw_moves=4, draw_after=DRAW_AFTER)
+    scheduler = GameScheduler(pool, concurrency=concurrency, adjudication=adjudication,
+                              supervisor=EngineSupervisor.from_config(pool, supervisor_settings))
+    start = time.perf_counter()
+    try:
+        await scheduler.run(jobs)
+    finally:
+        await pool.shutdown()
+    elapsed = time.perf_counter() - start
+    plies = sum(len(record["board"].move_stack) for record in scheduler.results)
+    return {
+        "concurrency": concurrency,
+        "games": len(scheduler.results),
+        "seconds": elapsed,
+        "games_per_hour": len(scheduler.results) / elapsed * 3600,
+        "ms_per_ply": elapsed / plies * 1000 * concurrency if plies else None
+    }
+
+
+async def spawn_overhead():
+    pool = EnginePool({"A": fake_engine()})
+    try:
+        start = time.perf_counter()
+        engines = [await pool.spawn("A") for _ in range(SPAWNS)]
+        spawn = (time.perf_counter() - start) / SPAWNS
+        for engine in engines:
+            pool.release("A", engine)
+        start = time.perf_counter()
+        for _ in range(SPAWNS):
+            pool.release("A", await pool.acquire("A"))
+        reuse = (time.perf_counter() - start) / SPAWNS
+    finally:
+        await pool.shutdown()
+    return {"spawn_ms": spawn * 1000, "reuse_ms": reuse * 1000}
+
+
+async def run_async():
+    results = {"throughput": []}
+    engines = {"A": fake_engine(), "B": fake_engine()}
+    for concurrency in CONCURRENCY:
+        results["throughput"].append(await play(engines, concurrency, concurrency * GAMES_PER_WORKER))
+    # B dies every 20 moves and is restarted by the supervisor, which shows what a flaky engine costs
+    crashing = {"A": fake_engine(), "B": fake_engine("--crash-after", "20")}
+    results["crashing"] = await play(crashing, 2, 4, {"max_restarts": 100})
+    results["spawn"] = await spawn_overhead()
+    return results
+
+
+def run():
+    use_pidfd_child_watcher()
+    # The scheduler logs every game, only the numbers are of interest here
+    with contextlib.redirect_stdout(io.StringIO()):
+        return asyncio.run(run_async())
+
+
+if __name__ == "__main__":
+    results = run()
+    print(f"{'workers':>7} {'games':>6} {'seconds':>8} {'games/h':>9} {'ms/ply':>7}")
+    for label, row in [(str(row["concurrency"]), row) for row in results["throughput"]] + [("2+crash", results["crashing"])]:
+        print(f"{label:>7} {row['games']:>6} {row['seconds']:>8.2f} {row['games_per_hour']:>9.0f} {row['ms_per_ply']:>7.2f}")
+    print(f"Engine spawn {results['spawn']['spawn_ms']:.1f} ms, pooled reuse {results['spawn']['reuse_ms']:.2f} ms")
@@ -0,0 +1,59 @@
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_move_log import random_game
+from dashboard import DEFAULT_FRAME_RATE, LiveGames
+
+GAMES = 8
+SECONDS = 2.0
+PLIES = 200
+
+
+def feed(live, games, stop, counts):
+    # One thread like the engine loop, reporting moves far faster than any real set of games would
+    moves = 0
+    while not stop.is_set():
+        job, board = games[moves % len(games)]
+        move = board.move_stack[moves % len(board.move_stack)]
+        live.move(job, board, move, {"score": moves % 200 - 100, "clocks": (60.0, 60.0)})
+        moves += 1
+    counts["moves"] = moves
+
+
+def run():
+    rng = random.Random(960)
+    live = LiveGames()
+    stop = threading.Event()
+    counts = {}
+    games = []
+    for game_id in range(GAMES):
+        job = {"id": game_id, "white": "A", "black": "B", "sp": rng.randrange(960)}
+        live.start(job)
+        games.append((job, random_game(PLIES, rng)))
+    feeder = threading.Thread(target=feed, args=(live, games, stop, counts))
+
+    # What the GUI's frame loop does, minus the drawing
+    repaints = 0
+    feeder.start()
+    start = time.perf_counter()
+    while time.perf_counter() - start < SECONDS:
+        repaints += len(live.take())
+        time.sleep(1 / DEFAULT_FRAME_RATE)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    feeder.join()
+    return {
+        "moves_per_second": counts["moves"] / elapsed,
+        "repaints_per_second": repaints / elapsed
+    }
+
+
+if __name__ == "__main__":
+    results = run()
+    print(f"{GAMES} games reporting {results['moves_per_second']:.0f} moves/s, "
+          f"{results['repaints_per_second']:.0f} board repaints/s at {DEFAULT_FRAME_RATE} fps")
@@ -0,0 +1,67 @@
+import os
+import random
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chess
+from widgets import MoveLog
+
+LENGTHS = [50, 100, 200, 400, 800]
+SAMPLE = 50
+
+
+def random_game(plies, rng):
+    while True:
+        board = chess.Board.from_chess960_pos(rng.randint(0, 959))
+        while len(board.move_stack) < plies:
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        if len(board.move_stack) == plies:
+            return board
+
+
+def per_move_cost(log, board, incremental):
+    moves = board.move_stack
+    prefix = board.root()
+    for move in moves[:-SAMPLE]:
+        prefix.push(move)
+    log.reset(prefix)
+
+    start = time.perf_counter()
+    for move in moves[-SAMPLE:]:
+        prefix.push(move)
+        if incremental:
+            log.append(move)
+        else:
+            log.reset(prefix)
+        log.text.update_idletasks()
+    return (time.perf_counter() - start) / SAMPLE * 1000
+
+
+def run():
+    root = tk.Tk()
+    root.withdraw()
+    log = MoveLog(tk.Text(root, width=30, height=30, state='disabled'))
+    rng = random.Random(960)
+
+    results = []
+    for plies in LENGTHS:
+        board = random_game(plies, rng)
+        results.append({
+            "plies": plies,
+            "incremental_ms": per_move_cost(log, board, True),
+            "rebuild_ms": per_move_cost(log, board, False)
+        })
+    root.destroy()
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'plies':>6} {'append ms/move':>15} {'rebuild ms/move':>16}")
+    for row in run():
+        print(f"{row['plies']:>6} {row['incremental_ms']:>15.3f} {row['rebuild_ms']:>16.3f}")
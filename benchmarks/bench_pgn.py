@@ -0,0 +1,65 @@
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_move_log import random_game
+from match_core import build_game_pgn
+from pgn_writer import GameCatalog, PgnIndex, PgnWriter
+
+GAMES = 500
+PLIES = 120
+READS = 200
+
+
+def make_games(rng):
+    games = []
+    for game_id in range(GAMES):
+        board = random_game(PLIES, rng)
+        timings = [{"wall": 0.01, "score": 0, "depth": 10, "nodes": 2000} for _ in board.move_stack]
+        game = build_game_pgn(board, board.root().chess960_pos(), "A", "B", game_id + 1, event="Bench", result="1/2-1/2", timings=timings)
+        games.append((f"Bench#{game_id}", game))
+    return games
+
+
+def run():
+    rng = random.Random(960)
+    games = make_games(rng)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "bench.pgn")
+        # Serialising the games happens on the writer thread, so this is the end to end rate of getting games to disk
+        with contextlib.redirect_stdout(io.StringIO()):
+            writer = PgnWriter(filename, batch_size=8, flush_interval=0.05)
+            start = time.perf_counter()
+            for key, game in games:
+                writer.submit(key, game)
+            writer.close()
+            elapsed = time.perf_counter() - start
+        results["write_games_per_second"] = GAMES / elapsed
+        results["file_mb"] = os.path.getsize(filename) / 1e6
+
+        start = time.perf_counter()
+        pgn_index = PgnIndex(filename)
+        results["index_load_ms"] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for _ in range(READS):
+            pgn_index.read_game(rng.randrange(len(pgn_index)))
+        results["random_read_ms"] = (time.perf_counter() - start) / READS * 1000
+
+        # What the game browser does on opening a file the writer indexed
+        catalog = GameCatalog(filename)
+        results["catalog_games_per_second"] = len(catalog) / catalog.load_seconds
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    print(f"PGN write: {results['write_games_per_second']:.0f} games/s ({GAMES} games of {PLIES} plies, {results['file_mb']:.1f} MB)")
+    print(f"Index load {results['index_load_ms']:.1f} ms, random game read {results['random_read_ms']:.2f} ms")
+    print(f"Browser catalog: {results['catalog_games_per_second']:.0f} games/s")
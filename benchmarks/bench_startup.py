@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+
+# Each command runs in a fresh interpreter from the repository root, where the GUI module finds config.json
+COMMANDS = {
+    "headless_help_ms": [sys.executable, "headless.py", "--help"],
+    "gui_import_ms": [sys.executable, "-c", "import _960ChessGUI"],
+    "python_ms": [sys.executable, "-c", "pass"]
+}
+
+
+def best_of(command):
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times)
+
+
+def run():
+    results = {}
+    for name, command in COMMANDS.items():
+        try:
+            results[name] = best_of(command)
+        except subprocess.CalledProcessError:
+            results[name] = None
+    return results
+
+
+if __name__ == "__main__":
+    for name, value in run().items():
+        print(f"{name:>18}: {'failed' if value is None else f'{value:.0f} ms'}")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Stand-in UCI engine for benchmarks: plays random legal moves after a fixed think time.
+
+usage: fake_engine.py [--think SECONDS] [--score CP] [--startup SECONDS] [--seed N]
+                      [--crash-after N | --hang-after N | --illegal-after N]
+
+The failure options count "go" commands per process, so a restarted engine behaves the same way again.
+"""
+import argparse
+import random
+import sys
+import time
+
+import chess
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Random-move UCI engine for benchmarks.")
+    parser.add_argument("--think", type=float, default=0.01, help="seconds spent on every move")
+    parser.add_argument("--score", type=int, default=0, help="centipawn score reported with every move")
+    parser.add_argument("--startup", type=float, default=0.0, help="seconds to wait before answering uci")
+    parser.add_argument("--seed", type=int, help="seed for the move choice")
+    parser.add_argument("--crash-after", type=int, help="exit instead of answering go number N + 1")
+    parser.add_argument("--hang-after", type=int, help="never answer go number N + 1")
+    parser.add_argument("--illegal-after", type=int, help="answer go number N + 1 with an illegal move")
+    return parser.parse_args(argv)
+
+
+def position(parts):
+    moves = parts.index("moves") if "moves" in parts else len(parts)
+    if parts[1] == "fen":
+        board = chess.Board(" ".join(parts[2:moves]), chess960=True)
+    else:
+        board = chess.Board(chess960=True)
+    for move in parts[moves + 1:]:
+        board.push_uci(move)
+    return board
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = random.Random(args.seed)
+    board = chess.Board(chess960=True)
+    searches = 0
+
+    def send(*lines):
+        sys.stdout.write("".join(line + "\n" for line in lines))
+        sys.stdout.flush()
+
+    for line in sys.stdin:
+        parts = line.split()
+        if not parts:
+            continue
+        command = parts[0]
+        if command == "uci":
+            time.sleep(args.startup)
+            send("id name FakeEngine", "id author benchmarks",
+                 "option name UCI_Chess960 type check default false",
+                 "option name Threads type spin default 1 min 1 max 512",
+                 "option name Hash type spin default 16 min 1 max 65536",
+                 "uciok")
+        elif command == "isready":
+            send("readyok")
+        elif command == "position":
+            board = position(parts)
+        elif command == "go":
+            searches += 1
+            if args.crash_after is not None and searches > args.crash_after:
+                sys.exit(3)
+            if args.hang_after is not None and searches > args.hang_after:
+                time.sleep(1e6)
+            time.sleep(args.think)
+            if args.illegal_after is not None and searches > args.illegal_after:
+                send("bestmove a1a1")
+                continue
+            move = rng.choice(list(board.legal_moves))
+            milliseconds = int(args.think * 1000)
+            nodes = 1000 + milliseconds * 100
+            send(f"info depth 10 seldepth 12 score cp {args.score} nodes {nodes} nps {nodes * 1000 // max(milliseconds, 1)} "
+                 f"time {milliseconds} hashfull 0",
+                 f"bestmove {board.uci(move, chess960=True)}")
+        elif command == "quit":
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Runs every benchmark, writes the numbers to a JSON file and checks them against regression thresholds.
+
+usage: run_all.py [--output FILE] [--thresholds FILE] [--only NAME,...]
+
+The exit status is 1 when a number is past its threshold. Benchmarks that need a display are skipped without one.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tkinter as tk
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import bench_board
+import bench_games
+import bench_live
+import bench_move_log
+import bench_pgn
+import bench_startup
+
+ROOT = os.path.dirname(BENCH_DIR)
+THRESHOLDS_FILENAME = os.path.join(BENCH_DIR, "thresholds.json")
+RESULTS_FILENAME = os.path.join(ROOT, "bench_results.json")
+
+
+def games_metrics():
+    results = bench_games.run()
+    metrics = {f"games_per_hour_c{row['concurrency']}": row["games_per_hour"] for row in results["throughput"]}
+    metrics["games_per_hour_crashing"] = results["crashing"]["games_per_hour"]
+    metrics["engine_spawn_ms"] = results["spawn"]["spawn_ms"]
+    metrics["engine_reuse_ms"] = results["spawn"]["reuse_ms"]
+    return metrics
+
+
+def move_log_metrics():
+    metrics = {}
+    for row in bench_move_log.run():
+        metrics[f"move_log_append_ms_{row['plies']}"] = row["incremental_ms"]
+        metrics[f"move_log_rebuild_ms_{row['plies']}"] = row["rebuild_ms"]
+    return metrics
+
+
+def board_metrics():
+    results = bench_board.run()
+    return {f"board_redraw_{name}_ms": row["mean_ms"] for name, row in results.items()}
+
+
+def pgn_metrics():
+    results = bench_pgn.run()
+    return {
+        "pgn_write_games_per_second": results["write_games_per_second"],
+        "pgn_index_load_ms": results["index_load_ms"],
+        "pgn_random_read_ms": results["random_read_ms"],
+        "pgn_catalog_games_per_second": results["catalog_games_per_second"]
+    }
+
+
+def live_metrics():
+    results = bench_live.run()
+    return {
+        "live_moves_per_second": results["moves_per_second"],
+        "live_repaints_per_second": results["repaints_per_second"]
+    }
+
+
+def startup_metrics():
+    return bench_startup.run()
+
+
+BENCHMARKS = {
+    "games": games_metrics,
+    "move_log": move_log_metrics,
+    "board": board_metrics,
+    "pgn": pgn_metrics,
+    "live": live_metrics,
+    "startup": startup_metrics
+}
+
+
+def check(metrics, thresholds):
+    failures = []
+    for name, limits in thresholds.items():
+        value = metrics.get(name)
+        if value is None:
+            continue
+        if "min" in limits and value < limits["min"]:
+            failures.append(f"{name} = {value:.4g}, below the minimum of {limits['min']:g}")
+        if "max" in limits and value > limits["max"]:
+            failures.append(f"{name} = {value:.4g}, above the maximum of {limits['max']:g}")
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and check for regressions.")
+    parser.add_argument("--output", default=RESULTS_FILENAME, help="JSON file the results are written to")
+    parser.add_argument("--thresholds", default=THRESHOLDS_FILENAME, help="JSON file with a min and/or max per metric")
+    parser.add_argument("--only", help="comma separated benchmarks to run: " + ", ".join(BENCHMARKS))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise SystemExit(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+    metrics = {}
+    skipped = []
+    for name in names:
+        print(f"Running {name}...", flush=True)
+        try:
+            metrics.update(BENCHMARKS[name]())
+        except tk.TclError as e:
+            print(f"  skipped: {e}")
+            skipped.append(name)
+
+    with open(args.thresholds, "r") as f:
+        thresholds = json.load(f)
+    failures = check(metrics, thresholds)
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "skipped": skipped,
+            "metrics": metrics,
+            "regressions": failures
+        }, f, indent=2)
+
+    for name, value in metrics.items():
+        limits = thresholds.get(name, {})
+        limit = ", ".join(f"{key} {value:g}" for key, value in limits.items())
+        print(f"  {name:<30} {value:>12.4g}  {limit}")
+    print(f"Results written to {args.output}")
+    if failures:
+        print("Regressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
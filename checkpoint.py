@@ -0,0 +1,125 @@
+import json
+import os
+
+
+def checkpoint_filename(pgn_filename):
+    return os.path.splitext(pgn_filename)[0] + ".checkpoint"
+
+
+class CheckpointState:
+    """What a checkpoint file says about a run: its settings, every job handed out and how far each game got."""
+
+    def __init__(self):
+        self.run = None
+        self.jobs = {}
+        self.games = {}
+        self.moves = {}
+        self.source = None
+        self.source_games = []
+        self.size = 0
+
+    def finished(self, job_id):
+        return job_id in self.games
+
+    def pending_jobs(self):
+        return [job for job_id, job in self.jobs.items() if job_id not in self.games]
+
+
+def load_checkpoint(filename):
+    state = CheckpointState()
+    with open(filename, "rb") as f:
+        for line in f:
+            # The last line is incomplete if the process died while writing it, everything before it still counts
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            state.size += len(line)
+            kind = entry["type"]
+            if kind == "run":
+                state.run = entry
+            elif kind == "jobs":
+                for job in entry["jobs"]:
+                    state.jobs[job["id"]] = job
+                if entry.get("source") is not None:
+                    state.source = entry["source"]
+                    state.source_games = []
+            elif kind == "move":
+                state.moves.setdefault(entry["id"], []).append(entry)
+            elif kind == "game":
+                state.games[entry["id"]] = entry
+                state.moves.pop(entry["id"], None)
+                state.source_games.append(entry["id"])
+    if state.run is None:
+        raise ValueError(f"{filename} is not a checkpoint")
+    return state
+
+
+class Checkpoint:
+    """Journal of a match or tournament, enough to resume it after the GUI or the machine went down.
+
+    One JSON object per line: "run" (settings to rebuild the run, always first), "jobs" (games handed to the
+    scheduler, with the job source's state at that point), "move" (a move of a game in progress) and "game"
+    (a finished game). A new run replaces the file atomically, game and job lines are fsynced before the
+    game is reported anywhere else, move lines are only flushed.
+    """
+
+    def __init__(self, filename, run=None, fsync=True):
+        self.filename = filename
+        self.run = run or {}
+        self.fsync = fsync
+        self.file = None
+
+    def start(self, **run):
+        os.makedirs(os.path.dirname(self.filename) or ".", exist_ok=True)
+        temp = self.filename + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(dict(self.run, type="run", **run)) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.filename)
+        self.file = open(self.filename, "a", encoding="utf-8")
+
+    def resume(self, state):
+        # Drop a torn last line so the next entry starts on a line of its own
+        with open(self.filename, "r+b") as f:
+            f.truncate(state.size)
+        self.file = open(self.filename, "a", encoding="utf-8")
+
+    def write(self, entry, sync=False):
+        if self.file is None:
+            return
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+        if sync and self.fsync:
+            os.fsync(self.file.fileno())
+
+    def add_jobs(self, jobs, source=None):
+        self.write({"type": "jobs", "jobs": jobs, "source": source}, sync=True)
+
+    def add_move(self, job, move, timing):
+        self.write({"type": "move", "id": job["id"], "move": move.uci(), "timing": timing})
+
+    def add_game(self, job, record, date=None):
+        if record is None:
+            self.write({"type": "game", "id": job["id"], "result": None}, sync=True)
+            return
+        self.write({
+            "type": "game",
+            "id": job["id"],
+            "result": record["result"],
+            "termination": record["termination"],
+            "adjudication": record["adjudication"],
+            "failure": record["failure"],
+            "restarts": record["restarts"],
+            "date": date,
+            "moves": [move.uci() for move in record["board"].move_stack],
+            "timings": record["timings"]
+        }, sync=True)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
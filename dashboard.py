@@ -0,0 +1,120 @@
+import threading
+import tkinter as tk
+import chess
+from widgets import MiniBoard
+
+DEFAULT_FRAME_RATE = 10
+
+
+class LiveGames:
+    """Latest state of every game of a run, written by the scheduler hooks on the engine thread.
+
+    A move only replaces the game's entry and marks it dirty, nothing is queued per move. The UI calls
+    take() once a frame and repaints what changed since the previous one, so its work depends on the
+    frame rate and the number of games, not on how fast the engines move. A finished game is dropped
+    once take() has handed out its result.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.games = {}
+        self.dirty = set()
+
+    def start(self, job):
+        with self.lock:
+            self.games[job["id"]] = {"job": job, "board": chess.Board.from_chess960_pos(job["sp"]), "move": None,
+                                     "score": None, "clocks": None, "result": None}
+            self.dirty.add(job["id"])
+
+    def move(self, job, board, move, info):
+        with self.lock:
+            game = self.games.get(job["id"])
+            if game is None:
+                return
+            game["board"] = board
+            game["move"] = move
+            if info["score"] is not None:
+                game["score"] = info["score"]
+            game["clocks"] = info["clocks"]
+            self.dirty.add(job["id"])
+
+    def finish(self, record):
+        with self.lock:
+            game = self.games.get(record["job"]["id"])
+            if game is None:
+                return
+            game["result"] = record["result"]
+            self.dirty.add(record["job"]["id"])
+
+    def take(self):
+        """Copies of the games that changed since the last call, by game id."""
+        with self.lock:
+            dirty, self.dirty = self.dirty, set()
+            changed = {game_id: dict(self.games[game_id]) for game_id in dirty}
+            for game_id, game in changed.items():
+                if game["result"] is not None:
+                    del self.games[game_id]
+            return changed
+
+    def snapshot(self):
+        with self.lock:
+            return {game_id: dict(game) for game_id, game in self.games.items()}
+
+
+class Dashboard:
+    """Window with a small board for each running game, clicking one shows it on the main board.
+
+    render() is given what LiveGames.take() returned for the frame and only touches those boards. The
+    board of a finished game keeps its final position until the next game that needs a board takes it,
+    so the grid grows to the number of games running at once and no further.
+    """
+
+    def __init__(self, root, square_size, pieces, on_open, on_close=None, columns=4):
+        self.square_size = square_size
+        self.pieces = pieces
+        self.on_open = on_open
+        self.on_close = on_close
+        self.columns = columns
+        self.boards = {}
+        self.slots = []
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Live Games")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.tiles = tk.Frame(self.window)
+        self.tiles.pack(padx=5, pady=5)
+
+    def render(self, changed):
+        """Shows the given games, a dict of game id to LiveGames entry."""
+        # Finished games first, a game starting in the same frame can then take the board one of them frees
+        for game_id, game in sorted(changed.items(), key=lambda item: (item[1]["result"] is None, item[0])):
+            board = self.boards.get(game_id)
+            if board is None:
+                if game["result"] is not None:
+                    continue
+                board = self.place(game_id)
+            board.show(game)
+
+    def place(self, game_id):
+        board = next((slot for slot in self.slots if slot.finished), None)
+        if board is None:
+            board = MiniBoard(self.tiles, self.square_size, self.pieces, self.on_open)
+            row, column = divmod(len(self.slots), self.columns)
+            board.frame.grid(row=row, column=column, padx=2, pady=2)
+            self.slots.append(board)
+        else:
+            del self.boards[board.game_id]
+        board.game_id = game_id
+        self.boards[game_id] = board
+        return board
+
+    def reset(self):
+        for board in self.slots:
+            board.frame.destroy()
+        self.boards.clear()
+        self.slots.clear()
+
+    def close(self):
+        self.window.destroy()
+        if self.on_close:
+            self.on_close()
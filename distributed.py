@@ -0,0 +1,503 @@
+import asyncio
+import chess
+import hmac
+import json
+import os
+import secrets
+import socket
+import time
+from adjudication import AdjudicationRules
+from match_core import GameScheduler, abandoned_record, play_game
+from supervisor import FAILURES, EngineSupervisor
+
+DEFAULT_PORT = 9600
+# Where a worker finds the coordinator's token when --token is not given, keeps it out of the process list
+TOKEN_ENV = "CHESS960_TOKEN"
+# Games wait for a free worker slot before they start, so idle scheduler tasks cost next to nothing
+MAX_REMOTE_GAMES = 1024
+HEARTBEAT_INTERVAL = 5.0
+HEARTBEAT_TIMEOUT = 30.0
+RECONNECT_DELAY = 2.0
+# A result carries a whole game with its timings, far past the 64 KiB lines asyncio streams allow by default
+LINE_LIMIT = 1 << 24
+# The type of every field of a result or failed message
+RESULT_FIELDS = {
+    "result": {"result": str, "termination": str, "adjudication": (str, type(None)), "failure": (str, type(None)),
+               "restarts": int, "moves": list, "timings": list},
+    "failed": {"error": str}
+}
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+# What a malformed message from the other side raises, it ends the connection rather than the task reading it
+MALFORMED = (ValueError, KeyError, TypeError, AttributeError)
+
+
+def parse_address(text, default_host):
+    """"host:port", ":port" or "host" as (host, port)."""
+    host, _, port = text.rpartition(":") if ":" in text else (text, "", "")
+    return host or default_host, int(port) if port else DEFAULT_PORT
+
+
+class Connection:
+    """One JSON object per line in both directions."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        peer = writer.get_extra_info("peername")
+        self.peer = f"{peer[0]}:{peer[1]}" if peer else "?"
+
+    def write(self, message):
+        # For callers that cannot wait, e.g. the per-move hook; the next send() drains what they wrote
+        self.writer.write((json.dumps(message) + "\n").encode())
+
+    async def send(self, message):
+        # Waits while the transport's buffer is full, so a peer that stops reading holds up the sender
+        self.write(message)
+        await self.writer.drain()
+
+    async def receive(self, timeout=None):
+        line = await asyncio.wait_for(self.reader.readline(), timeout)
+        if not line:
+            raise ConnectionError("connection closed")
+        return json.loads(line)
+
+    def close(self):
+        self.writer.close()
+
+
+class WorkerLost(Exception):
+    def __init__(self, worker, moves):
+        super().__init__(f"worker {worker.name} lost")
+        self.moves = moves
+
+
+class RemoteGame:
+    """A game a worker is playing, mirrored move by move on the coordinator."""
+
+    def __init__(self, job, moves, on_move):
+        self.job = job
+        self.moves = list(moves or [])
+        self.board = chess.Board.from_chess960_pos(job["sp"])
+        for entry in self.moves:
+            self.board.push(chess.Move.from_uci(entry["move"]))
+        self.on_move = on_move
+        self.future = asyncio.get_running_loop().create_future()
+
+    def add_move(self, message):
+        move = chess.Move.from_uci(message["move"])
+        if move not in self.board.legal_moves:
+            raise ValueError(f"illegal move {message['move']} in game {self.job['id'] + 1}")
+        timing = message["timing"]
+        self.board.push(move)
+        self.moves.append({"move": message["move"], "timing": timing})
+        if self.on_move:
+            self.on_move(self.job, self.board.copy(), move, {"score": timing["score"], "wall": timing["wall"], "timing": timing,
+                                                             "clocks": message.get("clocks")})
+
+
+class RemoteWorker:
+    def __init__(self, connection, name, engines, slots):
+        self.connection = connection
+        self.name = name
+        self.engines = set(engines)
+        self.slots = max(1, slots)
+        self.load = 0
+        self.games = {}
+        self.played = 0
+        self.lost = False
+
+    def can_play(self, job):
+        return job["white"] in self.engines and job["black"] in self.engines
+
+
+class Coordinator:
+    """Hands games to workers that connect over TCP, takes the place of the engine pool on this side.
+
+    Protocol, one JSON object per line: a worker opens with "hello" (name, engines, slots, token) and gets
+    "welcome" with the run's time margin, adjudication and supervision settings, or "rejected" when the token
+    does not match. Without a token one is made up and printed, workers then pass it with --token. Each "game" carries a job and the moves
+    already played when it is continued from a lost worker; the worker answers with a "move" per move and then
+    "result" or "failed", and can be told to "abort" a game. Workers "ping" every few seconds, one silent for
+    heartbeat_timeout is dropped and its games go to other workers. "done" ends the run for every worker.
+    """
+
+    def __init__(self, host, port=DEFAULT_PORT, settings=None, heartbeat_timeout=HEARTBEAT_TIMEOUT, token=None):
+        self.host = host
+        self.port = port
+        self.token = token or secrets.token_urlsafe(16)
+        self.show_token = token is None
+        self.settings = settings or {}
+        self.heartbeat_timeout = heartbeat_timeout
+        self.workers = []
+        self.server = None
+        self.changed = None
+        self.waiting_for = set()
+        self.reassigning = []
+        self.connected = 0
+        self.lost = 0
+        self.reassigned = 0
+        self.played = {}
+
+    async def start(self):
+        self.changed = asyncio.Condition()
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port, limit=LINE_LIMIT)
+        print(f"Waiting for workers on {self.host}:{self.port}" + (f", they connect with --token {self.token}" if self.show_token else ""))
+
+    async def handle_connection(self, reader, writer):
+        connection = Connection(reader, writer)
+        try:
+            hello = await connection.receive(self.heartbeat_timeout)
+            if hello.get("type") != "hello":
+                raise ValueError(f"expected hello, got {hello.get('type')}")
+            if not hmac.compare_digest(str(hello.get("token")).encode(), self.token.encode()):
+                await connection.send({"type": "rejected", "reason": "wrong token"})
+                raise ValueError("wrong token")
+            worker = RemoteWorker(connection, hello["worker"], hello["engines"], hello["slots"])
+            await connection.send(dict(self.settings, type="welcome"))
+        except (OSError, asyncio.TimeoutError, *MALFORMED) as e:
+            print(f"Rejected connection from {connection.peer}: {e or type(e).__name__}")
+            connection.close()
+            return
+
+        self.workers.append(worker)
+        self.connected += 1
+        print(f"Worker {worker.name} connected from {connection.peer}: {worker.slots} slots, engines {', '.join(sorted(worker.engines))}")
+        await self.notify()
+        reason = "disconnected"
+        try:
+            while True:
+                message = await connection.receive(self.heartbeat_timeout)
+                self.dispatch(worker, message)
+        except asyncio.TimeoutError:
+            reason = f"silent for {self.heartbeat_timeout:.0f}s"
+        except OSError as e:
+            reason = str(e) or type(e).__name__
+        except MALFORMED as e:
+            reason = f"malformed message: {type(e).__name__}: {e}"
+        finally:
+            await self.drop(worker, reason)
+
+    def dispatch(self, worker, message):
+        kind = message["type"]
+        if kind == "ping":
+            return
+        if kind not in ("move", *RESULT_FIELDS):
+            print(f"Ignoring {kind!r} message from worker {worker.name}")
+            return
+        game = worker.games.get(message["id"])
+        if game is None:
+            # A game aborted here that the worker had not stopped yet
+            return
+        if kind == "move":
+            game.add_move(message)
+        else:
+            for field, types in RESULT_FIELDS[kind].items():
+                if not isinstance(message.get(field), types):
+                    raise ValueError(f"{kind} with {field} {message.get(field)!r}")
+            if kind == "result":
+                # The game is taken from the moves mirrored here, a result for other moves is not trusted
+                if message["result"] not in RESULTS:
+                    raise ValueError(f"result {message['result']!r} in game {game.job['id'] + 1}")
+                if message["moves"] != [entry["move"] for entry in game.moves]:
+                    raise ValueError(f"result moves differ from the moves played in game {game.job['id'] + 1}")
+            del worker.games[message["id"]]
+            worker.played += 1
+            if not game.future.done():
+                game.future.set_result(message)
+
+    async def drop(self, worker, reason):
+        if worker.lost:
+            return
+        worker.lost = True
+        self.workers.remove(worker)
+        self.played[worker.name] = self.played.get(worker.name, 0) + worker.played
+        worker.connection.close()
+        games = list(worker.games.values())
+        worker.games = {}
+        for game in games:
+            if not game.future.done():
+                game.future.set_exception(WorkerLost(worker, game.moves))
+        if reason != "shutting down":
+            self.lost += 1
+            print(f"Worker {worker.name} lost ({reason}), {len(games)} games to reassign")
+        await self.notify()
+
+    async def notify(self):
+        async with self.changed:
+            self.changed.notify_all()
+
+    def wake(self):
+        # For callers outside a coroutine, e.g. the scheduler deciding to stop
+        if self.changed:
+            asyncio.ensure_future(self.notify())
+
+    async def reserve(self, job, stopped=None, reassign=False):
+        """Waits for a worker with both engines and a free slot, returns None once stopped() is true.
+
+        Games of a lost worker are reassigned first, new games leave the slots they could use to them.
+        """
+        async with self.changed:
+            if reassign:
+                self.reassigning.append(job)
+            try:
+                while not (stopped and stopped()):
+                    workers = [worker for worker in self.workers if worker.can_play(job) and worker.load < worker.slots and
+                               (reassign or not any(worker.can_play(other) for other in self.reassigning))]
+                    if workers:
+                        worker = max(workers, key=lambda worker: worker.slots - worker.load)
+                        worker.load += 1
+                        return worker
+                    engines = (job["white"], job["black"])
+                    if not any(worker.can_play(job) for worker in self.workers) and engines not in self.waiting_for:
+                        self.waiting_for.add(engines)
+                        print(f"Waiting for a worker with {engines[0]} and {engines[1]}")
+                    await self.changed.wait()
+            finally:
+                if reassign:
+                    self.reassigning.remove(job)
+                    self.changed.notify_all()
+        return None
+
+    async def release(self, worker):
+        worker.load -= 1
+        await self.notify()
+
+    async def play(self, worker, job, moves, on_move):
+        """Plays job on worker and returns its result or failed message with the RemoteGame that mirrored it, raises
+        WorkerLost if the worker goes away."""
+        if worker.lost:
+            raise WorkerLost(worker, list(moves or []))
+        game = RemoteGame(job, moves, on_move)
+        worker.games[job["id"]] = game
+        try:
+            await worker.connection.send({"type": "game", "job": job, "moves": game.moves})
+            return await game.future, game
+        except OSError as e:
+            # The connection broke while the game was being sent, drop() hands the worker's other games back
+            worker.games.pop(job["id"], None)
+            await self.drop(worker, str(e) or type(e).__name__)
+            raise WorkerLost(worker, game.moves)
+        except asyncio.CancelledError:
+            if worker.games.pop(job["id"], None) and not worker.lost:
+                worker.connection.write({"type": "abort", "id": job["id"]})
+            raise
+
+    def stats(self):
+        played = dict(self.played)
+        for worker in self.workers:
+            played[worker.name] = played.get(worker.name, 0) + worker.played
+        return {"connected": self.connected, "lost": self.lost, "reassigned": self.reassigned, "games": played}
+
+    def report(self):
+        stats = self.stats()
+        games = ", ".join(f"{name} {count}" for name, count in sorted(stats["games"].items())) or "none"
+        print(f"Workers: {stats['connected']} connections, {stats['lost']} lost, {stats['reassigned']} games reassigned; games per worker: {games}")
+
+    async def shutdown(self):
+        for worker in list(self.workers):
+            # Not drained, a worker that stopped reading would hold up the shutdown; closing flushes what it can
+            worker.connection.write({"type": "done"})
+            await self.drop(worker, "shutting down")
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+
+class RemoteScheduler(GameScheduler):
+    """A GameScheduler whose games are played by workers; scores, PGN, database and checkpoint stay here."""
+
+    def __init__(self, coordinator, **kwargs):
+        super().__init__(coordinator, **kwargs)
+        self.coordinator = coordinator
+        self.reserved = {}
+
+    async def run_job(self, job):
+        # A game only starts once a worker has room for it, so finish() still holds back the ones waiting
+        worker = await self.coordinator.reserve(job, lambda: self.stopped)
+        if worker is None:
+            return
+        self.reserved[job["id"]] = worker
+        await super().run_job(job)
+
+    def finish(self):
+        super().finish()
+        self.coordinator.wake()
+
+    async def play_job(self, job):
+        worker = self.reserved.pop(job["id"])
+        moves = self.partial.pop(job["id"], None)
+        print(f"Starting game {job['id'] + 1} on {worker.name}: {job['white']} (White) vs {job['black']} (Black), SP {job['sp']}")
+        if self.on_game_start:
+            self.on_game_start(job)
+        started = time.perf_counter()
+        while True:
+            try:
+                message, game = await self.coordinator.play(worker, job, moves, self.move_played)
+                break
+            except WorkerLost as e:
+                # The moves streamed so far are in the checkpoint already, the next worker continues after them
+                moves = e.moves
+            finally:
+                await self.coordinator.release(worker)
+            worker = await self.coordinator.reserve(job, lambda: self.stopped, reassign=True)
+            if worker is None:
+                # Stopped before another worker took it, the checkpoint keeps its moves for a resume to continue
+                print(f"Game {job['id'] + 1} left unfinished after {len(moves)} plies")
+                return None
+            self.coordinator.reassigned += 1
+            print(f"Game {job['id'] + 1} continues on {worker.name} after {len(moves)} plies")
+
+        if message["type"] == "failed":
+            print(f"Game {job['id'] + 1} failed on {worker.name}: {message['error']}")
+            record = abandoned_record(job, None, game.moves)
+            self.record_result(record)
+            return record
+        # dispatch() checked the worker's moves against the mirrored ones, so its board and timings are the game's
+        record = {key: message[key] for key in ("result", "termination", "adjudication", "failure", "restarts")}
+        record.update(job=job, board=game.board, timings=[entry["timing"] for entry in game.moves])
+        # The workers' supervisors did the restarting, the totals are kept here
+        self.supervisor.restarts += record["restarts"]
+        if record["failure"] in FAILURES:
+            self.supervisor.failures[record["failure"]] += 1
+            self.supervisor.forfeits += 1
+        self.record_result(record)
+        if self.metrics.enabled:
+            self.observe_game(record, time.perf_counter() - started)
+        return record
+
+
+class Worker:
+    """Plays the games a coordinator hands out with this machine's engines, and reconnects when the link drops."""
+
+    def __init__(self, host, port, engine_pool, name=None, slots=1, reconnect_delay=RECONNECT_DELAY, resources=None, token=None):
+        self.host = host
+        self.port = port
+        self.token = token
+        self.engine_pool = engine_pool
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.slots = max(1, slots)
+        self.reconnect_delay = reconnect_delay
+        self.resources = resources
+        self.games = {}
+        self.supervisor = EngineSupervisor(engine_pool, resources=resources)
+        self.adjudication = None
+        self.time_margin = 0.05
+        self.done = False
+        self.played = 0
+        self.connections = 0
+
+    async def run(self):
+        while not self.done:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port, limit=LINE_LIMIT)
+            except OSError as e:
+                print(f"Cannot reach the coordinator at {self.host}:{self.port} ({e}), retrying in {self.reconnect_delay:.0f}s")
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+            connection = Connection(reader, writer)
+            try:
+                await self.serve(connection)
+            except (OSError, *MALFORMED) as e:
+                print(f"Lost the coordinator: {e or type(e).__name__}")
+            finally:
+                # The coordinator gives games in progress to other workers, there is no way back into them
+                tasks = list(self.games.values())
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                connection.close()
+                if self.adjudication:
+                    self.adjudication.close()
+            if not self.done:
+                await asyncio.sleep(self.reconnect_delay)
+
+    async def serve(self, connection):
+        await connection.send({"type": "hello", "worker": self.name, "engines": list(self.engine_pool.engine_paths), "slots": self.slots,
+                               "token": self.token})
+        welcome = await connection.receive()
+        if welcome.get("type") == "rejected":
+            # Retrying would not help, the token is wrong
+            print(f"The coordinator refused this worker: {welcome.get('reason')}")
+            self.done = True
+            return
+        self.connections += 1
+        self.time_margin = welcome.get("time_margin", self.time_margin)
+        self.adjudication = AdjudicationRules.from_config(welcome.get("adjudication"))
+        self.supervisor = EngineSupervisor.from_config(self.engine_pool, welcome.get("supervision"), self.resources)
+        print(f"Connected to {self.host}:{self.port} as {self.name} with {self.slots} slots")
+        heartbeat = asyncio.create_task(self.heartbeat(connection))
+        try:
+            while True:
+                message = await connection.receive()
+                kind = message["type"]
+                if kind == "game":
+                    job = message["job"]
+                    self.games[job["id"]] = asyncio.create_task(self.play(connection, job, message["moves"]))
+                elif kind == "abort":
+                    task = self.games.pop(message["id"], None)
+                    if task:
+                        task.cancel()
+                elif kind == "done":
+                    print("The coordinator has no more games")
+                    self.done = True
+                    return
+        finally:
+            heartbeat.cancel()
+
+    async def heartbeat(self, connection):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            await connection.send({"type": "ping"})
+
+    async def play(self, connection, job, moves):
+        print(f"Starting game {job['id'] + 1}: {job['white']} (White) vs {job['black']} (Black), SP {job['sp']}")
+
+        def on_move(job, board, move, info):
+            connection.write({"type": "move", "id": job["id"], "move": move.uci(), "timing": info["timing"], "clocks": info["clocks"]})
+
+        engines = {}
+        loser = None
+        try:
+            for loser, name in ((chess.WHITE, job["white"]), (chess.BLACK, job["black"])):
+                engines[loser] = (name, await self.engine_pool.acquire(name))
+            loser = None
+            if self.resources:
+                await self.resources.assign(job, engines)
+            record = await play_game(job, engines, on_move, self.time_margin, self.adjudication, self.supervisor, moves)
+        except asyncio.CancelledError:
+            await asyncio.gather(*(self.engine_pool.discard(name, engine) for name, engine in engines.values() if engine))
+            raise
+        except Exception as e:
+            print(f"Game {job['id'] + 1} failed: {e}")
+            await asyncio.gather(*(self.engine_pool.discard(name, engine) for name, engine in engines.values() if engine))
+            if loser is None:
+                await connection.send({"type": "failed", "id": job["id"], "error": str(e) or type(e).__name__})
+                return
+            # The side whose engine would not start forfeits, reported like any other result
+            record = abandoned_record(job, loser, moves)
+            engines = {}
+        finally:
+            self.games.pop(job["id"], None)
+            if self.resources:
+                self.resources.release(job)
+
+        for name, engine in engines.values():
+            if engine:
+                self.engine_pool.release(name, engine)
+        self.played += 1
+        print(f"Result: {job['white']} (White) vs {job['black']} (Black) - {record['result']}")
+        await connection.send({
+            "type": "result",
+            "id": job["id"],
+            "result": record["result"],
+            "termination": record["termination"],
+            "adjudication": record["adjudication"],
+            "failure": record["failure"],
+            "restarts": record["restarts"],
+            "moves": [move.uci() for move in record["board"].move_stack],
+            "timings": record["timings"]
+        })
+
+    def report(self):
+        print(f"Worker {self.name}: {self.played} games over {self.connections} connections")
@@ -0,0 +1,141 @@
+import math
+
+GAME_POINTS = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}
+
+
+def elo_from_score(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def score_from_elo(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+class ScoreStats:
+    """Counts of per-sample scores in [0, 1]: single games (trinomial) or game pairs averaged (pentanomial)."""
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, score):
+        self.counts[score] = self.counts.get(score, 0) + 1
+
+    @property
+    def n(self):
+        return sum(self.counts.values())
+
+    def mean(self):
+        n = self.n
+        return sum(score * count for score, count in self.counts.items()) / n if n else 0.5
+
+    def variance(self):
+        n = self.n
+        if not n:
+            return 0.0
+        mean = self.mean()
+        return sum(count * (score - mean) ** 2 for score, count in self.counts.items()) / n
+
+    def elo(self):
+        return elo_from_score(self.mean())
+
+    def elo_interval(self, z=1.96):
+        if self.n < 2:
+            return None, None
+        margin = z * math.sqrt(self.variance() / self.n)
+        return elo_from_score(self.mean() - margin), elo_from_score(self.mean() + margin)
+
+
+class MatchStats:
+    """Running W/D/L and pentanomial counts from engine_a's point of view.
+
+    Games that share a job "pair" id (same start position or consecutive rounds with colours reversed)
+    are combined into one pentanomial sample once both have finished.
+    """
+
+    def __init__(self, engine_a, engine_b):
+        self.engine_a = engine_a
+        self.engine_b = engine_b
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.games = ScoreStats()
+        self.pairs = ScoreStats()
+        self.pentanomial = [0, 0, 0, 0, 0]
+        self.open_pairs = {}
+        self.paired = True
+
+    def add(self, job, result):
+        if result not in GAME_POINTS:
+            return
+        score = GAME_POINTS[result] if job["white"] == self.engine_a else 1 - GAME_POINTS[result]
+        if score == 1:
+            self.wins += 1
+        elif score == 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+        self.games.add(score)
+
+        pair = job.get("pair")
+        if pair is None:
+            self.paired = False
+        elif pair in self.open_pairs:
+            pair_score = self.open_pairs.pop(pair) + score
+            self.pentanomial[int(pair_score * 2)] += 1
+            self.pairs.add(pair_score / 2)
+        else:
+            self.open_pairs[pair] = score
+
+    def samples(self):
+        # Pairs cancel most of the start position bias, so they give tighter bounds when every game has a partner
+        return self.pairs if self.paired and self.pairs.n else self.games
+
+    def summary(self):
+        low, high = self.samples().elo_interval()
+        return {
+            "engine_a": self.engine_a,
+            "engine_b": self.engine_b,
+            "wins": self.wins,
+            "draws": self.draws,
+            "losses": self.losses,
+            "pentanomial": list(self.pentanomial),
+            "elo": self.samples().elo() if self.games.n else 0.0,
+            "elo_low": low,
+            "elo_high": high
+        }
+
+
+class SPRT:
+    def __init__(self, elo0, elo1, alpha=0.05, beta=0.05):
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.alpha = alpha
+        self.beta = beta
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+
+    def __str__(self):
+        return f"SPRT elo0={self.elo0:g} elo1={self.elo1:g} alpha={self.alpha:g} beta={self.beta:g}"
+
+    def llr(self, samples):
+        # Normal approximation of the generalised SPRT log-likelihood ratio on the logistic Elo scale
+        variance = samples.variance()
+        if samples.n < 2 or variance <= 0:
+            return 0.0
+        s0 = score_from_elo(self.elo0)
+        s1 = score_from_elo(self.elo1)
+        return samples.n * (s1 - s0) * (2 * samples.mean() - s0 - s1) / (2 * variance)
+
+    def decision(self, llr):
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
+
+
+def format_elo(elo, low, high):
+    if low is None or high is None:
+        return f"{elo:+.1f}"
+    return f"{elo:+.1f} [{low:+.1f}, {high:+.1f}]"
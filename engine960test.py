@@ -1,13 +1,30 @@
+import sys
 import chess.engine
+from match_core import load_config
 
-# Start engine
-engine = chess.engine.SimpleEngine.popen_uci(r"C:\Users\Rfair\Downloads\original-960-gui\engines\stockfish-windows-x86-64-avx2.exe")  # replace with your actual path
+# usage: engine960test.py [NAME_OR_PATH ...]  (default: every engine in config.json)
+config = load_config()
+targets = sys.argv[1:] or list(config["engine_paths"])
 
-# Check for UCI_Chess960 support
-supports_chess960 = "UCI_Chess960" in engine.options
-option_type = type(engine.options.get("UCI_Chess960")).__name__ if supports_chess960 else "Not available"
+failed = False
+for target in targets:
+    path = config["engine_paths"].get(target, target)
+    try:
+        engine = chess.engine.SimpleEngine.popen_uci(path)
+    except Exception as e:
+        print(f"{target}: could not start {path}: {e}")
+        failed = True
+        continue
 
-print("Supports UCI_Chess960:", supports_chess960)
-print("Type of UCI_Chess960 option:", option_type)
+    # Check for UCI_Chess960 support
+    supports_chess960 = "UCI_Chess960" in engine.options
+    option_type = engine.options["UCI_Chess960"].type if supports_chess960 else "Not available"
 
-engine.quit()
+    print(f"{target}: {engine.id.get('name', path)}")
+    print("  Supports UCI_Chess960:", supports_chess960)
+    print("  Type of UCI_Chess960 option:", option_type)
+    failed = failed or not supports_chess960
+
+    engine.quit()
+
+sys.exit(1 if failed else 0)
@@ -0,0 +1,39 @@
+import asyncio
+import os
+import sys
+import threading
+
+
+def use_pidfd_child_watcher(loop=None):
+    # Before 3.12 asyncio waits for each engine process on its own thread, pidfds keep that on the event loop
+    if sys.platform != "linux" or sys.version_info >= (3, 12) or not hasattr(os, "pidfd_open"):
+        return
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:
+        return
+    watcher = asyncio.PidfdChildWatcher()
+    asyncio.set_child_watcher(watcher)
+    if loop is not None:
+        watcher.attach_loop(loop)
+
+
+class EngineLoop:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        use_pidfd_child_watcher(self.loop)
+        self.thread = threading.Thread(target=self.loop.run_forever, name="engine-loop", daemon=True)
+        self.thread.start()
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        return self.submit(coro).result(timeout)
+
+    def call_soon(self, callback, *args):
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
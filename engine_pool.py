@@ -0,0 +1,109 @@
+import asyncio
+import chess.engine
+import datetime
+import os
+import time
+from match_core import quit_engine
+
+
+class EnginePool:
+    def __init__(self, engine_paths, log_dir=None, metrics=None, registry=None):
+        self.engine_paths = engine_paths
+        self.log_dir = log_dir
+        self.metrics = metrics
+        self.registry = registry
+        self.idle = {}
+        self.busy = {}
+        self.spawn_count = 0
+        self.spawn_time = 0.0
+        self.reuse_count = 0
+        self.restart_count = 0
+
+    def log_filename(self, name):
+        return os.path.join(self.log_dir, f"{name}.stderr.log")
+
+    def log_event(self, name, text):
+        if not self.log_dir:
+            return
+        with open(self.log_filename(name), "a", encoding="utf-8") as f:
+            f.write(f"--- {datetime.datetime.now():%Y-%m-%d %H:%M:%S} {text}\n")
+
+    async def spawn(self, name):
+        start = time.perf_counter()
+        if self.log_dir:
+            # The engine writes stderr straight into its log, the file is closed here once the child has its own handle
+            os.makedirs(self.log_dir, exist_ok=True)
+            with open(self.log_filename(name), "ab") as stderr:
+                transport, engine = await chess.engine.popen_uci(self.engine_paths[name], stderr=stderr)
+            self.log_event(name, f"started pid {transport.get_pid()}")
+        else:
+            transport, engine = await chess.engine.popen_uci(self.engine_paths[name])
+        if self.registry:
+            # The handshake just told us the engine's options, so it is probed and configured in one go
+            self.registry.learn(name, engine)
+            options = self.registry.configuration(name)
+            if options:
+                await engine.configure(options)
+        elapsed = time.perf_counter() - start
+        self.spawn_count += 1
+        self.spawn_time += elapsed
+        if self.metrics:
+            self.metrics.observe("engine_spawn_seconds", elapsed, engine=name)
+        print(f"[{name}] Engine started in {elapsed:.2f}s")
+        return engine
+
+    async def reset(self, engine):
+        # ucinewgame goes out with the first move of the next game, isready confirms the engine is alive
+        try:
+            await asyncio.wait_for(engine.ping(), 10)
+            return True
+        except Exception:
+            return False
+
+    async def acquire(self, name):
+        engine = None
+        while engine is None:
+            idle = self.idle.get(name)
+            engine = idle.pop() if idle else None
+            if engine is None:
+                engine = await self.spawn(name)
+            elif await self.reset(engine):
+                self.reuse_count += 1
+            else:
+                print(f"[{name}] Engine died while idle, restarting")
+                await quit_engine(engine, label=name)
+                self.restart_count += 1
+                engine = None
+
+        self.busy[id(engine)] = (name, engine)
+        return engine
+
+    def release(self, name, engine):
+        self.busy.pop(id(engine), None)
+        self.idle.setdefault(name, []).append(engine)
+
+    async def discard(self, name, engine):
+        self.busy.pop(id(engine), None)
+        await quit_engine(engine, label=name)
+
+    def stats(self):
+        average_spawn = self.spawn_time / self.spawn_count if self.spawn_count else 0.0
+        return {
+            "spawns": self.spawn_count,
+            "spawn_time": self.spawn_time,
+            "reuses": self.reuse_count,
+            "restarts": self.restart_count,
+            "time_saved": self.reuse_count * average_spawn
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"Engine pool: {stats['spawns']} spawns ({stats['spawn_time']:.2f}s), {stats['reuses']} reuses, "
+              f"{stats['restarts']} restarts, ~{stats['time_saved']:.2f}s saved")
+
+    async def shutdown(self):
+        engines = [(name, engine) for name, idle in self.idle.items() for engine in idle]
+        engines += list(self.busy.values())
+        self.idle = {}
+        self.busy = {}
+        await asyncio.gather(*(quit_engine(engine, label=name) for name, engine in engines))
@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import chess.engine
+from match_core import load_config, quit_engine
+
+ENGINE_CACHE_FILENAME = os.path.join("assets", "cache", "engines.json")
+
+
+def binary_key(command):
+    # Changing the binary (new build, different path) changes the key, so stale entries are simply re-probed
+    path = command if isinstance(command, str) else command[0]
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [os.path.abspath(path) if isinstance(command, str) else list(command), stat.st_size, int(stat.st_mtime)]
+
+
+def describe_options(options):
+    return {
+        name: {"type": option.type, "default": option.default, "min": option.min, "max": option.max, "var": list(option.var or [])}
+        for name, option in options.items()
+    }
+
+
+def capabilities(engine, key):
+    options = describe_options(engine.options)
+    limits = {name: [options[name]["min"], options[name]["max"]] for name in ("Threads", "Hash") if name in options}
+    return {
+        "key": key,
+        "name": engine.id.get("name"),
+        "author": engine.id.get("author"),
+        "chess960": "UCI_Chess960" in options,
+        "threads": limits.get("Threads"),
+        "hash": limits.get("Hash"),
+        "options": options,
+        "probed": time.time()
+    }
+
+
+class EngineRegistry:
+    """What every configured engine supports, learned from its UCI handshake and cached on disk.
+
+    An entry is keyed by binary path, size and mtime, so an engine is probed once per binary: either by
+    probe() or for free when the pool starts it for a game. configuration() turns the shared settings
+    (threads, hash, per-engine options) into the options each engine actually accepts.
+    """
+
+    def __init__(self, engine_paths, cache_filename=ENGINE_CACHE_FILENAME, threads=None, hash_mb=None, engine_options=None):
+        self.engine_paths = engine_paths
+        self.cache_filename = cache_filename
+        self.threads = threads
+        self.hash_mb = hash_mb
+        self.engine_options = engine_options or {}
+        self.entries = {}
+        self.warned = set()
+        self.load()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config["engine_paths"], os.path.join(config.get("asset_cache_folder", os.path.join("assets", "cache")), "engines.json"),
+                   config.get("engine_threads"), config.get("engine_hash"), config.get("engine_options"))
+
+    def load(self):
+        if self.cache_filename and os.path.exists(self.cache_filename):
+            try:
+                with open(self.cache_filename, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring engine cache {self.cache_filename}: {e}")
+                self.entries = {}
+
+    def save(self):
+        if not self.cache_filename:
+            return
+        os.makedirs(os.path.dirname(self.cache_filename) or ".", exist_ok=True)
+        temp = self.cache_filename + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(temp, self.cache_filename)
+
+    def get(self, name):
+        entry = self.entries.get(name)
+        key = binary_key(self.engine_paths[name])
+        if entry is None or key is None or entry["key"] != key:
+            return None
+        return entry
+
+    def learn(self, name, engine):
+        """Records what a freshly started engine reported, returns its entry."""
+        entry = self.get(name)
+        if entry is None:
+            entry = capabilities(engine, binary_key(self.engine_paths[name]))
+            self.entries[name] = entry
+            self.save()
+        if not entry["chess960"] and name not in self.warned:
+            self.warned.add(name)
+            print(f"[{name}] Warning: engine has no UCI_Chess960 option, castling moves may be misread")
+        return entry
+
+    async def probe(self, name, refresh=False):
+        if not refresh and self.get(name):
+            return self.entries[name]
+        transport, engine = await chess.engine.popen_uci(self.engine_paths[name])
+        try:
+            entry = capabilities(engine, binary_key(self.engine_paths[name]))
+        finally:
+            await quit_engine(engine, label=name)
+        self.entries[name] = entry
+        self.save()
+        return entry
+
+    async def probe_all(self, refresh=False):
+        async def probe(name):
+            try:
+                await self.probe(name, refresh)
+            except Exception as e:
+                print(f"[{name}] Probe failed: {e}")
+
+        await asyncio.gather(*(probe(name) for name in self.engine_paths))
+
+    def configuration(self, name, threads=None, hash_mb=None):
+        """UCI options for name: threads and hash clamped to its limits plus its configured extra options."""
+        entry = self.entries.get(name)
+        if entry is None:
+            return {}
+        settings = {}
+        for option, value, limits in (("Threads", threads or self.threads, entry["threads"]), ("Hash", hash_mb or self.hash_mb, entry["hash"])):
+            if value is not None and limits is not None:
+                low, high = limits
+                settings[option] = max(low, min(high, value)) if low is not None and high is not None else value
+        for option, value in self.engine_options.get(name, {}).items():
+            if option in entry["options"]:
+                settings[option] = value
+            elif (name, option) not in self.warned:
+                self.warned.add((name, option))
+                print(f"[{name}] Ignoring unknown option {option}")
+        # python-chess sets UCI_Chess960 and the other managed options per game itself
+        return {option: value for option, value in settings.items() if option.lower() not in chess.engine.MANAGED_OPTIONS}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Probe the configured engines and show what they support.")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--refresh", action="store_true", help="probe again even if the cache is up to date")
+    parser.add_argument("engines", nargs="*", help="engines to show (default: all)")
+    return parser.parse_args(argv)
+
+
+def format_limits(limits):
+    return f"{limits[0]}-{limits[1]}" if limits else "-"
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = load_config(args.config)
+    if args.engines:
+        config["engine_paths"] = {name: config["engine_paths"][name] for name in args.engines}
+    registry = EngineRegistry.from_config(config)
+    start = time.perf_counter()
+    asyncio.run(registry.probe_all(args.refresh))
+    print(f"{'engine':<16} {'id':<28} {'960':<4} {'threads':<10} {'hash MB':<12} options")
+    for name in registry.engine_paths:
+        entry = registry.get(name)
+        if entry is None:
+            print(f"{name:<16} (not available)")
+            continue
+        print(f"{name:<16} {(entry['name'] or '?')[:28]:<28} {'yes' if entry['chess960'] else 'no':<4} {format_limits(entry['threads']):<10} "
+              f"{format_limits(entry['hash']):<12} {len(entry['options'])}")
+    print(f"{len(registry.engine_paths)} engines in {time.perf_counter() - start:.2f}s (cache: {registry.cache_filename})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
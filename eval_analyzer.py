@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+
+class EvalAnalyzer:
+    """Keeps name analysing the position it was last given and reports the score at most once per throttle.
+
+    The engine comes from engine_pool, so it is logged and configured like the engines that play. With
+    resources it is pinned to the CPUs the ResourcePlan keeps for analysis instead of searching on the
+    cores of the running games.
+    """
+
+    def __init__(self, name, engine_pool, on_score, engine_loop, throttle=0.1, threads=1, resources=None):
+        self.name = name
+        self.engine_pool = engine_pool
+        self.on_score = on_score
+        self.engine_loop = engine_loop
+        self.throttle = throttle
+        self.threads = threads
+        self.resources = resources
+        self.engine = None
+        self.position = None
+        self.generation = 0
+        self.analysis = None
+        self.closed = False
+        self.last_update = 0.0
+        self.pending = None
+        self.flush_handle = None
+        self.wakeup = asyncio.Event()
+        self.task = engine_loop.submit(self.run())
+
+    def set_position(self, board):
+        self.engine_loop.call_soon(self.update_position, board.copy())
+
+    def close(self):
+        self.engine_loop.call_soon(self.update_position, None, True)
+
+    def update_position(self, board, close=False):
+        self.position = board
+        self.generation += 1
+        self.closed = self.closed or close
+        # A score still waiting for the throttle belongs to the previous position
+        self.pending = None
+        if self.flush_handle:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if self.analysis:
+            self.analysis.stop()
+        self.wakeup.set()
+
+    async def run(self):
+        try:
+            self.engine = await self.engine_pool.acquire(self.name)
+            if self.resources:
+                await self.resources.apply_analysis(self.name, self.engine)
+            else:
+                registry = self.engine_pool.registry
+                options = registry.configuration(self.name, threads=self.threads) if registry else {}
+                if not registry and "Threads" in self.engine.options:
+                    options = {"Threads": self.threads}
+                if options:
+                    await self.engine.configure(options)
+            while not self.closed:
+                await self.wakeup.wait()
+                self.wakeup.clear()
+                board = self.position
+                if board is not None and not self.closed and not board.is_game_over():
+                    await self.analyse(board, self.generation)
+        except Exception as e:
+            print(f"[{self.name}] Analysis failed: {e}")
+        finally:
+            if self.flush_handle:
+                self.flush_handle.cancel()
+            if self.engine:
+                # Configured and pinned for analysis, so it is not handed back for games
+                await self.engine_pool.discard(self.name, self.engine)
+
+    def publish(self, score):
+        # A score inside the throttle window is kept and sent when the window closes, so the last one is never lost
+        self.pending = score
+        delay = self.last_update + self.throttle - time.perf_counter()
+        if delay <= 0:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(delay, self.flush)
+
+    def flush(self):
+        self.flush_handle = None
+        if self.pending is not None:
+            self.last_update = time.perf_counter()
+            score, self.pending = self.pending, None
+            self.on_score(score)
+
+    async def analyse(self, board, generation):
+        self.analysis = await self.engine.analysis(board)
+        try:
+            async for info in self.analysis:
+                if generation != self.generation:
+                    break
+                score = info.get("score")
+                if score is not None:
+                    self.publish(score.white().score(mate_score=10000))
+        finally:
+            self.analysis.stop()
+            await self.analysis.wait()
+            self.analysis = None
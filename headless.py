@@ -0,0 +1,317 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+from adjudication import AdjudicationRules
+from checkpoint import Checkpoint, checkpoint_filename, load_checkpoint
+from distributed import HEARTBEAT_TIMEOUT, MAX_REMOTE_GAMES, TOKEN_ENV, Coordinator, RemoteScheduler, Worker, parse_address
+from elo import SPRT
+from engine_loop import use_pidfd_child_watcher
+from engine_pool import EnginePool
+from engine_registry import EngineRegistry
+from match_core import GameScheduler, MATCH_PGN_FILENAME, load_config, make_match_jobs, make_round_robin_jobs, tournament_event_name, tournament_pgn_filename
+from metrics import Metrics
+from resources import ResourcePlan
+from results_db import RESULTS_DB_FILENAME
+from sp_index import StartPositionSchedule, parse_sp_filter, parse_sp_list
+from supervisor import EngineSupervisor
+from swiss import SwissTournament, default_swiss_rounds
+from time_control import TimeControl
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run Chess960 engine matches and tournaments without the GUI.")
+    parser.add_argument("--config", default="config.json", help="config file with the engine list")
+    parser.add_argument("--tc", type=TimeControl.parse, default=TimeControl.parse("1.0"),
+                        help="time control: seconds per move (1.0), base+increment (60+0.6) or moves/base (40/60)")
+    parser.add_argument("--time-margin", type=float, default=0.05, help="seconds an engine may overrun its clock before losing on time")
+    parser.add_argument("--concurrency", type=int,
+                        help="number of games played in parallel (default 1; with --serve all the workers' slots; for a worker its slots)")
+    parser.add_argument("--pgn", help="PGN file to append finished games to")
+    parser.add_argument("--pgn-batch", type=int, default=8, help="games buffered before the PGN file is flushed")
+    parser.add_argument("--fsync", action="store_true", help="fsync the PGN file and its index after every batch")
+    parser.add_argument("--db", help="results database (default: results_db from the config)")
+    parser.add_argument("--checkpoint", help="file the run is checkpointed to after every game (default: next to the PGN file)")
+    parser.add_argument("--resign", type=float, nargs=2, metavar=("SCORE", "MOVES"),
+                        help="adjudicate a win when both engines report at least SCORE centipawns for MOVES moves")
+    parser.add_argument("--draw", type=float, nargs=3, metavar=("SCORE", "MOVES", "AFTER"),
+                        help="adjudicate a draw when both engines stay within SCORE centipawns for MOVES moves from move AFTER on")
+    parser.add_argument("--syzygy", metavar="PATH", help="adjudicate positions found in these Syzygy tablebases")
+    parser.add_argument("--on-crash", choices=["continue", "forfeit"], help="restart a crashed engine and continue, or forfeit its game")
+    parser.add_argument("--on-hang", choices=["continue", "forfeit"], help="same for an engine that stops answering")
+    parser.add_argument("--on-illegal-move", choices=["continue", "forfeit"], help="same for an engine that plays an illegal move")
+    parser.add_argument("--hang-timeout", type=float, help="seconds past its allotted time before an engine counts as hung")
+    parser.add_argument("--max-restarts", type=int, help="engine restarts allowed per game before it is forfeited")
+    parser.add_argument("--plan-resources", action="store_true",
+                        help="give every engine its own CPUs and an equal share of threads and memory (also on with --threads or --hash)")
+    parser.add_argument("--threads", type=int, help="Threads per engine, refused if the games would need more CPUs than there are")
+    parser.add_argument("--hash", type=int, metavar="MB", help="Hash per engine, refused if the engines would need more memory than there is")
+    parser.add_argument("--metrics-jsonl", metavar="FILE", help="append per-move and per-game metrics to this JSON lines file")
+    parser.add_argument("--metrics-prom", metavar="FILE", help="keep a Prometheus text file with per-engine metric percentiles up to date")
+    parser.add_argument("--serve", metavar="[HOST]:PORT",
+                        help="let workers play the games, see the worker mode; HOST defaults to 127.0.0.1, 0.0.0.0 admits other machines")
+    parser.add_argument("--token", help=f"secret workers must present to the coordinator (default: ${TOKEN_ENV}; "
+                                        "with --serve and neither set, a random one is printed)")
+    parser.add_argument("--worker-timeout", type=float, default=HEARTBEAT_TIMEOUT,
+                        help="seconds without a message before a worker counts as lost and its games are reassigned")
+    parser.add_argument("--json", action="store_true", help="write JSON lines to stdout, log messages go to stderr")
+    parser.add_argument("--sp-filter", action="append", metavar="FEATURE=VALUE",
+                        help="only use start positions with this feature, e.g. king_file=g or kingside_rook_adjacent=true (repeatable)")
+    parser.add_argument("--paired", action="store_true", help="play every start position twice with colors reversed")
+    parser.add_argument("--seed", type=int, help="seed for start positions and game order, makes the schedule reproducible")
+    parser.add_argument("--sp-list", help="play these start positions in order, e.g. 518,0,959")
+    parser.add_argument("--sp-sample", type=int, metavar="N", help="sample N distinct start positions and cycle through them")
+    modes = parser.add_subparsers(dest="mode", required=True)
+
+    match = modes.add_parser("match", help="play a match between two engines")
+    match.add_argument("engine_a")
+    match.add_argument("engine_b")
+    match.add_argument("--rounds", type=int, default=4)
+    match.add_argument("--color", choices=["white", "black"], default="white", help="color of engine A in round 1")
+    match.add_argument("--sprt", type=float, nargs=2, metavar=("ELO0", "ELO1"), help="stop as soon as the SPRT accepts either hypothesis")
+    match.add_argument("--alpha", type=float, default=0.05, help="SPRT false positive rate")
+    match.add_argument("--beta", type=float, default=0.05, help="SPRT false negative rate")
+
+    tournament = modes.add_parser("tournament", help="play a tournament between several engines")
+    tournament.add_argument("engines", nargs="*", help="engines to include (default: all engines in the config)")
+    tournament.add_argument("--type", choices=["round_robin", "swiss"], default="round_robin")
+    tournament.add_argument("--rounds-per-pairing", type=int, default=2, help="games per pairing, colors alternate")
+    tournament.add_argument("--swiss-rounds", type=int, help="number of Swiss rounds (default: log2(engines) + 2)")
+
+    resume = modes.add_parser("resume", help="continue an interrupted match or tournament with the options it was started with")
+    resume.add_argument("checkpoint_file", metavar="CHECKPOINT")
+
+    worker = modes.add_parser("worker", help="play games for a coordinator started with --serve, with the engines of this config")
+    worker.add_argument("address", metavar="HOST[:PORT]")
+    worker.add_argument("--name", help="name the coordinator shows for this worker (default: host name and process id)")
+
+    return parser.parse_args(argv)
+
+
+def build_jobs(args, engine_list):
+    if args.mode == "match":
+        names = [args.engine_a, args.engine_b]
+    else:
+        names = args.engines or list(engine_list.keys())
+    unknown = [name for name in names if name not in engine_list]
+    if unknown:
+        raise SystemExit(f"Unknown engine(s): {', '.join(unknown)}")
+
+    try:
+        sp_schedule = StartPositionSchedule(parse_sp_filter(args.sp_filter), args.seed, parse_sp_list(args.sp_list), args.sp_sample)
+    except (KeyError, ValueError) as e:
+        raise SystemExit(f"Invalid start positions: {e}")
+    if args.mode == "match":
+        jobs = make_match_jobs(args.engine_a, args.engine_b, args.color, args.rounds, args.tc, sp_schedule=sp_schedule, paired=args.paired)
+        return jobs, args.pgn or MATCH_PGN_FILENAME, None
+
+    if len(names) < 2:
+        raise SystemExit("A tournament needs at least two engines.")
+    event = tournament_event_name(args.type)
+    if args.type == "swiss":
+        # Rounds after the first are paired from results, the scheduler asks the tournament for them
+        swiss = SwissTournament(names, args.swiss_rounds or default_swiss_rounds(len(names)), args.rounds_per_pairing,
+                                args.tc, event, sp_schedule, args.paired)
+        return [], args.pgn or tournament_pgn_filename(event), swiss
+    jobs = make_round_robin_jobs(names, args.rounds_per_pairing, args.tc, event, sp_schedule, args.paired)
+    return jobs, args.pgn or tournament_pgn_filename(event), None
+
+
+def build_adjudication(args, config):
+    settings = dict(config.get("adjudication") or {})
+    if args.resign:
+        settings["resign_score"], settings["resign_moves"] = args.resign[0], int(args.resign[1])
+    if args.draw:
+        settings["draw_score"], settings["draw_moves"], settings["draw_after"] = args.draw[0], int(args.draw[1]), int(args.draw[2])
+    if args.syzygy:
+        settings["syzygy_path"] = args.syzygy
+    return AdjudicationRules.from_config(settings)
+
+
+def build_supervision(args, config):
+    settings = dict(config.get("supervision") or {})
+    for key in ("on_crash", "on_hang", "on_illegal_move", "hang_timeout", "max_restarts"):
+        if getattr(args, key) is not None:
+            settings[key] = getattr(args, key)
+    return settings
+
+
+def build_resources(args, config, concurrency, registry):
+    settings = config.get("resources")
+    settings = dict(settings) if settings is not None else ({} if args.plan_resources or args.threads or args.hash else None)
+    if settings is None:
+        return None
+    if args.threads:
+        settings["threads"] = args.threads
+    if args.hash:
+        settings["hash_mb"] = args.hash
+    try:
+        return ResourcePlan.from_config(settings, concurrency, registry)
+    except ValueError as e:
+        raise SystemExit(f"Cannot plan resources: {e}")
+
+
+def resume_jobs(args, engine_list, state):
+    # The schedule comes from the checkpoint, only a Swiss tournament needs its pairing state back
+    _, _, swiss = build_jobs(args, engine_list)
+    if swiss:
+        swiss.restore(state.source)
+    return list(state.jobs.values()), state.run["pgn"], swiss
+
+
+def build_metrics(args, config):
+    settings = dict(config.get("metrics") or {})
+    if args.metrics_jsonl:
+        settings["jsonl"] = args.metrics_jsonl
+    if args.metrics_prom:
+        settings["prometheus"] = args.metrics_prom
+    return Metrics.from_config(settings)
+
+
+def run_worker(args, config):
+    registry = EngineRegistry.from_config(config)
+    pool = EnginePool(config["engine_paths"], log_dir=config.get("engine_log_dir", "logs"), registry=registry)
+    resources = build_resources(args, config, args.concurrency or 1, registry)
+    token = args.token or os.environ.get(TOKEN_ENV)
+    if not token:
+        raise SystemExit(f"A worker needs the token the coordinator printed, pass it with --token or ${TOKEN_ENV}")
+    host, port = parse_address(args.address, "localhost")
+    worker = Worker(host, port, pool, args.name, args.concurrency or 1, resources=resources, token=token)
+    if resources:
+        resources.report()
+
+    async def run():
+        try:
+            await worker.run()
+        finally:
+            await pool.shutdown()
+
+    use_pidfd_child_watcher()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    worker.report()
+    worker.supervisor.report()
+    pool.report()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = parse_args(argv)
+    state = None
+    if args.mode == "resume":
+        try:
+            state = load_checkpoint(args.checkpoint_file)
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"Cannot resume: {e}")
+        if "argv" not in state.run:
+            raise SystemExit(f"Cannot resume: {args.checkpoint_file} was not written by headless.py")
+        checkpoint_file = args.checkpoint_file
+        argv = state.run["argv"]
+        args = parse_args(argv)
+    config = load_config(args.config)
+    if args.mode == "worker":
+        return run_worker(args, config)
+    engine_list = config["engine_paths"]
+    if state:
+        jobs, pgn_filename, swiss = resume_jobs(args, engine_list, state)
+    else:
+        jobs, pgn_filename, swiss = build_jobs(args, engine_list)
+        checkpoint_file = args.checkpoint or checkpoint_filename(pgn_filename)
+
+    out = sys.stdout
+    log = sys.stderr if args.json else sys.stdout
+
+    def emit(message):
+        if args.json:
+            out.write(json.dumps(message) + "\n")
+            out.flush()
+
+    def on_game_end(record):
+        job = record["job"]
+        emit({
+            "type": "game",
+            "id": job["id"],
+            "event": job["event"],
+            "round": job["round"],
+            "white": job["white"],
+            "black": job["black"],
+            "sp": job["sp"],
+            "result": record["result"],
+            "termination": record["termination"],
+            "adjudication": record["adjudication"],
+            "failure": record["failure"],
+            "plies": len(record["board"].move_stack),
+            "llr": scheduler.llr if scheduler.sprt else None
+        })
+
+    metrics = build_metrics(args, config)
+    adjudication = build_adjudication(args, config)
+    supervision = build_supervision(args, config)
+    if args.serve:
+        # Workers play with their own engines under the rules of this run, everything they report is kept here
+        host, port = parse_address(args.serve, "127.0.0.1")
+        pool = Coordinator(host, port, {"time_margin": args.time_margin, "adjudication": adjudication.settings() if adjudication else None,
+                                        "supervision": supervision}, args.worker_timeout, args.token or os.environ.get(TOKEN_ENV))
+        scheduler_class, concurrency = RemoteScheduler, args.concurrency or MAX_REMOTE_GAMES
+        resources = None
+    else:
+        registry = EngineRegistry.from_config(config)
+        pool = EnginePool(engine_list, log_dir=config.get("engine_log_dir", "logs"), metrics=metrics, registry=registry)
+        scheduler_class, concurrency = GameScheduler, args.concurrency or 1
+        resources = build_resources(args, config, concurrency, registry)
+    supervisor = EngineSupervisor.from_config(pool, supervision, resources)
+    sprt = SPRT(args.sprt[0], args.sprt[1], args.alpha, args.beta) if args.mode == "match" and args.sprt else None
+    scheduler = scheduler_class(pool, concurrency=concurrency, pgn_filename=pgn_filename,
+                              time_margin=args.time_margin, on_game_end=on_game_end,
+                              pgn_options={"batch_size": args.pgn_batch, "fsync": args.fsync},
+                              results_db=args.db or config.get("results_db", RESULTS_DB_FILENAME), sprt=sprt,
+                              adjudication=adjudication, supervisor=supervisor,
+                              checkpoint=Checkpoint(checkpoint_file, {"argv": argv}), metrics=metrics, resources=resources)
+
+    async def run():
+        if args.serve:
+            await pool.start()
+        try:
+            if state:
+                return await scheduler.run(jobs, job_source=swiss, resume=state)
+            if swiss:
+                return await scheduler.run(swiss.start(), job_source=swiss)
+            return await scheduler.run(jobs)
+        finally:
+            await pool.shutdown()
+
+    with contextlib.redirect_stdout(log):
+        if resources:
+            resources.report()
+        use_pidfd_child_watcher()
+        try:
+            scores = asyncio.run(run())
+        except KeyboardInterrupt:
+            scores = scheduler.scores
+        if swiss:
+            scores = swiss.scores()
+
+        print("\nFinal Score:")
+        for name, score in sorted(scores.items(), key=lambda x: -x[1]):
+            print(f"  {name}: {score}")
+        if swiss:
+            swiss.report()
+        scheduler.report_elo()
+        scheduler.report_adjudication()
+        scheduler.report_latency()
+        supervisor.report()
+        pool.report()
+        metrics.report()
+        metrics.close()
+
+    emit({"type": "standings", "scores": scores, "games": len(scheduler.results),
+          "swiss": swiss.standings() if swiss else None, "elo": scheduler.elo_summary(), "adjudication": scheduler.adjudication_stats.summary(), "latency": scheduler.latency_summary(),
+          "supervision": supervisor.summary(), "resources": resources.summary() if resources else None, "metrics": metrics.summary() if metrics.enabled else None, "workers" if args.serve else "engine_pool": pool.stats()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,660 @@
+import asyncio
+import chess
+import chess.engine
+import chess.pgn
+import datetime
+import json
+import os
+import time
+from collections import deque
+from itertools import combinations
+from adjudication import Adjudicator, AdjudicationStats
+from elo import GAME_POINTS, MatchStats, ScoreStats, format_elo
+from metrics import Metrics
+from pgn_writer import PgnIndex, PgnWriter
+from results_db import ResultsDB
+from sp_index import StartPositionSchedule, pick_start_position
+from supervisor import TERMINATIONS, EngineFailure, EngineSupervisor, supervised_play
+from time_control import Clock, LatencyStats, TimeControl
+
+
+MATCH_PGN_FILENAME = os.path.join("SavedGames", "engine_vs_engine_matches.pgn")
+
+
+def load_config(path="config.json"):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def timestamp():
+    return datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+
+
+def new_job(game_id, white, black, round_num, time_control, event, sp=None, pair=None):
+    return {
+        "id": game_id,
+        "white": white,
+        "black": black,
+        "round": round_num,
+        "sp": pick_start_position() if sp is None else sp,
+        "time_control": str(time_control),
+        "event": event,
+        "pair": pair
+    }
+
+
+def make_match_jobs(engine_a, engine_b, engine_a_color, rounds, time_control, event="Engine Match", sp_schedule=None, paired=False):
+    # With paired set, rounds 2k-1 and 2k share a start position and only the colours are reversed
+    sp_schedule = sp_schedule or StartPositionSchedule()
+    white, black = (engine_a, engine_b) if engine_a_color == "white" else (engine_b, engine_a)
+    jobs = []
+    sp = None
+    for round_num in range(1, rounds + 1):
+        if not paired or round_num % 2 == 1:
+            sp = sp_schedule.next()
+        jobs.append(new_job(len(jobs), white, black, round_num, time_control, event, sp, pair=(round_num - 1) // 2))
+        white, black = black, white
+    return jobs
+
+
+def make_round_robin_jobs(engines, rounds_per_pairing, time_control, event, sp_schedule=None, paired=False):
+    sp_schedule = sp_schedule or StartPositionSchedule()
+    jobs = []
+    pairs = 0
+    for a, b in combinations(engines, 2):
+        sp = None
+        for i in range(rounds_per_pairing):
+            white, black = (a, b) if i % 2 == 0 else (b, a)
+            if not paired or i % 2 == 0:
+                sp = sp_schedule.next()
+            jobs.append(new_job(0, white, black, i + 1, time_control, event, sp, pair=pairs + i // 2))
+        pairs += (rounds_per_pairing + 1) // 2
+    sp_schedule.rng.shuffle(jobs)
+    for game_id, job in enumerate(jobs):
+        job["id"] = game_id
+    return jobs
+
+
+def tournament_event_name(tournament_type):
+    return f"{tournament_type.capitalize()}_{timestamp()}"
+
+
+def tournament_pgn_filename(event):
+    return os.path.join("SavedGames", f"{event}.pgn")
+
+
+def pgn_date():
+    return datetime.datetime.now().strftime("%Y.%m.%d")
+
+
+def move_comment(timing):
+    # cutechess-style "+0.31/12 0.215s" with the node count appended when the engine reports one
+    score = timing.get("score")
+    if score is None:
+        text = "?"
+    elif abs(score) >= 9000:
+        moves = (10000 - abs(score) + 1) // 2
+        text = f"{'+' if score > 0 else '-'}M{moves}"
+    else:
+        text = f"{score / 100:+.2f}"
+    if timing.get("depth") is not None:
+        text += f"/{timing['depth']}"
+    text += f" {timing['wall']:.3f}s"
+    if timing.get("nodes") is not None:
+        text += f" {timing['nodes']}N"
+    return text
+
+
+def build_game_pgn(board, starting_sp, white, black, round_num, event=None, result=None, termination=None, time_control=None, adjudication=None, date=None,
+                   timings=None):
+    game = chess.pgn.Game()
+    game.headers["Event"] = event if event else "Engine Match"
+    game.headers["Site"] = "Chess960 GUI"
+    game.headers["Date"] = date or pgn_date()
+    game.headers["Round"] = str(round_num)
+    game.headers["White"] = white
+    game.headers["Black"] = black
+    game.headers["Result"] = result if result else board.result()
+    game.headers["FEN"] = chess.Board.from_chess960_pos(starting_sp).fen()
+    game.headers["Variant"] = "Chess960"
+    game.headers["Startpos"] = str(starting_sp)
+    if time_control:
+        game.headers["TimeControl"] = str(time_control)
+    if termination:
+        game.headers["Termination"] = termination
+
+    node = game
+    timings = timings or []
+    for ply, move in enumerate(board.move_stack):
+        node = node.add_variation(move)
+        if ply < len(timings):
+            node.comment = move_comment(timings[ply])
+    if adjudication:
+        node.comment = f"{node.comment} Adjudication: {adjudication}".strip()
+
+    return game
+
+
+def game_key(job):
+    return f"{job['event']}#{job['id']}"
+
+
+async def quit_engine(engine, label="", timeout=5.0):
+    if engine is None:
+        return
+    try:
+        await asyncio.wait_for(engine.quit(), timeout)
+    except Exception as e:
+        print(f"[{label}] Engine quit failed: {e or type(e).__name__}")
+        try:
+            engine.transport.kill()
+            print(f"[{label}] Engine killed successfully.")
+        except Exception as kill_err:
+            print(f"[{label}] Engine kill also failed: {kill_err}")
+
+
+def forfeit_result(board, loser):
+    # The side that forfeits still only loses if the opponent has mating material left
+    if board.has_insufficient_material(not loser):
+        return "1/2-1/2"
+    return "0-1" if loser == chess.WHITE else "1-0"
+
+
+def abandoned_record(job, loser, moves=None):
+    """Record of a game that could not go on: loser, the side whose engine would not start, forfeits from where
+    the game stood. With no loser nobody is to blame and the game stays unfinished, "*" scores for no one."""
+    board = chess.Board.from_chess960_pos(job["sp"])
+    for entry in moves or []:
+        board.push(chess.Move.from_uci(entry["move"]))
+    return {
+        "job": job,
+        "board": board,
+        "result": forfeit_result(board, loser) if loser is not None else "*",
+        "termination": "abandoned",
+        "adjudication": None,
+        "failure": "crash" if loser is not None else None,
+        "restarts": 0,
+        "timings": [entry["timing"] for entry in moves or []]
+    }
+
+
+async def play_game(job, engines, on_move=None, time_margin=0.0, adjudication=None, supervisor=None, moves=None):
+    """engines maps each color to (name, engine), the supervisor swaps in a new engine there after a crash.
+
+    moves are checkpointed {"move", "timing"} entries of an interrupted game, the game continues after them
+    with the clocks as they were after the last one.
+    """
+    board = chess.Board.from_chess960_pos(job["sp"])
+    time_control = TimeControl.parse(job["time_control"])
+    clocks = {chess.WHITE: Clock(time_control), chess.BLACK: Clock(time_control)}
+    game_key = object()
+    timings = []
+    result = None
+    termination = "normal"
+    reason = None
+    failure = None
+    restarts = 0
+    adjudicator = Adjudicator(adjudication) if adjudication else None
+
+    for entry in moves or []:
+        timing = entry["timing"]
+        if time_control.per_move is None:
+            clocks[timing["color"]].update(timing["wall"], time_margin)
+        if adjudicator:
+            adjudicator.scores[timing["color"]].append(timing["score"])
+        timings.append(timing)
+        board.push(chess.Move.from_uci(entry["move"]))
+    if moves:
+        print(f"Game {job['id'] + 1} resumes after {len(board.move_stack)} plies")
+
+    while not board.is_game_over():
+        color = board.turn
+        name, engine = engines[color]
+        allotted = time_control.allotted(clocks, color)
+        start = time.perf_counter()
+        try:
+            played = await supervised_play(engine, board, time_control.limit(clocks, color), supervisor.deadline(allotted) if supervisor else None,
+                                           info=chess.engine.INFO_BASIC | chess.engine.INFO_SCORE, game=game_key)
+        except EngineFailure as e:
+            if supervisor is None:
+                raise
+            wall = time.perf_counter() - start
+            try:
+                replacement = await supervisor.handle(e, engines, color, board, restarts, job)
+            except Exception as restart_error:
+                # A replacement that does not start loses the game like the engine it was to replace
+                print(f"{name} could not be restarted: {restart_error}")
+                supervisor.forfeits += 1
+                replacement = None
+            if replacement is None:
+                result = forfeit_result(board, color)
+                termination = TERMINATIONS[e.kind]
+                failure = e.kind
+                break
+            restarts += 1
+            if time_control.per_move is None and clocks[color].charge(wall, time_margin):
+                print(f"{name} lost on time while restarting")
+                result = forfeit_result(board, color)
+                termination = "time forfeit"
+                break
+            continue
+        wall = time.perf_counter() - start
+        score = played.info.get("score")
+        score = score.white().score(mate_score=10000) if score else None
+        timings.append({"color": color, "wall": wall, "search": played.info.get("time"), "allotted": allotted, "score": score,
+                        "depth": played.info.get("depth"), "nodes": played.info.get("nodes"), "nps": played.info.get("nps"),
+                        "hashfull": played.info.get("hashfull")})
+
+        if time_control.per_move is None and clocks[color].update(wall, time_margin):
+            print(f"{name} lost on time ({wall:.3f}s used, {allotted:.3f}s left)")
+            result = forfeit_result(board, color)
+            termination = "time forfeit"
+            break
+
+        board.push(played.move)
+        if on_move:
+            on_move(job, board.copy(), played.move, {
+                "score": score,
+                "wall": wall,
+                "timing": timings[-1],
+                "clocks": None if time_control.per_move is not None else (clocks[chess.WHITE].remaining, clocks[chess.BLACK].remaining)
+            })
+
+        verdict = adjudicator.update(board, color, score) if adjudicator else None
+        if verdict:
+            result, reason = verdict
+            termination = "adjudication"
+            print(f"Game {job['id'] + 1} adjudicated after {len(board.move_stack)} plies: {reason}")
+            break
+
+    return {
+        "job": job,
+        "board": board,
+        "result": result or board.result(),
+        "termination": termination,
+        "adjudication": reason,
+        "failure": failure,
+        "restarts": restarts,
+        "timings": timings
+    }
+
+
+class GameScheduler:
+    def __init__(self, engine_pool, concurrency=1, pgn_filename=None, on_game_start=None, on_move=None, on_game_end=None, time_margin=0.05,
+                 pgn_options=None, results_db=None, sprt=None, adjudication=None, supervisor=None, checkpoint=None, metrics=None,
+                 resources=None):
+        self.engine_pool = engine_pool
+        self.concurrency = max(1, concurrency)
+        self.time_margin = time_margin
+        self.pgn_filename = pgn_filename
+        self.metrics = metrics or Metrics(enabled=False)
+        self.pgn_writer = PgnWriter(pgn_filename, metrics=self.metrics, **(pgn_options or {})) if pgn_filename else None
+        self.results_db_path = results_db
+        self.results_db = None
+        self.sprt = sprt
+        self.llr = 0.0
+        self.sprt_decision = None
+        self.match_stats = None
+        self.elo = {}
+        self.total_jobs = 0
+        self.adjudication = adjudication
+        self.adjudication_stats = AdjudicationStats()
+        self.supervisor = supervisor or EngineSupervisor(engine_pool, resources=resources)
+        self.resources = resources
+        self.checkpoint = checkpoint
+        self.partial = {}
+        self.replaying = False
+        self.open_pairs = {}
+        self.pair_results = []
+        self.on_game_start = on_game_start
+        self.on_move = on_move
+        self.on_game_end = on_game_end
+        self.scores = {}
+        self.results = []
+        self.latency = {}
+        self.tasks = []
+        self.stopped = False
+        self.pending = deque()
+        self.active = 0
+        self.job_source = None
+        self.wakeup = None
+
+    def add_jobs(self, jobs):
+        for job in jobs:
+            self.scores.setdefault(job["white"], 0)
+            self.scores.setdefault(job["black"], 0)
+            self.elo.setdefault(job["white"], ScoreStats())
+            self.elo.setdefault(job["black"], ScoreStats())
+        self.pending.extend(jobs)
+        self.total_jobs += len(jobs)
+        if self.checkpoint and jobs and not self.replaying:
+            self.checkpoint.add_jobs(jobs, self.job_source.state() if self.job_source else None)
+
+    async def run(self, jobs, job_source=None, resume=None):
+        # job_source.job_done(job, record) is called after every game and may return more jobs, e.g. the next Swiss round.
+        # resume is the CheckpointState of an interrupted run, jobs are then all jobs it had, finished or not.
+        self.job_source = job_source
+        self.wakeup = asyncio.Event()
+        if self.checkpoint:
+            if resume:
+                self.checkpoint.resume(resume)
+            else:
+                self.checkpoint.start(pgn=self.pgn_filename, pgn_games=self.pgn_writer.initial_games if self.pgn_writer else 0)
+        self.replaying = resume is not None
+        self.add_jobs(jobs)
+        if len(self.scores) == 2 and jobs:
+            self.match_stats = MatchStats(jobs[0]["white"], jobs[0]["black"])
+
+        if self.results_db_path:
+            self.results_db = ResultsDB(self.results_db_path)
+        if resume:
+            self.restore(resume)
+        jobs = list(self.pending)
+
+        async def worker():
+            while not self.stopped:
+                if self.pending:
+                    await self.run_job(self.pending.popleft())
+                elif self.active and self.job_source:
+                    self.wakeup.clear()
+                    await self.wakeup.wait()
+                else:
+                    break
+
+        workers = self.concurrency if job_source else min(self.concurrency, len(jobs))
+        self.tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+        try:
+            await asyncio.gather(*self.tasks)
+        except asyncio.CancelledError:
+            if not self.stopped:
+                for task in self.tasks:
+                    task.cancel()
+                raise
+        finally:
+            self.close_pgn()
+            if self.results_db:
+                self.results_db.close()
+                self.results_db = None
+            if self.adjudication:
+                self.adjudication.close()
+            if self.checkpoint:
+                self.checkpoint.close()
+        return self.scores
+
+    def restore(self, state):
+        """Counts the finished games of a checkpoint as if they had just been played, without writing them again."""
+        # Games of this run are the ones indexed after the games the PGN file already had when it started.
+        # Their keys come from the GameKey tag when the index had to be rebuilt from the PGN.
+        written = {entry["key"] for entry in PgnIndex(self.pgn_filename).entries[state.run["pgn_games"]:]} if self.pgn_writer else set()
+        written.discard(None)
+        if self.pgn_writer:
+            # The writer skips them too, should a game reach it twice
+            self.pgn_writer.keys.update(written)
+        records = {}
+        for job_id, entry in state.games.items():
+            if entry["result"] is None:
+                continue
+            job = state.jobs[job_id]
+            board = chess.Board.from_chess960_pos(job["sp"])
+            for move in entry["moves"]:
+                board.push(chess.Move.from_uci(move))
+            record = {key: entry[key] for key in ("result", "termination", "adjudication", "failure", "restarts", "timings")}
+            record.update(job=job, board=board)
+            records[job_id] = record
+            self.record_result(record)
+            # Games finished just before the crash may not have reached the PGN file yet
+            if self.pgn_writer and game_key(job) not in written:
+                self.pgn_writer.submit(game_key(job), self.game_pgn(record, entry["date"]))
+
+        done = set(state.games)
+        self.pending = deque(job for job in self.pending if job["id"] not in done)
+        self.partial = {job_id: moves for job_id, moves in state.moves.items() if job_id not in done}
+        self.replaying = False
+        print(f"Resumed {self.pgn_filename or 'run'}: {len(done)} games finished, {len(self.partial)} in progress, "
+              f"{len(self.pending)} still to play")
+
+        if self.job_source:
+            # The job source state was saved with its last jobs, games finished after that are fed to it again
+            for job_id in state.source_games:
+                self.add_jobs(self.job_source.job_done(state.jobs[job_id], records.get(job_id)))
+
+    def close_pgn(self):
+        # Blocks until queued games are on disk, only a batch or two at the end of a run
+        if self.pgn_writer:
+            self.pgn_writer.close()
+
+    def stop(self):
+        self.stopped = True
+        for task in self.tasks:
+            task.cancel()
+
+    def finish(self):
+        # Games already running are played out and counted, no new ones are started
+        self.stopped = True
+        if self.wakeup:
+            self.wakeup.set()
+
+    async def run_job(self, job):
+        self.active += 1
+        try:
+            record = await self.play_job(job)
+        finally:
+            self.active -= 1
+        # No record is a game a stop left unfinished, the checkpoint has its moves and a resume plays it out
+        if record is not None and self.job_source:
+            self.add_jobs(self.job_source.job_done(job, record))
+        self.wakeup.set()
+
+    async def play_job(self, job):
+        print(f"Starting game {job['id'] + 1}: {job['white']} (White) vs {job['black']} (Black), SP {job['sp']}")
+
+        engines = {}
+        loser = None
+        try:
+            for loser, name in ((chess.WHITE, job["white"]), (chess.BLACK, job["black"])):
+                engines[loser] = (name, await self.engine_pool.acquire(name))
+            loser = None
+            if self.resources:
+                assignment = await self.resources.assign(job, engines)
+                if self.metrics.enabled:
+                    self.metrics.event("resources", game=job["id"], event=job["event"], white=job["white"], black=job["black"], **assignment)
+            if self.on_game_start:
+                self.on_game_start(job)
+            started = time.perf_counter()
+            record = await play_game(job, engines, self.move_played, self.time_margin, self.adjudication, self.supervisor,
+                                     self.partial.pop(job["id"], None))
+        except asyncio.CancelledError:
+            await asyncio.gather(*(self.engine_pool.discard(name, engine) for name, engine in engines.values() if engine))
+            raise
+        except Exception as e:
+            # Still a result, so the game is written and counted like one a supervisor forfeited
+            print(f"Game {job['id'] + 1} failed: {e}")
+            await asyncio.gather(*(self.engine_pool.discard(name, engine) for name, engine in engines.values() if engine))
+            record = abandoned_record(job, loser, self.partial.pop(job["id"], None))
+            if loser is not None:
+                self.supervisor.failures["crash"] += 1
+                self.supervisor.forfeits += 1
+            self.record_result(record)
+            return record
+        finally:
+            if self.resources:
+                self.resources.release(job)
+
+        for name, engine in engines.values():
+            if engine:
+                self.engine_pool.release(name, engine)
+        self.record_result(record)
+        if self.metrics.enabled:
+            self.observe_game(record, time.perf_counter() - started)
+        return record
+
+    def move_played(self, job, board, move, info):
+        if self.checkpoint:
+            self.checkpoint.add_move(job, move, info["timing"])
+        if self.metrics.enabled:
+            self.observe_move(job, board, move, info["timing"])
+        if self.on_move:
+            self.on_move(job, board, move, info)
+
+    def observe_move(self, job, board, move, timing):
+        name = job["white"] if timing["color"] == chess.WHITE else job["black"]
+        for metric, key in (("move_wall_seconds", "wall"), ("move_search_seconds", "search"), ("move_depth", "depth"),
+                            ("move_nodes", "nodes"), ("move_nps", "nps"), ("move_hashfull", "hashfull")):
+            self.metrics.observe(metric, timing[key], engine=name)
+        self.metrics.event("move", game=job["id"], event=job["event"], engine=name, ply=len(board.move_stack), move=move.uci(),
+                           **{key: value for key, value in timing.items() if key != "color"})
+
+    def observe_game(self, record, elapsed):
+        job = record["job"]
+        plies = len(record["board"].move_stack)
+        self.metrics.observe("game_seconds", elapsed)
+        self.metrics.observe("game_plies", plies)
+        self.metrics.event("game", game=job["id"], event=job["event"], white=job["white"], black=job["black"], sp=job["sp"],
+                           result=record["result"], termination=record["termination"], plies=plies, seconds=elapsed,
+                           restarts=record["restarts"])
+        self.metrics.game_finished()
+
+    def game_pgn(self, record, date):
+        job = record["job"]
+        return build_game_pgn(record["board"], job["sp"], job["white"], job["black"], job["round"], event=job["event"],
+                              result=record["result"], termination=record["termination"], time_control=job["time_control"],
+                              adjudication=record["adjudication"], date=date, timings=record["timings"])
+
+    def record_result(self, record):
+        job = record["job"]
+        res = record["result"]
+        white = job["white"]
+        black = job["black"]
+
+        if res == "1-0":
+            self.scores[white] += 1
+        elif res == "0-1":
+            self.scores[black] += 1
+        elif res == "1/2-1/2":
+            self.scores[white] += 0.5
+            self.scores[black] += 0.5
+        self.results.append(record)
+        self.adjudication_stats.add(record)
+
+        for timing in record["timings"]:
+            name = white if timing["color"] == chess.WHITE else black
+            self.latency.setdefault(name, LatencyStats()).add(timing, self.time_margin)
+        if record["termination"] == "time forfeit":
+            loser = white if record["board"].turn == chess.WHITE else black
+            self.latency.setdefault(loser, LatencyStats()).time_losses += 1
+
+        if res in GAME_POINTS:
+            self.elo[white].add(GAME_POINTS[res])
+            self.elo[black].add(1 - GAME_POINTS[res])
+        if not self.replaying:
+            print(f"Result: {white} (White) vs {black} (Black) - {res}")
+            print(f"Score: {white}: {self.scores[white]} | {black}: {self.scores[black]}")
+        self.record_pair(job, res)
+        if self.match_stats:
+            self.match_stats.add(job, res)
+            summary = self.match_stats.summary()
+            if not self.replaying:
+                print(f"Elo {summary['engine_a']} vs {summary['engine_b']}: {format_elo(summary['elo'], summary['elo_low'], summary['elo_high'])}")
+            if self.sprt and not self.sprt_decision:
+                self.update_sprt()
+        if self.replaying:
+            return
+
+        date = pgn_date()
+        if self.checkpoint:
+            # Before the PGN and the database, so a game they have is never played again on resume
+            self.checkpoint.add_game(job, record, date)
+        game = self.game_pgn(record, date)
+        if self.pgn_writer:
+            self.pgn_writer.submit(game_key(job), game)
+        if self.results_db:
+            try:
+                self.results_db.add_game(game, record["timings"], source=self.pgn_filename)
+            except Exception as e:
+                print(f"Failed to store game {job['id'] + 1} in {self.results_db_path}: {e}")
+
+        if self.on_game_end:
+            self.on_game_end(record)
+
+    def record_pair(self, job, result):
+        pair = job.get("pair")
+        if pair is None or result not in GAME_POINTS:
+            return
+        if pair not in self.open_pairs:
+            self.open_pairs[pair] = (job, result)
+            return
+        first_job, first_result = self.open_pairs.pop(pair)
+        a, b = first_job["white"], first_job["black"]
+        points = GAME_POINTS[first_result] + (GAME_POINTS[result] if job["white"] == a else 1 - GAME_POINTS[result])
+        sps = [first_job["sp"], job["sp"]]
+        self.pair_results.append({"pair": pair, "sps": sps, "engines": [a, b], "points": [points, 2 - points]})
+        if self.replaying:
+            return
+        sp_text = f"SP {sps[0]}" if sps[0] == sps[1] else f"SPs {sps[0]}/{sps[1]}"
+        print(f"Pair {pair + 1} ({sp_text}): {a} {points:g} - {2 - points:g} {b}")
+
+    def update_sprt(self):
+        self.llr = self.sprt.llr(self.match_stats.samples())
+        if not self.replaying:
+            print(f"LLR {self.llr:.2f} ({self.sprt.lower:.2f}, {self.sprt.upper:.2f})")
+        self.sprt_decision = self.sprt.decision(self.llr)
+        if self.sprt_decision:
+            print(f"{self.sprt}: {self.sprt_decision} accepted after {len(self.results)} games, stopping the match")
+            self.finish()
+
+    def elo_summary(self):
+        summary = {
+            "engines": {},
+            "games_played": len(self.results),
+            "games_scheduled": self.total_jobs,
+            "pairs": self.pair_results
+        }
+        for name, stats in self.elo.items():
+            low, high = stats.elo_interval()
+            summary["engines"][name] = {"games": stats.n, "elo": stats.elo(), "elo_low": low, "elo_high": high}
+        if self.match_stats:
+            summary["match"] = self.match_stats.summary()
+        if self.sprt:
+            summary["sprt"] = {
+                "elo0": self.sprt.elo0, "elo1": self.sprt.elo1, "alpha": self.sprt.alpha, "beta": self.sprt.beta,
+                "llr": self.llr, "lower": self.sprt.lower, "upper": self.sprt.upper, "decision": self.sprt_decision
+            }
+        return summary
+
+    def report_elo(self):
+        print("Elo against the field (95% interval):")
+        for name, stats in sorted(self.elo.items(), key=lambda item: -item[1].mean()):
+            print(f"  {name}: {format_elo(stats.elo(), *stats.elo_interval())} over {stats.n} games")
+        if self.match_stats:
+            summary = self.match_stats.summary()
+            print(f"{summary['engine_a']} vs {summary['engine_b']}: +{summary['wins']} ={summary['draws']} -{summary['losses']}, "
+                  f"pentanomial {summary['pentanomial']}, Elo {format_elo(summary['elo'], summary['elo_low'], summary['elo_high'])}")
+            games, pairs = self.match_stats.games, self.match_stats.pairs
+            if pairs.n:
+                print(f"  95% interval from {games.n} games treated alone: {format_elo(games.elo(), *games.elo_interval())}, "
+                      f"from {pairs.n} pairs: {format_elo(pairs.elo(), *pairs.elo_interval())}")
+        if self.sprt:
+            decision = f"{self.sprt_decision} accepted" if self.sprt_decision else "no decision"
+            saved = self.total_jobs - len(self.results)
+            print(f"{self.sprt}: LLR {self.llr:.2f} ({self.sprt.lower:.2f}, {self.sprt.upper:.2f}), {decision}, "
+                  f"{len(self.results)} of {self.total_jobs} games played, {saved} saved")
+
+    def report_adjudication(self):
+        if not self.adjudication:
+            return
+        summary = self.adjudication_stats.summary()
+        reasons = ", ".join(f"{count} {reason}" for reason, count in sorted(summary["reasons"].items())) or "none"
+        print(f"Adjudication ({self.adjudication}): {summary['adjudicated']} games ({reasons}), "
+              f"~{summary['plies_saved']:.0f} plies and ~{summary['seconds_saved']:.1f}s saved "
+              f"(games expected to last {summary['expected_plies']:.0f} plies)")
+
+    def latency_summary(self):
+        return {name: stats.summary() for name, stats in self.latency.items()}
+
+    def report_latency(self):
+        print("Move latency (wall = reported search + overhead):")
+        for name, summary in sorted(self.latency_summary().items()):
+            search = f"{summary['avg_search'] * 1000:.0f} ms" if summary["avg_search"] is not None else "n/a"
+            overhead = f"{summary['avg_overhead'] * 1000:.1f} ms (max {summary['max_overhead'] * 1000:.1f} ms)" if summary["avg_overhead"] is not None else "n/a"
+            print(f"  {name}: {summary['moves']} moves, wall {summary['avg_wall'] * 1000:.0f} ms, search {search}, "
+                  f"overhead {overhead}, {summary['slow_moves']} over time, {summary['time_losses']} lost on time")
@@ -0,0 +1,196 @@
+import contextlib
+import json
+import math
+import os
+import random
+import threading
+import time
+
+PROMETHEUS_PREFIX = "chess960_"
+QUANTILES = (0.5, 0.95, 0.99)
+# Observations kept per series for the percentiles, count, sum and max stay exact
+RESERVOIR_SIZE = 4096
+
+HELP = {
+    "move_wall_seconds": "Time from sending go to receiving bestmove",
+    "move_search_seconds": "Search time reported by the engine",
+    "move_depth": "Search depth reported with the move",
+    "move_nodes": "Nodes searched for the move",
+    "move_nps": "Nodes per second reported with the move",
+    "move_hashfull": "Hash table fill in permille reported with the move",
+    "game_seconds": "Wall time of a whole game",
+    "game_plies": "Length of a game in plies",
+    "engine_spawn_seconds": "Time to start an engine process and finish the UCI handshake",
+    "pgn_write_seconds": "Time to write and flush one batch of games to the PGN file",
+    "gui_draw_board_seconds": "Time to redraw the board",
+    "gui_update_move_log_seconds": "Time to rebuild the move log or add a move to it",
+    "gui_update_eval_bars_seconds": "Time to hand the position to the eval bar analysers",
+    "gui_frame_seconds": "Time to draw one frame of the live games"
+}
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+class Series:
+    """Running count, sum and max, with percentiles from a uniform sample of at most RESERVOIR_SIZE values."""
+
+    def __init__(self):
+        self.values = []
+        self.count = 0
+        self.sum = 0
+        self.max = None
+        self.rng = random.Random()
+
+    def add(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self.values) < RESERVOIR_SIZE:
+            self.values.append(value)
+            return
+        # Reservoir sampling: the n-th value replaces a kept one with probability RESERVOIR_SIZE / n
+        slot = self.rng.randrange(self.count)
+        if slot < RESERVOIR_SIZE:
+            self.values[slot] = value
+
+    def summary(self):
+        ordered = sorted(self.values)
+        summary = {"count": self.count, "sum": self.sum, "max": self.max}
+        for quantile in QUANTILES:
+            summary[f"p{round(quantile * 100)}"] = percentile(ordered, quantile)
+        return summary
+
+
+class Timer:
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+NO_TIMER = contextlib.nullcontext()
+
+
+class Metrics:
+    """Per-move and per-game measurements, aggregated per label set (usually per engine).
+
+    Memory per series is bounded, percentiles come from a sample once a series passes RESERVOIR_SIZE
+    observations. The PGN writer thread observes too, so the series are only touched under the lock.
+    With a jsonl_filename each observation is also appended there as it happens; prometheus_filename is
+    rewritten atomically at most every prometheus_interval seconds and on close. A disabled instance
+    returns from every call straight away.
+    """
+
+    def __init__(self, jsonl_filename=None, prometheus_filename=None, prometheus_interval=10.0, enabled=True):
+        self.enabled = enabled
+        self.jsonl_filename = jsonl_filename
+        self.prometheus_filename = prometheus_filename
+        self.prometheus_interval = prometheus_interval
+        self.series = {}
+        self.lock = threading.Lock()
+        self.jsonl = None
+        self.last_export = time.monotonic()
+        if enabled and jsonl_filename:
+            os.makedirs(os.path.dirname(jsonl_filename) or ".", exist_ok=True)
+            self.jsonl = open(jsonl_filename, "a", encoding="utf-8")
+
+    @classmethod
+    def from_config(cls, settings):
+        if not settings:
+            return cls(enabled=False)
+        return cls(settings.get("jsonl"), settings.get("prometheus"), settings.get("prometheus_interval", 10.0))
+
+    def observe(self, name, value, **labels):
+        if not self.enabled or value is None:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = Series()
+            series.add(value)
+
+    def timer(self, name, **labels):
+        # Disabled metrics hand out one shared no-op context manager instead of building a timer
+        if not self.enabled:
+            return NO_TIMER
+        return Timer(self, name, labels)
+
+    def event(self, kind, **fields):
+        # The PGN writer thread records too, so lines are written under the lock
+        if not self.enabled or not self.jsonl:
+            return
+        line = json.dumps(dict(fields, type=kind, time=time.time())) + "\n"
+        with self.lock:
+            self.jsonl.write(line)
+
+    def game_finished(self):
+        if not self.enabled:
+            return
+        if self.jsonl:
+            with self.lock:
+                self.jsonl.flush()
+        if self.prometheus_filename and time.monotonic() - self.last_export >= self.prometheus_interval:
+            self.export_prometheus()
+
+    def summary(self):
+        with self.lock:
+            return [dict(series.summary(), metric=name, labels=dict(labels)) for (name, labels), series in sorted(self.series.items())]
+
+    def export_prometheus(self):
+        self.last_export = time.monotonic()
+        lines = []
+        described = set()
+        for row in self.summary():
+            name = PROMETHEUS_PREFIX + row["metric"]
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {HELP.get(row['metric'], row['metric'])}")
+                lines.append(f"# TYPE {name} summary")
+            labels = [f'{key}="{value}"' for key, value in row["labels"].items()]
+            for quantile in QUANTILES:
+                quantile_labels = ",".join(labels + [f'quantile="{quantile}"'])
+                lines.append(f"{name}{{{quantile_labels}}} {row[f'p{round(quantile * 100)}']}")
+            label_text = "{" + ",".join(labels) + "}" if labels else ""
+            lines.append(f"{name}_sum{label_text} {row['sum']}")
+            lines.append(f"{name}_count{label_text} {row['count']}")
+
+        os.makedirs(os.path.dirname(self.prometheus_filename) or ".", exist_ok=True)
+        temp = self.prometheus_filename + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temp, self.prometheus_filename)
+
+    def close(self):
+        if not self.enabled:
+            return
+        if self.prometheus_filename:
+            self.export_prometheus()
+        if self.jsonl:
+            line = json.dumps({"type": "summary", "time": time.time(), "metrics": self.summary()}) + "\n"
+            with self.lock:
+                self.jsonl.write(line)
+                self.jsonl.close()
+                self.jsonl = None
+
+    def report(self):
+        if not self.enabled or not self.series:
+            return
+        print("Metrics (p50 / p95 / p99, max):")
+        for row in self.summary():
+            labels = " ".join(f"{key}={value}" for key, value in row["labels"].items())
+            print(f"  {row['metric']:<30} {labels:<16} n={row['count']:<7} "
+                  f"{row['p50']:.4g} / {row['p95']:.4g} / {row['p99']:.4g}, max {row['max']:.4g}")
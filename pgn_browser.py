@@ -0,0 +1,147 @@
+import os
+import tkinter as tk
+import tkinter.filedialog
+import tkinter.messagebox
+from array import array
+from pgn_writer import RESULTS, GameCatalog
+
+
+class PgnBrowser:
+    """Window listing the games of a PGN file, the selected game is stepped through on the main board.
+
+    Only the rows in view exist as Listbox items, so scrolling through 100k games costs the same as
+    through 100. on_position(board, headers) shows a position, on_close() hands the board back.
+    """
+
+    ROWS = 24
+
+    def __init__(self, root, on_position, on_close=None, initialdir="SavedGames"):
+        self.on_position = on_position
+        self.on_close = on_close
+        self.initialdir = initialdir
+        self.catalog = None
+        self.found = array("i")
+        self.first = 0
+        self.game = None
+        self.moves = []
+        self.ply = 0
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Game Browser")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        controls = tk.Frame(self.window)
+        controls.pack(fill="x", padx=5, pady=5)
+        tk.Button(controls, text="Open PGN...", command=self.open_file).pack(side="left")
+        tk.Label(controls, text="Engine").pack(side="left", padx=(10, 0))
+        self.engine_var = tk.StringVar()
+        tk.Entry(controls, textvariable=self.engine_var, width=14).pack(side="left")
+        tk.Label(controls, text="Result").pack(side="left", padx=(10, 0))
+        self.result_var = tk.StringVar(value="any")
+        tk.OptionMenu(controls, self.result_var, "any", *RESULTS[:3]).pack(side="left")
+        tk.Label(controls, text="SP").pack(side="left", padx=(10, 0))
+        self.sp_var = tk.StringVar()
+        tk.Entry(controls, textvariable=self.sp_var, width=5).pack(side="left")
+        tk.Button(controls, text="Filter", command=self.apply_filter).pack(side="left", padx=(10, 0))
+        tk.Button(controls, text="Reload", command=self.reload).pack(side="left")
+
+        rows = tk.Frame(self.window)
+        rows.pack(fill="both", expand=True, padx=5)
+        self.listbox = tk.Listbox(rows, height=self.ROWS, width=72, font=("Consolas", 10), activestyle="none", exportselection=False)
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.scrollbar = tk.Scrollbar(rows, command=self.on_scroll)
+        self.scrollbar.pack(side="right", fill="y")
+        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.listbox.bind("<MouseWheel>", lambda event: self.scroll_to(self.first - event.delta // 40))
+        self.listbox.bind("<Button-4>", lambda event: self.scroll_to(self.first - 3))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll_to(self.first + 3))
+
+        steps = tk.Frame(self.window)
+        steps.pack(pady=5)
+        for text, command in (("|<", lambda: self.step_to(0)), ("<", lambda: self.step_to(self.ply - 1)),
+                              (">", lambda: self.step_to(self.ply + 1)), (">|", lambda: self.step_to(len(self.moves)))):
+            tk.Button(steps, text=text, width=4, command=command).pack(side="left")
+        self.status = tk.Label(self.window, text="No file open", font=("Consolas", 10), anchor="w")
+        self.status.pack(fill="x", padx=5, pady=(0, 5))
+        self.window.bind("<Left>", lambda event: self.step_to(self.ply - 1))
+        self.window.bind("<Right>", lambda event: self.step_to(self.ply + 1))
+        self.window.bind("<Home>", lambda event: self.step_to(0))
+        self.window.bind("<End>", lambda event: self.step_to(len(self.moves)))
+
+    def open_file(self):
+        filename = tk.filedialog.askopenfilename(title="Open PGN", initialdir=self.initialdir,
+                                                 filetypes=[("PGN files", "*.pgn"), ("All files", "*")], parent=self.window)
+        if filename:
+            self.load(filename)
+
+    def load(self, filename):
+        self.status.config(text=f"Loading the index of {filename}...")
+        self.window.update_idletasks()
+        try:
+            self.catalog = GameCatalog(filename)
+        except (OSError, ValueError) as e:
+            tk.messagebox.showerror("Cannot Open", str(e), parent=self.window)
+            return
+        self.window.title(f"Game Browser - {os.path.basename(filename)}")
+        self.apply_filter()
+
+    def reload(self):
+        if self.catalog:
+            self.catalog.refresh()
+            self.apply_filter()
+
+    def apply_filter(self):
+        if not self.catalog:
+            return
+        sp = self.sp_var.get().strip()
+        if sp and not sp.isdigit():
+            tk.messagebox.showerror("Invalid Filter", "SP must be a start position number.", parent=self.window)
+            return
+        result = self.result_var.get()
+        self.found = self.catalog.matches(self.engine_var.get().strip() or None, None if result == "any" else result,
+                                          int(sp) if sp else None)
+        self.status.config(text=f"{len(self.found)} of {len(self.catalog)} games "
+                                f"(index loaded in {self.catalog.load_seconds:.2f}s)")
+        self.scroll_to(0)
+
+    def scroll_to(self, first):
+        self.first = max(0, min(first, len(self.found) - self.ROWS))
+        self.listbox.delete(0, tk.END)
+        for n in self.found[self.first:self.first + self.ROWS]:
+            self.listbox.insert(tk.END, self.catalog.row(n))
+        total = max(len(self.found), 1)
+        self.scrollbar.set(self.first / total, min(1.0, (self.first + self.ROWS) / total))
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.found)))
+        elif action == "scroll":
+            self.scroll_to(self.first + int(amount) * (self.ROWS if unit == "pages" else 1))
+
+    def on_select(self, event):
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+        n = self.found[self.first + selection[0]]
+        self.game = self.catalog.read_game(n)
+        if self.game is None:
+            return
+        self.moves = list(self.game.mainline_moves())
+        self.step_to(0)
+
+    def step_to(self, ply):
+        if self.game is None:
+            return
+        self.ply = max(0, min(ply, len(self.moves)))
+        board = self.game.board()
+        for move in self.moves[:self.ply]:
+            board.push(move)
+        self.on_position(board, self.game.headers)
+        headers = self.game.headers
+        self.status.config(text=f"{headers.get('White', '?')} - {headers.get('Black', '?')}  {headers.get('Result', '*')}  "
+                                f"SP {headers.get('Startpos', '?')}  ply {self.ply}/{len(self.moves)}")
+
+    def close(self):
+        self.window.destroy()
+        if self.on_close:
+            self.on_close()
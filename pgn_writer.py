@@ -0,0 +1,374 @@
+import argparse
+import chess.pgn
+import io
+import json
+import os
+import queue
+import threading
+import time
+from array import array
+
+RESULTS = ["1-0", "0-1", "1/2-1/2", "*"]
+NO_STARTPOS = -1
+
+
+def index_filename(pgn_filename):
+    return pgn_filename + ".idx"
+
+
+def index_entry(key, offset, length, headers):
+    return {
+        "key": key,
+        "offset": offset,
+        "length": length,
+        "result": headers.get("Result", "*"),
+        "startpos": int(headers["Startpos"]) if headers.get("Startpos", "").isdigit() else None,
+        "headers": dict(headers)
+    }
+
+
+def scan_games(pgn_filename, start=0):
+    # Byte offsets of every game from start on, found by looking for the first tag line after movetext.
+    # A last game whose movetext does not end in a result yet is still being appended: it is left out and
+    # the returned end is where it starts, so a later scan picks it up complete.
+    offsets = []
+    in_headers = False
+    last_line = b""
+    position = start
+    with open(pgn_filename, "rb") as f:
+        f.seek(start)
+        for line in f:
+            if line.startswith(b"["):
+                if not in_headers:
+                    offsets.append(position)
+                in_headers = True
+            elif line.strip():
+                in_headers = False
+                last_line = line
+            position += len(line)
+    if offsets and (in_headers or last_line.split()[-1:] not in ([result.encode()] for result in RESULTS)):
+        position = offsets.pop()
+    return offsets, position
+
+
+def read_index(index_filename, position=0):
+    """Yields (entry, position after it) for each index line from byte position on, up to the last complete line."""
+    with open(index_filename, "rb") as f:
+        f.seek(position)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            position += len(line)
+            if line.strip():
+                yield json.loads(line), position
+
+
+class PgnIndex:
+    """Sidecar index of a PGN file, one JSON line per game, so game N can be read without parsing games 0..N-1.
+
+    A missing index, or one pointing past the end of the PGN, is rebuilt from the PGN on load. Games the
+    index does not have yet are indexed from where it ends; only with repair (the PgnWriter, before it
+    opens the files) are they appended to the index file, a reader could otherwise write into an index a
+    running PgnWriter appends to. refresh() adds the games a PgnWriter has indexed since, without looking
+    at the PGN. Subclasses can keep the entries their own way by overriding clear(), add(), span() and
+    __len__().
+    """
+
+    def __init__(self, pgn_filename, repair=False):
+        self.pgn_filename = pgn_filename
+        self.index_filename = index_filename(pgn_filename)
+        self.repair = repair
+        self.entries = []
+        self.index_position = 0
+        self.load()
+
+    def clear(self):
+        self.entries = []
+
+    def add(self, entry):
+        self.entries.append(entry)
+
+    def span(self, n):
+        entry = self.entries[n]
+        return entry["offset"], entry["length"]
+
+    def load(self):
+        size = os.path.getsize(self.pgn_filename) if os.path.exists(self.pgn_filename) else 0
+        self.clear()
+        self.index_position = 0
+        if not os.path.exists(self.index_filename) or self.refresh() is None or self.end() > size:
+            self.rebuild()
+            return
+        if self.repair and os.path.getsize(self.index_filename) > self.index_position:
+            # A line cut short by a crash, the writer's next line would be appended to it
+            with open(self.index_filename, "r+b") as index:
+                index.truncate(self.index_position)
+        if self.end() < size:
+            self.index_tail()
+
+    def refresh(self):
+        """Adds the entries appended to the index since it was read, returns how many there were or None if
+        the index is not readable."""
+        if not os.path.exists(self.index_filename) or os.path.getsize(self.index_filename) < self.index_position:
+            # Rebuilt or removed since, start over
+            self.load()
+            return len(self)
+        count = len(self)
+        try:
+            for entry, self.index_position in read_index(self.index_filename, self.index_position):
+                # Games indexed from the PGN by index_tail() come in again once the writer indexes them
+                if entry["offset"] >= self.end():
+                    self.add(entry)
+        except (ValueError, KeyError, TypeError):
+            return None
+        return len(self) - count
+
+    def end(self):
+        if not len(self):
+            return 0
+        offset, length = self.span(len(self) - 1)
+        return offset + length
+
+    def scan(self, start=0):
+        """Yields an index entry for every complete game of the PGN from byte start on."""
+        if not os.path.exists(self.pgn_filename):
+            return
+        offsets, size = scan_games(self.pgn_filename, start)
+        with open(self.pgn_filename, "rb") as f:
+            for offset, next_offset in zip(offsets, offsets[1:] + [size]):
+                f.seek(offset)
+                data = f.read(next_offset - offset)
+                # Only the tags are needed, they end at the first blank line
+                tags_end = data.find(b"\n\n")
+                text = data[:tags_end + 1 if tags_end >= 0 else len(data)].decode("utf-8", errors="replace")
+                headers = chess.pgn.read_headers(io.StringIO(text))
+                if headers is not None:
+                    yield index_entry(headers.get("GameKey"), offset, next_offset - offset, headers)
+
+    def rebuild(self):
+        # Written next to the index and swapped in whole, a reader never sees it half done
+        start = time.perf_counter()
+        self.clear()
+        temp_filename = self.index_filename + ".tmp"
+        with open(temp_filename, "w", encoding="utf-8") as index:
+            for entry in self.scan():
+                index.write(json.dumps(entry) + "\n")
+                self.add(entry)
+            self.index_position = index.tell()
+        os.replace(temp_filename, self.index_filename)
+        print(f"Indexed {len(self)} games in {self.pgn_filename} ({time.perf_counter() - start:.2f}s)")
+
+    def index_tail(self):
+        entries = list(self.scan(self.end()))
+        for entry in entries:
+            self.add(entry)
+        if self.repair and entries:
+            with open(self.index_filename, "a", encoding="utf-8") as index:
+                for entry in entries:
+                    index.write(json.dumps(entry) + "\n")
+                self.index_position = index.tell()
+        if entries:
+            print(f"Indexed {len(entries)} game(s) missing from {self.index_filename}")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, n):
+        return self.entries[n]
+
+    def read_text(self, n):
+        offset, length = self.span(n)
+        with open(self.pgn_filename, "rb") as f:
+            f.seek(offset)
+            return f.read(length).decode("utf-8", errors="replace")
+
+    def read_game(self, n):
+        return chess.pgn.read_game(io.StringIO(self.read_text(n)))
+
+
+class GameCatalog(PgnIndex):
+    """A PgnIndex that keeps only what listing and filtering games needs, in flat arrays.
+
+    Engine names are stored once each, so memory grows by a few bytes per game rather than by an entry
+    with all its headers; a game's moves are read from the PGN when it is opened.
+    """
+
+    def __init__(self, pgn_filename):
+        start = time.perf_counter()
+        super().__init__(pgn_filename)
+        self.load_seconds = time.perf_counter() - start
+
+    def clear(self):
+        self.offsets = array("q")
+        self.lengths = array("q")
+        self.white = array("i")
+        self.black = array("i")
+        self.results = array("b")
+        self.startpos = array("h")
+        self.rounds = array("i")
+        self.names = []
+        self.name_ids = {}
+
+    def add(self, entry):
+        headers = entry["headers"]
+        result = entry["result"]
+        round_text = headers.get("Round", "")
+        self.offsets.append(entry["offset"])
+        self.lengths.append(entry["length"])
+        self.white.append(self.name_id(headers.get("White", "?")))
+        self.black.append(self.name_id(headers.get("Black", "?")))
+        self.results.append(RESULTS.index(result) if result in RESULTS else RESULTS.index("*"))
+        self.startpos.append(NO_STARTPOS if entry["startpos"] is None else entry["startpos"])
+        self.rounds.append(int(round_text) if round_text.isdigit() else 0)
+
+    def span(self, n):
+        return self.offsets[n], self.lengths[n]
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def name_id(self, name):
+        if name not in self.name_ids:
+            self.name_ids[name] = len(self.names)
+            self.names.append(name)
+        return self.name_ids[name]
+
+    def matches(self, engine=None, result=None, startpos=None):
+        """Numbers of the games that have engine on either side, the given result and start position."""
+        engine_id = self.name_ids.get(engine, -2) if engine else None
+        result_id = RESULTS.index(result) if result else None
+        found = array("i")
+        white, black, results, startposes = self.white, self.black, self.results, self.startpos
+        for n in range(len(self.offsets)):
+            if engine_id is not None and white[n] != engine_id and black[n] != engine_id:
+                continue
+            if result_id is not None and results[n] != result_id:
+                continue
+            if startpos is not None and startposes[n] != startpos:
+                continue
+            found.append(n)
+        return found
+
+    def row(self, n):
+        startpos = self.startpos[n]
+        return (f"{n + 1:>6}  {self.rounds[n]:>4}  {self.names[self.white[n]][:16]:<16} {self.names[self.black[n]][:16]:<16} "
+                f"{RESULTS[self.results[n]]:<7}  SP {startpos if startpos != NO_STARTPOS else '?'}")
+
+
+class PgnWriter:
+    """Appends finished games to a PGN file from a background thread.
+
+    Games are written in batches of up to batch_size, or whatever arrived within flush_interval seconds.
+    Each batch is flushed (and fsynced if requested) before its index lines are written, so the index
+    never points past the end of the PGN. A key that was already written in this session is skipped.
+    """
+
+    def __init__(self, filename, batch_size=8, flush_interval=1.0, fsync=False, metrics=None):
+        self.filename = filename
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.metrics = metrics
+        self.keys = set()
+        self.written = 0
+        self.duplicates = 0
+        self.batches = 0
+        self.queue = queue.Queue()
+        self.closed = False
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        self.initial_games = len(PgnIndex(filename, repair=True))
+        self.thread = threading.Thread(target=self.run, name="pgn-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, key, game):
+        self.queue.put((key, game))
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.queue.put(None)
+        self.thread.join()
+
+    def next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while batch[-1] is not None and len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        with open(self.filename, "ab") as pgn, open(index_filename(self.filename), "a", encoding="utf-8") as index:
+            done = False
+            while not done:
+                batch = self.next_batch()
+                if batch[-1] is None:
+                    done = True
+                    batch.pop()
+                try:
+                    self.write_batch(pgn, index, batch)
+                except Exception as e:
+                    print(f"Failed to write {len(batch)} game(s) to {self.filename}: {e}")
+
+    def write_batch(self, pgn, index, batch):
+        start = time.perf_counter()
+        entries = []
+        for key, game in batch:
+            if key in self.keys:
+                self.duplicates += 1
+                print(f"Skipped duplicate game {key}")
+                continue
+            if key is not None:
+                # Kept in the PGN itself, so an index rebuilt from it still knows which games a run wrote
+                game.headers["GameKey"] = key
+            data = (str(game) + "\n\n").encode("utf-8")
+            entries.append(index_entry(key, pgn.tell(), len(data), game.headers))
+            pgn.write(data)
+            self.keys.add(key)
+        if not entries:
+            return
+
+        pgn.flush()
+        if self.fsync:
+            os.fsync(pgn.fileno())
+        for entry in entries:
+            index.write(json.dumps(entry) + "\n")
+        index.flush()
+        if self.fsync:
+            os.fsync(index.fileno())
+        self.written += len(entries)
+        self.batches += 1
+        if self.metrics:
+            self.metrics.observe("pgn_write_seconds", time.perf_counter() - start)
+        print(f"{len(entries)} game(s) saved to {self.filename}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="List the games of a PGN file through its index, or print one of them.")
+    parser.add_argument("pgn")
+    parser.add_argument("game", type=int, nargs="?", metavar="GAME_NUMBER", help="print this game instead of the list")
+    parser.add_argument("--engine", help="games this engine played with either color")
+    parser.add_argument("--result", choices=RESULTS[:3])
+    parser.add_argument("--sp", type=int, help="games from this start position")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    catalog = GameCatalog(args.pgn)
+    if args.game:
+        print(catalog.read_text(args.game - 1))
+        return
+    found = catalog.matches(args.engine, args.result, args.sp)
+    for n in found:
+        print(catalog.row(n))
+    print(f"{len(found)} of {len(catalog)} games")
+
+
+if __name__ == "__main__":
+    main()
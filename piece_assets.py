@@ -0,0 +1,102 @@
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+PIECE_NAMES = [color + piece for color in "wb" for piece in "PNBRQK"]
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:16]
+
+
+def convert_svg(svg_path, png_path, size):
+    import cairosvg
+    cairosvg.svg2png(url=svg_path, write_to=png_path, output_width=size, output_height=size)
+    return png_path
+
+
+def resize_png(src_path, png_path, size):
+    with Image.open(src_path) as img:
+        img.resize((size, size)).save(png_path)
+    return png_path
+
+
+class PieceAssetCache:
+    def __init__(self, svg_folder, cache_folder, fallback_folder=None):
+        self.svg_folder = svg_folder
+        self.cache_folder = cache_folder
+        self.fallback_folder = fallback_folder
+        self.paths = {}
+
+    def cache_path(self, name, size, digest):
+        return os.path.join(self.cache_folder, str(size), f"{name}_{digest}.png")
+
+    def sources(self):
+        sources = {}
+        for name in PIECE_NAMES:
+            svg_path = os.path.join(self.svg_folder, f"{name}.svg")
+            if os.path.exists(svg_path):
+                sources[name] = (svg_path, convert_svg)
+            elif self.fallback_folder:
+                sources[name] = (os.path.join(self.fallback_folder, f"{name}.png"), resize_png)
+        return sources
+
+    def ensure(self, size):
+        if size in self.paths:
+            return self.paths[size]
+
+        start = time.perf_counter()
+        os.makedirs(os.path.join(self.cache_folder, str(size)), exist_ok=True)
+        paths = {}
+        missing = []
+        for name, (src_path, convert) in self.sources().items():
+            path = self.cache_path(name, size, file_digest(src_path))
+            paths[name] = path
+            if not os.path.exists(path):
+                missing.append((name, src_path, convert, path))
+
+        if missing:
+            paths.update(self.convert_all(missing, size))
+            for name, src_path, convert, path in missing:
+                self.remove_stale(name, size, paths[name])
+
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"Piece assets ({size}px): {len(paths) - len(missing)} cached, {len(missing)} converted in {elapsed:.1f} ms")
+        self.paths[size] = paths
+        return paths
+
+    def convert_all(self, missing, size):
+        """Renders the missing pieces, returns the path each one ended up at."""
+        try:
+            if len(missing) == 1:
+                name, src_path, convert, path = missing[0]
+                convert(src_path, path, size)
+                return {name: path}
+            with ProcessPoolExecutor(max_workers=min(len(missing), os.cpu_count() or 1)) as executor:
+                futures = [executor.submit(convert, src_path, path, size) for name, src_path, convert, path in missing]
+                for future in futures:
+                    future.result()
+            return {name: path for name, src_path, convert, path in missing}
+        except (ImportError, OSError) as e:
+            if not self.fallback_folder:
+                raise
+            reason = str(e).splitlines()[0] if str(e) else type(e).__name__
+            print(f"SVG conversion unavailable ({reason}), resizing PNG pieces instead")
+            # Keyed on the PNG like any other PNG render, the SVG's cache path stays free for when conversion works
+            paths = {}
+            for name, src_path, convert, path in missing:
+                png_path = os.path.join(self.fallback_folder, f"{name}.png")
+                paths[name] = self.cache_path(name, size, file_digest(png_path))
+                if not os.path.exists(paths[name]):
+                    resize_png(png_path, paths[name], size)
+            return paths
+
+    def remove_stale(self, name, size, keep_path):
+        folder = os.path.join(self.cache_folder, str(size))
+        for filename in os.listdir(folder):
+            path = os.path.join(folder, filename)
+            if filename.startswith(f"{name}_") and path != keep_path:
+                os.remove(path)
@@ -0,0 +1,192 @@
+import chess
+import os
+
+DEFAULT_MEMORY_FRACTION = 0.5
+
+
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def read_topology(cpu, name):
+    with open(f"/sys/devices/system/cpu/cpu{cpu}/topology/{name}", "r") as f:
+        return int(f.read())
+
+
+def core_order(cpus):
+    """cpus with one logical CPU of every physical core first and the SMT siblings after them."""
+    # Linux tells which core each CPU belongs to, elsewhere every CPU counts as a core of its own
+    taken = {}
+    order = []
+    for cpu in sorted(cpus):
+        try:
+            core = (read_topology(cpu, "physical_package_id"), read_topology(cpu, "core_id"))
+        except (OSError, ValueError):
+            core = (None, cpu)
+        sibling = taken.get(core, 0)
+        taken[core] = sibling + 1
+        order.append((sibling, cpu))
+    return [cpu for _, cpu in sorted(order)]
+
+
+def available_memory_mb():
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def format_cpus(cpus):
+    # "0-3,8" like taskset and /proc print CPU lists
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(low) if low == high else f"{low}-{high}" for low, high in ranges)
+
+
+def pin_process(pid, cpus):
+    # sched_setaffinity moves a single thread, the search threads an engine already has are moved one by one
+    try:
+        threads = [int(tid) for tid in os.listdir(f"/proc/{pid}/task")]
+    except OSError:
+        threads = [pid]
+    for tid in threads:
+        try:
+            os.sched_setaffinity(tid, cpus)
+        except ProcessLookupError:
+            pass
+
+
+class ResourcePlan:
+    """Threads, Hash and CPUs for both engines of every game that runs at the same time.
+
+    Each of the concurrency game slots gets its own set of threads CPUs, physical cores first and SMT
+    siblings after them. Both engines of a game are pinned to that set: engines do not ponder here, so only
+    the side to move searches and the two get exactly the same CPUs. threads defaults to what fills the
+    CPUs, hash_mb to an equal share of memory_fraction of the available memory. analysis engines (the GUI's
+    eval bars) search all the time, so each gets analysis_threads CPUs of its own after the game slots and
+    counts against the memory like a game engine. A plan that needs more CPUs or memory than there are
+    raises ValueError.
+    """
+
+    def __init__(self, concurrency, threads=None, hash_mb=None, cpus=None, memory_mb=None, memory_fraction=DEFAULT_MEMORY_FRACTION,
+                 registry=None, analysis=0, analysis_threads=1):
+        self.concurrency = max(1, concurrency)
+        self.registry = registry
+        self.analysis = analysis
+        self.analysis_threads = analysis_threads
+        cpus = core_order(cpus or available_cpus())
+        reserved = analysis * analysis_threads
+        self.threads = threads if threads is not None else (len(cpus) - reserved) // self.concurrency
+        if self.threads < 1 or self.threads * self.concurrency + reserved > len(cpus):
+            analysis_text = f" and {analysis} analysis engines with {analysis_threads} each" if analysis else ""
+            raise ValueError(f"{self.concurrency} games with {max(self.threads, 1)} threads each{analysis_text} need "
+                             f"{max(self.threads, 1) * self.concurrency + reserved} CPUs, {len(cpus)} available")
+        # Every engine process keeps its Hash, also while the other side is to move
+        engines = 2 * self.concurrency + analysis
+        self.memory_mb = available_memory_mb() if memory_mb is None else memory_mb
+        budget = self.memory_mb * memory_fraction if self.memory_mb else None
+        if hash_mb is None and budget:
+            # Engines want a power of two, anything between is wasted by most of them
+            hash_mb = 1 << max(0, int(budget // engines).bit_length() - 1)
+        if hash_mb is not None and budget is not None and hash_mb * engines > budget:
+            raise ValueError(f"{engines} engines with {hash_mb} MB Hash each need {hash_mb * engines} MB, "
+                             f"{budget:.0f} MB ({memory_fraction:.0%} of {self.memory_mb} MB) available")
+        self.hash_mb = hash_mb
+        self.cpus = cpus[:self.threads * self.concurrency]
+        self.analysis_cpus = cpus[len(self.cpus):len(self.cpus) + reserved]
+        self.pin = hasattr(os, "sched_setaffinity")
+        self.slots = [self.cpus[slot * self.threads:(slot + 1) * self.threads] for slot in range(self.concurrency)]
+        self.free = list(range(self.concurrency))
+        self.games = {}
+
+    @classmethod
+    def from_config(cls, settings, concurrency, registry=None, analysis=0, analysis_threads=1):
+        if settings is None:
+            return None
+        return cls(concurrency, registry=registry, analysis=analysis, analysis_threads=analysis_threads, **settings)
+
+    def limits(self, names):
+        # Both sides get what the more limited engine accepts, a larger Hash or more threads on one side would skew the result
+        threads, hash_mb = self.threads, self.hash_mb
+        for name in names:
+            entry = self.registry.entries.get(name) if self.registry else None
+            if entry is None:
+                continue
+            if entry["threads"] and entry["threads"][1] is not None:
+                threads = min(threads, entry["threads"][1])
+            if hash_mb is not None and entry["hash"] and entry["hash"][1] is not None:
+                hash_mb = min(hash_mb, entry["hash"][1])
+        return threads, hash_mb
+
+    def options(self, engine, threads, hash_mb):
+        options = {"Threads": threads, "Hash": hash_mb}
+        return {name: value for name, value in options.items() if value is not None and name in engine.options}
+
+    async def assign(self, job, engines):
+        """Gives the game a free slot, pins and configures both engines, returns the assignment as logged."""
+        slot = self.free.pop(0)
+        threads, hash_mb = self.limits([name for name, _ in engines.values()])
+        (white, white_engine), (black, black_engine) = engines[chess.WHITE], engines[chess.BLACK]
+        white_options, black_options = self.options(white_engine, threads, hash_mb), self.options(black_engine, threads, hash_mb)
+        if white_options != black_options:
+            # One of them cannot be told its Threads or Hash, so the two would not play on equal terms
+            self.free.append(slot)
+            raise ValueError(f"unequal resources: {white} {white_options}, {black} {black_options}")
+        self.games[job["id"]] = (slot, threads, hash_mb)
+        for _, engine in engines.values():
+            await self.apply(job, engine)
+        assignment = {"slot": slot, "threads": threads, "hash_mb": hash_mb, "cpus": self.slots[slot], "pinned": self.pin}
+        print(f"Game {job['id'] + 1} resources: slot {slot + 1}, Threads {threads}, Hash {f'{hash_mb} MB' if hash_mb else 'default'}, "
+              f"CPUs {format_cpus(self.slots[slot])}{'' if self.pin else ' (not pinned)'}")
+        return assignment
+
+    async def apply(self, job, engine):
+        """Pins engine to the CPUs of its game and sets its Threads and Hash, also for an engine restarted mid-game."""
+        if job["id"] not in self.games:
+            return
+        slot, threads, hash_mb = self.games[job["id"]]
+        # Pinned first, so search threads the engine starts for the new Threads setting inherit the CPUs
+        if self.pin:
+            pin_process(engine.transport.get_pid(), self.slots[slot])
+        options = self.options(engine, threads, hash_mb)
+        if options:
+            await engine.configure(options)
+
+    async def apply_analysis(self, name, engine):
+        """Pins an analysis engine to the CPUs kept for analysis and sets its Threads and Hash within name's limits."""
+        if self.pin and self.analysis_cpus:
+            pin_process(engine.transport.get_pid(), self.analysis_cpus)
+        hash_mb = self.hash_mb
+        entry = self.registry.entries.get(name) if self.registry else None
+        if hash_mb is not None and entry and entry["hash"] and entry["hash"][1] is not None:
+            hash_mb = min(hash_mb, entry["hash"][1])
+        options = self.options(engine, self.analysis_threads, hash_mb)
+        if options:
+            await engine.configure(options)
+
+    def release(self, job):
+        game = self.games.pop(job["id"], None)
+        if game:
+            self.free.append(game[0])
+
+    def summary(self):
+        return {"concurrency": self.concurrency, "threads": self.threads, "hash_mb": self.hash_mb, "cpus": self.cpus,
+                "analysis": self.analysis, "analysis_cpus": self.analysis_cpus, "memory_mb": self.memory_mb, "pinned": self.pin}
+
+    def report(self):
+        print(f"Resources: {self.concurrency} games x {self.threads} threads on CPUs {format_cpus(self.cpus)}, "
+              f"Hash {f'{self.hash_mb} MB' if self.hash_mb else 'default'} per engine{', pinned' if self.pin else ''}"
+              + (f"; {self.analysis} analysis engines on CPUs {format_cpus(self.analysis_cpus)}" if self.analysis else ""))
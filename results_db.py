@@ -0,0 +1,294 @@
+import argparse
+import chess
+import chess.pgn
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+from elo import GAME_POINTS
+from sp_index import back_rank, describe
+
+
+RESULTS_DB_FILENAME = os.path.join("SavedGames", "results.db")
+IMPORT_BATCH = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS engines (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS start_positions (
+    sp INTEGER PRIMARY KEY,
+    back_rank TEXT NOT NULL,
+    king_file TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    key TEXT UNIQUE NOT NULL,
+    event TEXT,
+    round TEXT,
+    date TEXT,
+    white_id INTEGER NOT NULL REFERENCES engines(id),
+    black_id INTEGER NOT NULL REFERENCES engines(id),
+    sp INTEGER REFERENCES start_positions(sp),
+    result TEXT NOT NULL,
+    white_points REAL,
+    termination TEXT,
+    time_control TEXT,
+    plies INTEGER,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS games_white ON games(white_id, sp, white_points);
+CREATE INDEX IF NOT EXISTS games_black ON games(black_id, sp, white_points);
+CREATE INDEX IF NOT EXISTS games_sp ON games(sp, white_points);
+CREATE INDEX IF NOT EXISTS games_date ON games(date, white_id, black_id, white_points);
+CREATE INDEX IF NOT EXISTS games_event ON games(event);
+CREATE TABLE IF NOT EXISTS pairings (
+    event TEXT NOT NULL,
+    white_id INTEGER NOT NULL,
+    black_id INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    white_points REAL NOT NULL,
+    white_wins INTEGER NOT NULL,
+    draws INTEGER NOT NULL,
+    PRIMARY KEY (event, white_id, black_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS moves (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    ply INTEGER NOT NULL,
+    move TEXT NOT NULL,
+    wall REAL,
+    search REAL,
+    score INTEGER,
+    PRIMARY KEY (game_id, ply)
+) WITHOUT ROWID;
+"""
+
+
+def content_key(headers, moves):
+    # Same headers and moves means the same game, whether it was recorded live or imported from its PGN later
+    fields = [headers.get(name, "") for name in ("Event", "Round", "Date", "White", "Black", "Startpos", "FEN")]
+    text = "|".join(fields) + "|" + " ".join(move.uci() for move in moves)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def game_filter(event=None, sp=None, since=None, until=None):
+    clauses, params = [], []
+    for column, operator, value in (("event", "=", event), ("sp", "=", sp), ("date", ">=", since), ("date", "<=", until)):
+        if value is not None:
+            clauses.append(f"{column} {operator} ?")
+            params.append(value)
+    return (" AND ".join(clauses) or "1"), params
+
+
+class ResultsDB:
+    def __init__(self, path=RESULTS_DB_FILENAME):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        if not self.conn.execute("SELECT 1 FROM start_positions LIMIT 1").fetchone():
+            self.conn.executemany("INSERT INTO start_positions VALUES (?, ?, ?)",
+                                  ((sp, back_rank(sp), describe(sp).king_file) for sp in range(960)))
+        self.conn.commit()
+        self.engine_ids = dict(self.conn.execute("SELECT name, id FROM engines"))
+
+    def close(self):
+        self.conn.close()
+
+    def engine_id(self, name):
+        if name not in self.engine_ids:
+            self.conn.execute("INSERT OR IGNORE INTO engines (name) VALUES (?)", (name,))
+            self.engine_ids[name] = self.conn.execute("SELECT id FROM engines WHERE name = ?", (name,)).fetchone()[0]
+        return self.engine_ids[name]
+
+    def insert_game(self, headers, moves, timings=None, source=None):
+        key = content_key(headers, moves)
+        startpos = headers.get("Startpos", "")
+        result = headers.get("Result", "*")
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO games (key, event, round, date, white_id, black_id, sp, result, white_points, termination, time_control, plies, source) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, headers.get("Event"), headers.get("Round"), headers.get("Date"),
+             self.engine_id(headers.get("White", "?")), self.engine_id(headers.get("Black", "?")),
+             int(startpos) if startpos.isdigit() else None, result, GAME_POINTS.get(result),
+             headers.get("Termination"), headers.get("TimeControl"), len(moves), source))
+        if not cursor.rowcount:
+            return False
+
+        game_id = cursor.lastrowid
+        if result in GAME_POINTS:
+            # Running totals per pairing keep standings and cross-tables independent of the number of games
+            self.conn.execute(
+                "INSERT INTO pairings VALUES (?, ?, ?, 1, ?, ?, ?) ON CONFLICT DO UPDATE SET "
+                "games = games + 1, white_points = white_points + excluded.white_points, "
+                "white_wins = white_wins + excluded.white_wins, draws = draws + excluded.draws",
+                (headers.get("Event") or "", self.engine_id(headers.get("White", "?")), self.engine_id(headers.get("Black", "?")),
+                 GAME_POINTS[result], int(result == "1-0"), int(result == "1/2-1/2")))
+        timings = timings or []
+        self.conn.executemany(
+            "INSERT INTO moves VALUES (?, ?, ?, ?, ?, ?)",
+            ((game_id, ply, move.uci(),
+              timings[ply]["wall"] if ply < len(timings) else None,
+              timings[ply]["search"] if ply < len(timings) else None,
+              timings[ply].get("score") if ply < len(timings) else None)
+             for ply, move in enumerate(moves)))
+        return True
+
+    def add_game(self, game, timings=None, source=None):
+        added = self.insert_game(game.headers, list(game.mainline_moves()), timings, source)
+        self.conn.commit()
+        return added
+
+    def import_pgn(self, filename):
+        start = time.perf_counter()
+        added = skipped = 0
+        with open(filename, "r", encoding="utf-8", errors="replace") as f:
+            while True:
+                game = chess.pgn.read_game(f)
+                if game is None:
+                    break
+                if self.insert_game(game.headers, list(game.mainline_moves()), source=filename):
+                    added += 1
+                else:
+                    skipped += 1
+                if (added + skipped) % IMPORT_BATCH == 0:
+                    self.conn.commit()
+        self.conn.commit()
+        print(f"Imported {filename}: {added} new, {skipped} already stored ({time.perf_counter() - start:.2f}s)")
+        return added
+
+    def pairing_scores(self, event=None, sp=None, since=None, until=None):
+        # (white, black, games, white points, white wins, draws) for every pairing that played
+        if sp is None and since is None and until is None:
+            where, params = ("event = ?", [event]) if event is not None else ("1", [])
+            query = f"SELECT white_id, black_id, SUM(games), SUM(white_points), SUM(white_wins), SUM(draws) FROM pairings WHERE {where} GROUP BY white_id, black_id"
+        else:
+            where, params = game_filter(event, sp, since, until)
+            # Left alone, SQLite prefers an engine index to save the GROUP BY sort and then reads every row for the date
+            table = "games INDEXED BY games_date" if sp is None else "games"
+            query = (f"SELECT white_id, black_id, COUNT(*), SUM(white_points), SUM(white_points = 1), SUM(white_points = 0.5) "
+                     f"FROM {table} WHERE white_points IS NOT NULL AND {where} GROUP BY white_id, black_id")
+        names = {engine_id: name for name, engine_id in self.engine_ids.items()}
+        return [(names[white], names[black], games, points, wins, draws)
+                for white, black, games, points, wins, draws in self.conn.execute(query, params)]
+
+    def standings(self, **filters):
+        rows = {}
+        for white, black, games, points, wins, draws in self.pairing_scores(**filters):
+            losses = games - wins - draws
+            for engine, score, won, lost in ((white, points, wins, losses), (black, games - points, losses, wins)):
+                row = rows.setdefault(engine, {"engine": engine, "points": 0.0, "games": 0, "wins": 0, "draws": 0, "losses": 0})
+                row["points"] += score
+                row["games"] += games
+                row["wins"] += won
+                row["draws"] += draws
+                row["losses"] += lost
+        return sorted(rows.values(), key=lambda row: -row["points"])
+
+    def cross_table(self, **filters):
+        table = {}
+        for white, black, games, points, wins, draws in self.pairing_scores(**filters):
+            for engine, opponent, score in ((white, black, points), (black, white, games - points)):
+                cell = table.setdefault(engine, {}).setdefault(opponent, [0.0, 0])
+                cell[0] += score
+                cell[1] += games
+        return table
+
+    def engine_sp_scores(self, engine, **filters):
+        where, params = game_filter(**filters)
+        engine_id = self.engine_ids.get(engine)
+        rows = self.conn.execute(f"""
+            SELECT sp, SUM(points), COUNT(*) FROM (
+                SELECT sp, white_points AS points FROM games WHERE white_id = ? AND white_points IS NOT NULL AND {where}
+                UNION ALL
+                SELECT sp, 1 - white_points FROM games WHERE black_id = ? AND white_points IS NOT NULL AND {where}
+            ) GROUP BY sp""", [engine_id] + params + [engine_id] + params)
+        return {sp: (points, games) for sp, points, games in rows}
+
+    def decisive_positions(self, limit=20, min_games=1, **filters):
+        where, params = game_filter(**filters)
+        rows = self.conn.execute(f"""
+            SELECT g.sp, s.back_rank, COUNT(*), SUM(white_points != 0.5), SUM(white_points)
+            FROM games g JOIN start_positions s ON s.sp = g.sp
+            WHERE white_points IS NOT NULL AND {where}
+            GROUP BY g.sp HAVING COUNT(*) >= ?
+            ORDER BY SUM(white_points != 0.5) * 1.0 / COUNT(*) DESC, COUNT(*) DESC LIMIT ?""", params + [min_games, limit])
+        return [{"sp": sp, "back_rank": rank, "games": games, "decisive": decisive, "white_points": white}
+                for sp, rank, games, decisive, white in rows]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Query the Chess960 results database.")
+    parser.add_argument("--db", default=RESULTS_DB_FILENAME)
+    parser.add_argument("--event")
+    parser.add_argument("--since", help="first date to include, YYYY.MM.DD")
+    parser.add_argument("--until", help="last date to include, YYYY.MM.DD")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_pgn = commands.add_parser("import", help="import PGN files, games already stored are skipped")
+    import_pgn.add_argument("files", nargs="+")
+
+    commands.add_parser("standings")
+    commands.add_parser("crosstable")
+
+    engine = commands.add_parser("engine", help="an engine's score per start position")
+    engine.add_argument("name")
+    engine.add_argument("--sp", type=int, help="compare this start position against all others")
+
+    positions = commands.add_parser("positions", help="start positions with the most decisive games")
+    positions.add_argument("--limit", type=int, default=20)
+    positions.add_argument("--min-games", type=int, default=2)
+
+    return parser.parse_args(argv)
+
+
+def percent(points, games):
+    return f"{100 * points / games:.1f}%" if games else "-"
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    db = ResultsDB(args.db)
+    filters = {"event": args.event, "since": args.since, "until": args.until}
+    start = time.perf_counter()
+
+    if args.command == "import":
+        for filename in args.files:
+            db.import_pgn(filename)
+    elif args.command == "standings":
+        for row in db.standings(**filters):
+            print(f"{row['engine']:<20} {row['points']:>7.1f} / {row['games']:<6} +{row['wins']} ={row['draws']} -{row['losses']}  {percent(row['points'], row['games'])}")
+    elif args.command == "crosstable":
+        table = db.cross_table(**filters)
+        names = sorted(table)
+        width = max([len(name) for name in names] + [6])
+        print(" " * width + "".join(f"{name[:10]:>12}" for name in names))
+        for name in names:
+            cells = [f"{table[name][opponent][0]:.1f}/{table[name][opponent][1]}" if opponent in table[name] else "" for opponent in names]
+            print(f"{name:<{width}}" + "".join(f"{cell:>12}" for cell in cells))
+    elif args.command == "engine":
+        scores = db.engine_sp_scores(args.name, **filters)
+        if args.sp is not None:
+            points, games = scores.get(args.sp, (0.0, 0))
+            other_points = sum(p for sp, (p, g) in scores.items() if sp != args.sp)
+            other_games = sum(g for sp, (p, g) in scores.items() if sp != args.sp)
+            print(f"{args.name} from SP {args.sp}: {points:.1f}/{games} ({percent(points, games)})")
+            print(f"{args.name} from other SPs: {other_points:.1f}/{other_games} ({percent(other_points, other_games)})")
+        else:
+            for sp, (points, games) in sorted(scores.items(), key=lambda item: (item[0] is None, item[0])):
+                print(f"SP {sp}: {points:.1f}/{games} ({percent(points, games)})")
+    elif args.command == "positions":
+        for row in db.decisive_positions(args.limit, args.min_games, **filters):
+            print(f"SP {row['sp']:>3} {row['back_rank']}  {row['decisive']}/{row['games']} decisive ({percent(row['decisive'], row['games'])}), "
+                  f"White scores {percent(row['white_points'], row['games'])}")
+
+    print(f"({(time.perf_counter() - start) * 1000:.1f} ms)", file=sys.stderr)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import functools
+import random
+from collections import namedtuple
+
+FILES = "abcdefgh"
+KNIGHT_PLACEMENTS = [(0, 1), (0, 2), (0, 3), (0, 4), (1, 2), (1, 3), (1, 4), (2, 3), (2, 4), (3, 4)]
+
+StartPosition = namedtuple("StartPosition", [
+    "sp",
+    "back_rank",
+    "king_file",
+    "queenside_rook_file",
+    "kingside_rook_file",
+    "queen_file",
+    "knight_files",
+    "light_bishop_file",
+    "dark_bishop_file",
+    "kingside_rook_adjacent",
+    "queenside_rook_adjacent",
+    "kingside_king_steps",
+    "queenside_king_steps",
+    "kingside_blockers",
+    "queenside_blockers"
+])
+
+
+def back_rank(sp):
+    rank = [None] * 8
+    n, light = divmod(sp, 4)
+    rank[2 * light + 1] = "B"
+    n, dark = divmod(n, 4)
+    rank[2 * dark] = "B"
+    n, queen = divmod(n, 6)
+    empty = [i for i in range(8) if rank[i] is None]
+    rank[empty[queen]] = "Q"
+    empty = [i for i in range(8) if rank[i] is None]
+    for i in KNIGHT_PLACEMENTS[n]:
+        rank[empty[i]] = "N"
+    for i, piece in zip([i for i in range(8) if rank[i] is None], "RKR"):
+        rank[i] = piece
+    return "".join(rank)
+
+
+def castling_blockers(king, rook, king_to, rook_to):
+    squares = set(range(min(king, king_to), max(king, king_to) + 1)) | set(range(min(rook, rook_to), max(rook, rook_to) + 1))
+    return len(squares - {king, rook})
+
+
+def describe(sp):
+    rank = back_rank(sp)
+    king = rank.index("K")
+    rooks = [i for i, piece in enumerate(rank) if piece == "R"]
+    bishops = [i for i, piece in enumerate(rank) if piece == "B"]
+    light, dark = (bishops[0], bishops[1]) if bishops[0] % 2 else (bishops[1], bishops[0])
+    return StartPosition(
+        sp=sp,
+        back_rank=rank,
+        king_file=FILES[king],
+        queenside_rook_file=FILES[rooks[0]],
+        kingside_rook_file=FILES[rooks[1]],
+        queen_file=FILES[rank.index("Q")],
+        knight_files="".join(FILES[i] for i, piece in enumerate(rank) if piece == "N"),
+        light_bishop_file=FILES[light],
+        dark_bishop_file=FILES[dark],
+        kingside_rook_adjacent=rooks[1] == king + 1,
+        queenside_rook_adjacent=rooks[0] == king - 1,
+        kingside_king_steps=abs(6 - king),
+        queenside_king_steps=abs(2 - king),
+        kingside_blockers=castling_blockers(king, rooks[1], 6, 5),
+        queenside_blockers=castling_blockers(king, rooks[0], 2, 3)
+    )
+
+
+class StartPositionIndex:
+    def __init__(self):
+        self.positions = tuple(describe(sp) for sp in range(960))
+        self.by_feature = {}
+        for field in StartPosition._fields[2:]:
+            values = {}
+            for position in self.positions:
+                values.setdefault(getattr(position, field), set()).add(position.sp)
+            self.by_feature[field] = {value: frozenset(sps) for value, sps in values.items()}
+
+    def __getitem__(self, sp):
+        return self.positions[sp]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def matching(self, field, value):
+        if field not in self.by_feature:
+            raise KeyError(f"Unknown start position feature: {field}")
+        if callable(value):
+            return frozenset(sp for feature, sps in self.by_feature[field].items() if value(feature) for sp in sps)
+        if isinstance(value, (list, set, frozenset)):
+            return frozenset().union(*(self.by_feature[field].get(v, frozenset()) for v in value))
+        return self.by_feature[field].get(value, frozenset())
+
+    def find(self, **criteria):
+        result = frozenset(range(len(self.positions)))
+        for field, value in criteria.items():
+            result &= self.matching(field, value)
+        return sorted(result)
+
+    def random(self, rng=random, **criteria):
+        candidates = self.find(**criteria)
+        if not candidates:
+            raise ValueError(f"No start position matches {criteria}")
+        return rng.choice(candidates)
+
+
+@functools.lru_cache(maxsize=None)
+def start_position_index():
+    return StartPositionIndex()
+
+
+def pick_start_position(sp_filter=None, rng=random):
+    if not sp_filter:
+        return rng.randint(0, 959)
+    return start_position_index().random(rng, **sp_filter)
+
+
+class StartPositionSchedule:
+    """Start positions handed out in order, reproducible when seeded.
+
+    positions: play exactly these SPs, cycling if more are needed.
+    sample: draw this many distinct SPs once, then cycle through them.
+    Otherwise every call picks a fresh random SP. sp_filter narrows all three.
+    """
+
+    def __init__(self, sp_filter=None, seed=None, positions=None, sample=None):
+        self.sp_filter = sp_filter or {}
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.positions = None
+        allowed = start_position_index().find(**self.sp_filter) if self.sp_filter else list(range(960))
+        if positions:
+            allowed = set(allowed)
+            self.positions = [sp for sp in positions if sp in allowed]
+            if not self.positions:
+                raise ValueError("none of the listed start positions match the filter")
+        elif sample:
+            self.positions = self.rng.sample(allowed, min(sample, len(allowed)))
+        self.next_index = 0
+
+    def next(self):
+        if self.positions:
+            sp = self.positions[self.next_index % len(self.positions)]
+            self.next_index += 1
+            return sp
+        return pick_start_position(self.sp_filter, self.rng)
+
+    def state(self):
+        version, internal, gauss = self.rng.getstate()
+        return {"positions": self.positions, "next_index": self.next_index, "rng": [version, list(internal), gauss]}
+
+    def restore(self, state):
+        version, internal, gauss = state["rng"]
+        self.rng.setstate((version, tuple(internal), gauss))
+        self.positions = state["positions"]
+        self.next_index = state["next_index"]
+
+
+def parse_sp_list(text):
+    positions = [int(item) for item in text.replace(",", " ").split()] if text else []
+    if any(not 0 <= sp < 960 for sp in positions):
+        raise ValueError("start positions must be between 0 and 959")
+    return positions
+
+
+def parse_sp_filter(items):
+    sp_filter = {}
+    for item in items or []:
+        field, _, value = item.partition("=")
+        if value.lower() in ("true", "false"):
+            sp_filter[field] = value.lower() == "true"
+        elif value.isdigit():
+            sp_filter[field] = int(value)
+        elif "," in value:
+            sp_filter[field] = value.split(",")
+        else:
+            sp_filter[field] = value
+    return sp_filter
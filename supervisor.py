@@ -0,0 +1,88 @@
+import asyncio
+import chess
+import chess.engine
+
+FAILURES = ("crash", "hang", "illegal move")
+TERMINATIONS = {"crash": "abandoned", "hang": "abandoned", "illegal move": "rules infraction"}
+
+
+class EngineFailure(Exception):
+    def __init__(self, kind, detail=""):
+        super().__init__(f"{kind}: {detail}" if detail else kind)
+        self.kind = kind
+        self.detail = detail
+
+
+async def supervised_play(engine, board, limit, deadline, **kwargs):
+    """engine.play() that turns every way an engine can fail into an EngineFailure."""
+    try:
+        played = await asyncio.wait_for(engine.play(board, limit, **kwargs), deadline)
+    except asyncio.TimeoutError:
+        raise EngineFailure("hang", f"no bestmove within {deadline:.1f}s")
+    except chess.engine.EngineTerminatedError as e:
+        raise EngineFailure("crash", str(e))
+    except chess.engine.EngineError as e:
+        # python-chess plays bestmove on a copy of the position and wraps the ValueError a bad move raises
+        illegal = any(isinstance(cause, ValueError) for cause in (*e.args[:1], e.__cause__, e.__context__))
+        raise EngineFailure("illegal move" if illegal else "crash", str(e))
+    if played.move is None:
+        raise EngineFailure("illegal move", "bestmove (none) in a position with legal moves")
+    return played
+
+
+class EngineSupervisor:
+    """Replaces engines that crash, hang or play illegal moves, and decides whether their game goes on.
+
+    policy maps each failure kind to "continue" (restart the engine and carry on from the current position)
+    or "forfeit" (the failing side loses). A game continues at most max_restarts times. With a resource plan
+    the replacement gets the CPUs, Threads and Hash of the engine it replaces.
+    """
+
+    def __init__(self, engine_pool, policy=None, hang_timeout=10.0, max_restarts=3, resources=None):
+        self.engine_pool = engine_pool
+        self.resources = resources
+        self.policy = {"crash": "continue", "hang": "continue", "illegal move": "forfeit"}
+        self.policy.update(policy or {})
+        self.hang_timeout = hang_timeout
+        self.max_restarts = max_restarts
+        self.failures = {kind: 0 for kind in FAILURES}
+        self.restarts = 0
+        self.forfeits = 0
+
+    @classmethod
+    def from_config(cls, engine_pool, settings, resources=None):
+        settings = dict(settings or {})
+        policy = {kind: settings.pop(f"on_{kind.replace(' ', '_')}") for kind in FAILURES if f"on_{kind.replace(' ', '_')}" in settings}
+        return cls(engine_pool, policy, resources=resources, **settings)
+
+    def deadline(self, allotted):
+        return allotted + self.hang_timeout
+
+    async def handle(self, failure, engines, color, board, restarts, job=None):
+        """Discards the failed engine, then returns a replacement, or None if the game is forfeited."""
+        name, engine = engines[color]
+        self.failures[failure.kind] += 1
+        print(f"[{name}] {failure} (move {board.fullmove_number}, {'White' if color == chess.WHITE else 'Black'})")
+        self.engine_pool.log_event(name, f"{failure} at {board.fen()}")
+        await self.engine_pool.discard(name, engine)
+        engines[color] = (name, None)
+
+        if self.policy.get(failure.kind) != "continue" or restarts >= self.max_restarts:
+            self.forfeits += 1
+            return None
+        engine = await self.engine_pool.acquire(name)
+        engines[color] = (name, engine)
+        if self.resources and job:
+            await self.resources.apply(job, engine)
+        self.restarts += 1
+        print(f"[{name}] Restarted, continuing from {board.fen()}")
+        return engine
+
+    def summary(self):
+        return {"failures": dict(self.failures), "restarts": self.restarts, "forfeits": self.forfeits}
+
+    def report(self):
+        if not any(self.failures.values()):
+            return
+        failures = ", ".join(f"{count} {kind}" for kind, count in self.failures.items() if count)
+        print(f"Engine failures: {failures}; {self.restarts} restarts, {self.forfeits} games forfeited")
@@ -0,0 +1,205 @@
+import math
+import time
+from elo import GAME_POINTS
+from match_core import new_job
+from sp_index import StartPositionSchedule
+
+# Depth-first pairing gives up on a no-rematch pairing after this many tries and allows rematches instead
+MAX_PAIRING_STEPS = 20000
+
+
+def default_swiss_rounds(players):
+    return max(1, math.ceil(math.log2(max(players, 2))) + 2)
+
+
+class SwissTournament:
+    """Swiss system run as a job source for GameScheduler.
+
+    Each round pairs players within score groups (top half against bottom half), balances colours,
+    never repeats a pairing unless no other pairing exists, and gives the lowest ranked player
+    without a bye a one point bye. Every pairing plays games_per_pairing games with colours alternating.
+    The next round is paired as soon as the last game of the current one is recorded.
+    """
+
+    def __init__(self, engines, rounds, games_per_pairing, time_control, event, sp_schedule=None, paired=False):
+        self.rounds = rounds
+        self.games_per_pairing = max(1, games_per_pairing)
+        self.time_control = time_control
+        self.event = event
+        self.sp_schedule = sp_schedule or StartPositionSchedule()
+        self.paired = paired
+        self.players = {
+            name: {"seed": seed, "score": 0.0, "games": [], "colors": [], "byes": 0, "opponents": set()}
+            for seed, name in enumerate(engines)
+        }
+        self.round = 0
+        self.next_id = 0
+        self.next_pair = 0
+        self.outstanding = 0
+        self.pairing_time = 0.0
+        self.rematches = 0
+
+    def start(self):
+        return self.next_round()
+
+    def job_done(self, job, record):
+        if record:
+            points = GAME_POINTS.get(record["result"])
+            if points is not None:
+                white, black = self.players[job["white"]], self.players[job["black"]]
+                white["score"] += points
+                black["score"] += 1 - points
+                white["games"].append((job["black"], points))
+                black["games"].append((job["white"], 1 - points))
+            self.players[job["white"]]["colors"].append(1)
+            self.players[job["black"]]["colors"].append(-1)
+        self.outstanding -= 1
+        if self.outstanding == 0:
+            return self.next_round()
+        return []
+
+    def next_round(self):
+        while self.round < self.rounds:
+            self.round += 1
+            start = time.perf_counter()
+            pairings, bye = self.pair_round()
+            elapsed = time.perf_counter() - start
+            self.pairing_time += elapsed
+
+            if bye:
+                self.players[bye]["score"] += 1
+                self.players[bye]["byes"] += 1
+            jobs = self.make_jobs(pairings)
+            self.outstanding = len(jobs)
+            bye_text = f", bye: {bye}" if bye else ""
+            print(f"Swiss round {self.round}/{self.rounds}: {len(pairings)} pairings in {elapsed * 1000:.1f} ms{bye_text}")
+            if jobs:
+                return jobs
+        return []
+
+    def make_jobs(self, pairings):
+        jobs = []
+        for white, black in pairings:
+            sp = None
+            for i in range(self.games_per_pairing):
+                if not self.paired or i % 2 == 0:
+                    sp = self.sp_schedule.next()
+                game_white, game_black = (white, black) if i % 2 == 0 else (black, white)
+                jobs.append(new_job(self.next_id, game_white, game_black, self.round, self.time_control, self.event, sp,
+                                    pair=self.next_pair + i // 2))
+                self.next_id += 1
+            self.next_pair += (self.games_per_pairing + 1) // 2
+            for a, b in ((white, black), (black, white)):
+                self.players[a]["opponents"].add(b)
+        return jobs
+
+    def state(self):
+        players = {name: dict(player, opponents=sorted(player["opponents"])) for name, player in self.players.items()}
+        return {
+            "event": self.event, "round": self.round, "next_id": self.next_id, "next_pair": self.next_pair,
+            "outstanding": self.outstanding, "pairing_time": self.pairing_time, "rematches": self.rematches,
+            "players": players, "sp_schedule": self.sp_schedule.state()
+        }
+
+    def restore(self, state):
+        # Game lists come back from JSON as lists, the code only unpacks them so they need no conversion
+        self.event = state["event"]
+        self.round = state["round"]
+        self.next_id = state["next_id"]
+        self.next_pair = state["next_pair"]
+        self.outstanding = state["outstanding"]
+        self.pairing_time = state["pairing_time"]
+        self.rematches = state["rematches"]
+        self.players = {name: dict(player, opponents=set(player["opponents"])) for name, player in state["players"].items()}
+        self.sp_schedule.restore(state["sp_schedule"])
+
+    def ranked(self):
+        return sorted(self.players, key=lambda name: (-self.players[name]["score"], self.players[name]["seed"]))
+
+    def pair_round(self):
+        ranked = self.ranked()
+        bye = None
+        if len(ranked) % 2:
+            # min() keeps the first of equal keys, so scanning from the bottom picks the lowest ranked
+            bye = min(reversed(ranked), key=lambda name: self.players[name]["byes"])
+            ranked.remove(bye)
+
+        pairs = self.pair_players(ranked, allow_rematch=False)
+        if pairs is None:
+            pairs = self.pair_players(ranked, allow_rematch=True)
+            self.rematches += sum(1 for a, b in pairs if b in self.players[a]["opponents"])
+        return [self.assign_colors(a, b) for a, b in pairs], bye
+
+    def color_preference(self, name):
+        # Positive wants white: more blacks than whites so far, or black in each of the last two games
+        colors = self.players[name]["colors"]
+        balance = -sum(colors)
+        if len(colors) >= 2 and colors[-1] == colors[-2]:
+            balance -= colors[-1]
+        return balance
+
+    def pair_players(self, ranked, allow_rematch):
+        steps = 0
+        scores = {name: self.players[name]["score"] for name in ranked}
+        preferences = {name: self.color_preference(name) for name in ranked}
+
+        def candidates(player, remaining):
+            # remaining is in rank order, so score groups come one after another, each is sorted only when reached
+            index = 0
+            while index < len(remaining):
+                score = scores[remaining[index]]
+                end = index
+                while end < len(remaining) and scores[remaining[end]] == score:
+                    end += 1
+                group = remaining[index:end]
+                ideal = len(group) // 2 if score == scores[player] else 0
+                order = sorted(range(len(group)), key=lambda i: (preferences[player] * preferences[group[i]] > 0, abs(i - ideal)))
+                yield from (group[i] for i in order)
+                index = end
+
+        def pair(remaining):
+            nonlocal steps
+            if not remaining:
+                return []
+            player, rest = remaining[0], remaining[1:]
+            for opponent in candidates(player, rest):
+                steps += 1
+                if steps > MAX_PAIRING_STEPS:
+                    return None
+                if not allow_rematch and opponent in self.players[player]["opponents"]:
+                    continue
+                result = pair([name for name in rest if name != opponent])
+                if result is not None:
+                    return [(player, opponent)] + result
+            return None
+
+        return pair(ranked)
+
+    def assign_colors(self, a, b):
+        preference_a, preference_b = self.color_preference(a), self.color_preference(b)
+        if preference_a != preference_b:
+            return (a, b) if preference_a > preference_b else (b, a)
+        last_a = self.players[a]["colors"][-1:] or [0]
+        last_b = self.players[b]["colors"][-1:] or [0]
+        if last_a != last_b:
+            return (a, b) if last_a < last_b else (b, a)
+        return (a, b) if self.round % 2 else (b, a)
+
+    def scores(self):
+        """Points of every player, byes included; the scheduler's scores only count the games it played."""
+        return {name: player["score"] for name, player in self.players.items()}
+
+    def standings(self):
+        rows = []
+        for name, player in self.players.items():
+            buchholz = sum(self.players[opponent]["score"] for opponent, _ in player["games"])
+            sonneborn_berger = sum(points * self.players[opponent]["score"] for opponent, points in player["games"])
+            rows.append({"engine": name, "score": player["score"], "buchholz": buchholz, "sonneborn_berger": sonneborn_berger,
+                         "games": len(player["games"]), "byes": player["byes"]})
+        return sorted(rows, key=lambda row: (-row["score"], -row["buchholz"], -row["sonneborn_berger"], self.players[row["engine"]]["seed"]))
+
+    def report(self):
+        print(f"Swiss standings after {self.round} rounds (pairing took {self.pairing_time * 1000:.1f} ms in total"
+              f"{f', {self.rematches} forced rematches' if self.rematches else ''}):")
+        for place, row in enumerate(self.standings(), 1):
+            print(f"  {place:>3}. {row['engine']:<20} {row['score']:>5g}  Buchholz {row['buchholz']:g}  SB {row['sonneborn_berger']:g}")
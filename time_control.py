@@ -0,0 +1,112 @@
+import chess
+import chess.engine
+
+
+class TimeControl:
+    def __init__(self, base=0.0, increment=0.0, moves=None, per_move=None):
+        self.base = base
+        self.increment = increment
+        self.moves = moves
+        self.per_move = per_move
+
+    @classmethod
+    def parse(cls, text):
+        text = str(text).strip()
+        try:
+            if text.startswith("st="):
+                return cls(per_move=float(text[3:]))
+            if "/" not in text and "+" not in text:
+                return cls(per_move=float(text))
+            moves = None
+            if "/" in text:
+                moves, text = text.split("/", 1)
+                moves = int(moves)
+            base, _, increment = text.partition("+")
+            return cls(base=float(base), increment=float(increment or 0), moves=moves)
+        except ValueError:
+            raise ValueError(f"Invalid time control: {text!r} (use e.g. 1.0, st=1.0, 60+0.6, 40/60 or 40/60+0.6)")
+
+    def __str__(self):
+        if self.per_move is not None:
+            return f"st={self.per_move:g}"
+        if self.moves:
+            text = f"{self.moves}/{self.base:g}"
+            return f"{text}+{self.increment:g}" if self.increment else text
+        return f"{self.base:g}+{self.increment:g}"
+
+    def limit(self, clocks, turn):
+        if self.per_move is not None:
+            return chess.engine.Limit(time=self.per_move)
+        return chess.engine.Limit(
+            white_clock=max(clocks[chess.WHITE].remaining, 0.0),
+            black_clock=max(clocks[chess.BLACK].remaining, 0.0),
+            white_inc=self.increment,
+            black_inc=self.increment,
+            remaining_moves=clocks[turn].moves_to_go()
+        )
+
+    def allotted(self, clocks, turn):
+        if self.per_move is not None:
+            return self.per_move
+        return clocks[turn].remaining
+
+
+class Clock:
+    def __init__(self, time_control):
+        self.time_control = time_control
+        self.remaining = time_control.base
+        self.moves_made = 0
+
+    def moves_to_go(self):
+        if not self.time_control.moves:
+            return None
+        return self.time_control.moves - self.moves_made % self.time_control.moves
+
+    def charge(self, elapsed, margin=0.0):
+        # Returns True when the side has run out of time
+        self.remaining -= elapsed
+        return self.remaining + margin < 0
+
+    def update(self, elapsed, margin=0.0):
+        if self.charge(elapsed, margin):
+            return True
+        self.moves_made += 1
+        self.remaining += self.time_control.increment
+        if self.time_control.moves and self.moves_made % self.time_control.moves == 0:
+            self.remaining += self.time_control.base
+        return False
+
+
+class LatencyStats:
+    def __init__(self):
+        self.moves = 0
+        self.wall_time = 0.0
+        self.reported_moves = 0
+        self.search_time = 0.0
+        self.overhead = 0.0
+        self.max_overhead = 0.0
+        self.slow_moves = 0
+        self.time_losses = 0
+
+    def add(self, timing, margin):
+        self.moves += 1
+        self.wall_time += timing["wall"]
+        if timing["search"] is not None:
+            overhead = timing["wall"] - timing["search"]
+            self.reported_moves += 1
+            self.search_time += timing["search"]
+            self.overhead += overhead
+            self.max_overhead = max(self.max_overhead, overhead)
+        if timing["wall"] > timing["allotted"] + margin:
+            self.slow_moves += 1
+
+    def summary(self):
+        return {
+            "moves": self.moves,
+            "avg_wall": self.wall_time / self.moves if self.moves else 0.0,
+            "avg_search": self.search_time / self.reported_moves if self.reported_moves else None,
+            "avg_overhead": self.overhead / self.reported_moves if self.reported_moves else None,
+            "max_overhead": self.max_overhead,
+            "slow_moves": self.slow_moves,
+            "time_losses": self.time_losses
+        }
@@ -0,0 +1,148 @@
+import time
+import tkinter as tk
+import chess
+
+
+class MoveLog:
+    def __init__(self, text):
+        self.text = text
+        self.board = chess.Board(chess960=True)
+        self.sans = []
+
+    def entry(self, index, san):
+        if index % 2:
+            return f" {san}"
+        prefix = "\n" if index else ""
+        return f"{prefix}{index // 2 + 1}. {san}"
+
+    def reset(self, board):
+        self.board = board.root()
+        self.sans = []
+        for move in board.move_stack:
+            self.sans.append(self.board.san(move))
+            self.board.push(move)
+
+        self.text.configure(state='normal')
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, "".join(self.entry(i, san) for i, san in enumerate(self.sans)))
+        self.text.configure(state='disabled')
+        self.text.see(tk.END)
+
+    def append(self, move):
+        san = self.board.san(move)
+        self.board.push(move)
+        self.sans.append(san)
+
+        self.text.configure(state='normal')
+        self.text.insert(tk.END, self.entry(len(self.sans) - 1, san))
+        self.text.configure(state='disabled')
+        self.text.see(tk.END)
+
+
+class BoardView:
+    LIGHT = "#f0d9b5"
+    DARK = "#b58863"
+    SELECTED = "#f6f669"
+    LAST_MOVE = "#cdd26a"
+
+    def __init__(self, canvas, square_size, pieces):
+        self.canvas = canvas
+        self.square_size = square_size
+        self.pieces = pieces
+        self.square_items = {}
+        self.piece_items = {}
+        self.selected = None
+        self.highlighted = set()
+        self.last_draw_ms = 0.0
+
+        for square in chess.SQUARES:
+            x, y = self.square_origin(square)
+            self.square_items[square] = canvas.create_rectangle(x, y, x + square_size, y + square_size, fill=self.square_color(square))
+
+    def square_origin(self, square):
+        return chess.square_file(square) * self.square_size, (7 - chess.square_rank(square)) * self.square_size
+
+    def square_color(self, square):
+        if square == self.selected:
+            return self.SELECTED
+        if square in self.highlighted:
+            return self.LAST_MOVE
+        return self.LIGHT if (chess.square_file(square) + chess.square_rank(square)) % 2 else self.DARK
+
+    def square_at(self, x, y):
+        return chess.square(x // self.square_size, 7 - (y // self.square_size))
+
+    def draw(self, board):
+        start = time.perf_counter()
+        wanted = {square: ('w' if piece.color else 'b') + piece.symbol().upper() for square, piece in board.piece_map().items()}
+
+        for square in set(self.piece_items) | set(wanted):
+            key = wanted.get(square)
+            current = self.piece_items.get(square)
+            if current and current[1] == key:
+                continue
+            if key is None:
+                self.canvas.delete(current[0])
+                del self.piece_items[square]
+            elif current:
+                self.canvas.itemconfigure(current[0], image=self.pieces[key])
+                self.piece_items[square] = (current[0], key)
+            else:
+                x, y = self.square_origin(square)
+                self.piece_items[square] = (self.canvas.create_image(x, y, anchor='nw', image=self.pieces[key]), key)
+
+        self.last_draw_ms = (time.perf_counter() - start) * 1000
+
+    def select(self, square):
+        previous = self.selected
+        self.selected = square
+        for changed in (previous, square):
+            if changed is not None:
+                self.canvas.itemconfigure(self.square_items[changed], fill=self.square_color(changed))
+
+    def highlight(self, squares):
+        previous = self.highlighted
+        self.highlighted = set(squares)
+        for changed in previous ^ self.highlighted:
+            self.canvas.itemconfigure(self.square_items[changed], fill=self.square_color(changed))
+
+
+class MiniBoard:
+    """Small board for the dashboard: title, position with the last move marked, eval bar and clocks."""
+
+    EVAL_WIDTH = 8
+
+    def __init__(self, parent, square_size, pieces, on_click):
+        self.size = 8 * square_size
+        self.game_id = None
+        self.game = None
+        self.finished = False
+        self.frame = tk.Frame(parent, bd=1, relief="groove")
+        self.title = tk.Label(self.frame, text="", font=("Consolas", 9))
+        self.title.pack()
+        self.canvas = tk.Canvas(self.frame, width=self.size + self.EVAL_WIDTH, height=self.size, highlightthickness=0)
+        self.canvas.pack()
+        self.view = BoardView(self.canvas, square_size, pieces)
+        self.canvas.create_rectangle(self.size, 0, self.size + self.EVAL_WIDTH, self.size, fill="#333", width=0)
+        self.eval_bar = self.canvas.create_rectangle(self.size, self.size // 2, self.size + self.EVAL_WIDTH, self.size, fill="#eee", width=0)
+        self.clock = tk.Label(self.frame, text="", font=("Consolas", 9))
+        self.clock.pack()
+        for widget in (self.canvas, self.title, self.clock):
+            widget.bind("<Button-1>", lambda event: self.game is not None and on_click(self.game))
+
+    def show(self, game):
+        job = game["job"]
+        self.game_id = job["id"]
+        self.game = game
+        self.finished = game["result"] is not None
+        result = f"  {game['result']}" if self.finished else ""
+        self.title.config(text=f"{job['id'] + 1}: {job['white']} - {job['black']}{result}")
+        self.view.draw(game["board"])
+        move = game["move"]
+        self.view.highlight([move.from_square, move.to_square] if move else [])
+        # White's share of the bar grows from the bottom, scores are clamped to +-10 pawns
+        score = max(min(game["score"] or 0, 1000), -1000)
+        top = self.size - int((score + 1000) / 2000 * self.size)
+        self.canvas.coords(self.eval_bar, self.size, top, self.size + self.EVAL_WIDTH, self.size)
+        clocks = game["clocks"]
+        self.clock.config(text=f"{clocks[0]:.1f}s | {clocks[1]:.1f}s" if clocks else "")